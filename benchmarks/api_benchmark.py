@@ -0,0 +1,310 @@
+"""Latency and throughput benchmark of the API routes.
+
+A synthetic shard of realistic size (benchmarks/api_dataset.py) is served by the app,
+and each route is driven at the given concurrency levels, in-process through the ASGI
+app and over HTTP through uvicorn. For every route the p50/p95/p99 latency,
+throughput, SQL statements per request and memory allocated per request are recorded.
+
+Results are written as JSON, tagged with the current commit, so that runs can be
+compared between commits with `--compare`. Comparing a run with `--no-compress-text`
+against one without it gives the size and latency cost of the compressed text columns.
+
+Usage:
+    uv run python benchmarks/api_benchmark.py [--concurrency 1,8,32] [--requests 300]
+        [--mode asgi,http] [--output results.json] [--compare baseline.json]
+        [--no-compress-text]
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+import api_dataset
+import httpx
+import uvicorn
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+ROOT = Path(__file__).resolve().parent.parent
+TERM = "Semester 1"
+
+
+class StatementCounter:
+    """Count the SQL statements executed by every engine."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.lock = threading.Lock()
+        event.listen(Engine, "before_cursor_execute", self.on_execute)
+
+    def on_execute(self, *args) -> None:
+        with self.lock:
+            self.count += 1
+
+
+def route_urls(db_path: str, year: int, requests: int, seed: int = 0) -> dict:
+    """Request paths of each benchmarked route, sampled from the dataset."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    subjects = [
+        row[0]
+        for row in conn.execute(
+            "SELECT subject FROM subject_terms WHERE year = ? AND term = ?",
+            (str(year), TERM),
+        )
+    ]
+    course_ids = [row[0] for row in conn.execute("SELECT id FROM courses")]
+    conn.close()
+
+    def sample(make):
+        return [make() for _ in range(requests)]
+
+    return {
+        "subjects": sample(lambda: f"/subjects?year={year}&term={TERM}"),
+        "subjects_counts": sample(
+            lambda: f"/subjects?year={year}&term={TERM}&counts=true"
+        ),
+        "courses": sample(
+            lambda: f"/courses?year={year}&term={TERM}&subject={rng.choice(subjects)}"
+        ),
+        "course": sample(lambda: f"/courses/{rng.choice(course_ids)}"),
+        "course_prerequisites": sample(
+            lambda: f"/courses/{rng.choice(course_ids)}/prerequisites"
+        ),
+    }
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def drive(client: httpx.AsyncClient, urls: list[str], concurrency: int) -> dict:
+    """Request every url with `concurrency` requests in flight and time each one."""
+    latencies = []
+    statuses = {}
+    pending = iter(urls)
+
+    async def worker():
+        for url in pending:
+            start = time.perf_counter()
+            response = await client.get(url)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "throughput": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "statuses": statuses,
+    }
+
+
+async def measure_allocations(client: httpx.AsyncClient, urls: list[str]) -> dict:
+    """Peak memory allocated while serving each request, one request at a time."""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for url in urls:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await client.get(url)
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_peak_kb_p50": round(percentile(peaks, 0.50) / 1024, 1),
+        "alloc_peak_kb_max": round(max(peaks) / 1024, 1),
+    }
+
+
+async def run_mode(
+    client: httpx.AsyncClient,
+    routes: dict,
+    levels: list[int],
+    counter: StatementCounter,
+    alloc_requests: int,
+) -> dict:
+    results = {}
+    for route, urls in routes.items():
+        # Warm up the shard connection, caches and code paths
+        for url in urls[:10]:
+            await client.get(url)
+
+        results[route] = {}
+        for concurrency in levels:
+            statements = counter.count
+            result = await drive(client, urls, concurrency)
+            result["sql_per_request"] = round(
+                (counter.count - statements) / max(1, result["requests"]), 2
+            )
+            results[route][str(concurrency)] = result
+        if alloc_requests:
+            results[route]["allocations"] = await measure_allocations(
+                client, urls[:alloc_requests]
+            )
+        print(f"{route}: {json.dumps(results[route])}", flush=True)
+    return results
+
+
+def start_uvicorn(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def compare(results: dict, baseline: dict) -> None:
+    """Print the latency and throughput change of every result against a baseline."""
+    print(f"\nCompared with {baseline.get('commit', 'baseline')}:")
+    size = results["dataset"].get("database_bytes")
+    previous_size = baseline.get("dataset", {}).get("database_bytes")
+    if size and previous_size:
+        print(
+            f"  database {previous_size / 1024**2:.1f} MiB -> {size / 1024**2:.1f} MiB "
+            f"({(size - previous_size) / previous_size * 100:+.1f}%)"
+        )
+    for mode, routes in results["results"].items():
+        for route, levels in routes.items():
+            for level, result in levels.items():
+                previous = baseline["results"].get(mode, {}).get(route, {}).get(level)
+                if not previous or level == "allocations":
+                    continue
+                changes = []
+                for key in ("p50_ms", "p95_ms", "p99_ms", "throughput"):
+                    if previous.get(key):
+                        change = (result[key] - previous[key]) / previous[key] * 100
+                        changes.append(f"{key} {change:+.1f}%")
+                print(f"  {mode} {route} c={level}: " + ", ".join(changes))
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args) -> dict:
+    db_path = api_dataset.build(
+        args.dir,
+        args.year,
+        args.courses,
+        args.subjects,
+        args.seed,
+        compress_text=not args.no_compress_text,
+    )
+
+    # Settings are read when the server is imported
+    os.environ.update(
+        {"SHARD_DIR": args.dir, "DB_TYPE": "local", "YEAR": str(args.year)}
+    )
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT))
+    server = importlib.import_module("src.server")
+
+    counter = StatementCounter()
+    routes = route_urls(db_path, args.year, args.requests, args.seed)
+    if args.routes:
+        routes = {name: routes[name] for name in args.routes.split(",")}
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    results = {}
+    if "asgi" in args.mode:
+        print("ASGI (in-process)")
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark"
+        ) as client:
+            results["asgi"] = await run_mode(
+                client, routes, levels, counter, args.alloc_requests
+            )
+    if "http" in args.mode:
+        print("HTTP (uvicorn)")
+        http_server = start_uvicorn(server.app, args.port)
+        try:
+            limits = httpx.Limits(max_connections=max(levels))
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{args.port}", limits=limits
+            ) as client:
+                # Allocations are only measured in-process, uvicorn adds its own
+                results["http"] = await run_mode(client, routes, levels, counter, 0)
+        finally:
+            http_server.should_exit = True
+
+    return {
+        "commit": git_commit(),
+        "dataset": {
+            "year": args.year,
+            "courses": args.courses,
+            "subjects": args.subjects,
+            "seed": args.seed,
+            "compress_text": not args.no_compress_text,
+            "database_bytes": os.path.getsize(db_path),
+        },
+        "requests_per_level": args.requests,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", help="Shard directory, a temporary one by default")
+    parser.add_argument("--year", type=int, default=2026)
+    parser.add_argument("--courses", type=int, default=4000)
+    parser.add_argument("--subjects", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--mode", default="asgi,http")
+    parser.add_argument("--routes", help="Comma separated routes to benchmark")
+    parser.add_argument("--alloc-requests", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--compare", type=Path)
+    parser.add_argument("--no-compress-text", action="store_true")
+    args = parser.parse_args()
+    # The server is run from the repository root
+    args.dir = os.path.abspath(args.dir or tempfile.mkdtemp(prefix="api-benchmark-"))
+    args.output = args.output.resolve() if args.output else None
+    args.compare = args.compare.resolve() if args.compare else None
+
+    results = asyncio.run(run(args))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""Synthetic course database for the API benchmark.
+
+Writes a year's shard with the tables of src/models.py filled at the size of a real
+year (about 4,000 courses across 100 subjects, with their classes, meetings, learning
+outcomes, assessments and prerequisites), then builds the subject index and the
+prerequisite graph and compresses the large text columns the same way the scraper does.
+
+Usage:
+    uv run python benchmarks/api_dataset.py --dir /tmp/shards --year 2026 --courses 4000
+        [--no-compress-text]
+"""
+
+import argparse
+import importlib
+import os
+import random
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from interning import StringInterner  # noqa: E402
+from models import (  # noqa: E402
+    Assessment,
+    Base,
+    Course,
+    CourseClass,
+    InternedString,
+    LearningOutcome,
+    Meetings,
+    Subject,
+)
+from shards import shard_path  # noqa: E402
+from text_compression import compress_database  # noqa: E402
+
+TERMS = [
+    "Semester 1",
+    "Semester 2",
+    "Summer School",
+    "Winter School",
+    "Online Term 1",
+    "Online Term 3",
+    "Trimester 2",
+]
+COMPONENTS = ["Lecture", "Tutorial", "Practical", "Workshop", "Seminar"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+CAMPUSES = ["City West", "City East", "Magill", "Mawson Lakes", "Online"]
+MONTHS = ["Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov"]
+WORDS = (
+    "students develop knowledge skills analysis design critical evaluation systems "
+    "theory practice research communication professional applied methods problem "
+    "solving data modelling ethical context industry project learning outcomes"
+).split()
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def subject_codes(count: int) -> list[tuple[str, str]]:
+    """(code prefix, subject name) pairs such as ("SUBA", "Subject A")."""
+    subjects = []
+    for index in range(count):
+        suffix = ""
+        n = index
+        while True:
+            suffix = chr(ord("A") + n % 26) + suffix
+            n = n // 26 - 1
+            if n < 0:
+                break
+        subjects.append((f"SUB{suffix}", f"Subject {suffix}"))
+    return subjects
+
+
+def generate_rows(year: int, courses: int, subjects: int, seed: int = 0) -> dict:
+    """Generate the rows of every table, keyed by model."""
+    rng = random.Random(seed)
+    rows = {
+        Subject: [],
+        Course: [],
+        CourseClass: [],
+        Meetings: [],
+        LearningOutcome: [],
+        Assessment: [],
+    }
+    subject_list = subject_codes(subjects)
+    for prefix, name in subject_list:
+        rows[Subject].append({"id": prefix.lower(), "name": name})
+
+    codes_by_subject = {prefix: [] for prefix, _ in subject_list}
+    for index in range(courses):
+        prefix, name = subject_list[index % subjects]
+        level = rng.randint(1, 7)
+        code = f"{prefix}{level}{len(codes_by_subject[prefix]):03d}"
+        cid = f"{year}{index:08d}"
+
+        # Prerequisites are lower level courses of the same subject
+        lower = [c for c in codes_by_subject[prefix] if int(c[len(prefix)]) < level]
+        prerequisites = "N/A"
+        if lower and rng.random() < 0.6:
+            picks = rng.sample(lower, min(len(lower), rng.randint(1, 3)))
+            prerequisites = rng.choice([" and ", " or ", ", "]).join(picks)
+        codes_by_subject[prefix].append(code)
+
+        rows[Course].append(
+            {
+                "id": cid,
+                "course_id": year * 100000 + index,
+                "year": str(year),
+                "terms": ",".join(sorted(rng.sample(TERMS, rng.randint(1, 3)))),
+                "subject": name,
+                "course_code": code,
+                "title": sentence(rng, rng.randint(2, 5)).rstrip("."),
+                "campus": rng.choice(CAMPUSES),
+                "level_of_study": "Undergraduate" if level <= 4 else "Postgraduate",
+                "units": rng.choice([3, 6, 6, 6, 12]),
+                "course_coordinator": f"Dr {rng.choice(WORDS).title()}",
+                "course_level": str(level),
+                "course_overview": " ".join(
+                    sentence(rng, rng.randint(10, 25)) for _ in range(rng.randint(2, 6))
+                ),
+                "prerequisites": prerequisites,
+                "corequisites": "N/A",
+                "antirequisites": "N/A",
+                "university_wide_elective": rng.random() < 0.2,
+                "url": f"https://adelaideuni.edu.au/study/courses/{code.lower()}",
+                "course_outline_url": None,
+                "textbooks": sentence(rng, 8) if rng.random() < 0.3 else None,
+            }
+        )
+
+        for lo_index in range(1, rng.randint(3, 7)):
+            rows[LearningOutcome].append(
+                {
+                    "id": f"{cid}lo{lo_index}",
+                    "course_id": cid,
+                    "description": sentence(rng, rng.randint(8, 20)),
+                    "outcome_index": lo_index,
+                }
+            )
+        for assess_index in range(rng.randint(2, 5)):
+            rows[Assessment].append(
+                {
+                    "id": f"{cid}as{assess_index}",
+                    "course_id": cid,
+                    "title": sentence(rng, 3).rstrip("."),
+                    "weighting": f"{rng.choice([10, 20, 30, 40, 50])}%",
+                    "hurdle": rng.choice(["Yes", "No"]),
+                    "learning_outcomes": "1,2",
+                }
+            )
+
+        class_nbr = 0
+        for component in rng.sample(COMPONENTS, rng.randint(1, 3)):
+            category = "Enrolment class" if component == "Lecture" else "Related class"
+            for section in range(rng.randint(1, 6)):
+                class_nbr += 1
+                class_id = f"{cid}c{class_nbr}"
+                size = rng.choice([25, 40, 80, 200, 400])
+                rows[CourseClass].append(
+                    {
+                        "id": class_id,
+                        "class_nbr": class_nbr,
+                        "section": f"{component[:2].upper()}{section + 1:02d}",
+                        "size": size,
+                        "available": rng.randint(0, size),
+                        "component": f"{category}: {component}",
+                        "group": None,
+                        "course_id": cid,
+                    }
+                )
+                for meeting in range(rng.randint(1, 3)):
+                    start = rng.randint(8, 17)
+                    start_month, end_month = sorted(rng.sample(range(len(MONTHS)), 2))
+                    rows[Meetings].append(
+                        {
+                            "id": f"{class_id}m{meeting}",
+                            "dates": f"{rng.randint(1, 28)} {MONTHS[start_month]} - "
+                            f"{rng.randint(1, 28)} {MONTHS[end_month]}",
+                            "days": ", ".join(rng.sample(DAYS, rng.randint(1, 2))),
+                            "start_time": f"{(start - 1) % 12 + 1}{'am' if start < 12 else 'pm'}",
+                            "end_time": f"{start % 12 + 1}{'am' if start + 1 < 12 else 'pm'}",
+                            "campus": rng.choice(CAMPUSES),
+                            "location": f"Room {rng.randint(1, 500)}",
+                            "instructor": f"Dr {rng.choice(WORDS).title()}",
+                            "course_class_id": class_id,
+                        }
+                    )
+    return rows
+
+
+def build(
+    shard_dir: str,
+    year: int,
+    courses: int = 4000,
+    subjects: int = 100,
+    seed: int = 0,
+    compress_text: bool = True,
+) -> str:
+    """Write a synthetic shard for a year and return its path."""
+    path = shard_path("local", year, shard_dir)
+    os.makedirs(shard_dir, exist_ok=True)
+    if os.path.exists(path):
+        os.remove(path)
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    rows = generate_rows(year, courses, subjects, seed)
+    strings = StringInterner()
+    for model, table_rows in rows.items():
+        rows[model] = [
+            strings.intern_row(model.__tablename__, row) for row in table_rows
+        ]
+    rows = {
+        InternedString: [
+            {"id": string_id, "value": value}
+            for value, string_id in strings.ids.items()
+        ],
+        **rows,
+    }
+    with engine.begin() as conn:
+        for model, table_rows in rows.items():
+            if table_rows:
+                conn.execute(model.__table__.insert(), table_rows)
+
+    # The subject index and prerequisite graph are built after a scrape
+    scraper = importlib.import_module("scraper")
+    scraper.build_subject_terms(engine, year)
+    scraper.build_requisite_graph(engine, year)
+    if compress_text:
+        compress_database(engine)
+    engine.dispose()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", default="src/shards")
+    parser.add_argument("--year", type=int, default=2026)
+    parser.add_argument("--courses", type=int, default=4000)
+    parser.add_argument("--subjects", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-compress-text", action="store_true")
+    args = parser.parse_args()
+    print(
+        build(
+            args.dir,
+            args.year,
+            args.courses,
+            args.subjects,
+            args.seed,
+            compress_text=not args.no_compress_text,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""Benchmark corpus of Funnelback responses, course pages and course outlines.
+
+Responses are stored under benchmarks/corpus/ as:
+    funnelback/subjects.json          (subject facet listing of the year)
+    funnelback/<subject>.json         (course listing of each subject)
+    course_pages/<course-code>.html   (https://adelaideuni.edu.au/study/courses/<code>/)
+    outlines/<course-code>.html       (https://apps.adelaide.edu.au/public/courseoutline)
+
+`record` saves live responses for a year, or just the pages of the given course codes.
+`generate` writes a deterministic synthetic corpus with the same structure (page chrome,
+course details, class accordions, outline sections and Funnelback JSON) for running
+benchmarks offline.
+
+Usage:
+    uv run python benchmarks/corpus.py generate --courses 200
+    uv run python benchmarks/corpus.py record --year 2026 --outline-instance 2620
+    uv run python benchmarks/corpus.py record COMP1010 MATH1011
+"""
+
+import argparse
+import json
+import random
+import re
+import urllib.parse
+from pathlib import Path
+
+from curl_cffi import requests
+
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus"
+
+SUBJECTS = {
+    "COMP": "Computer Science",
+    "MATH": "Mathematics",
+    "ACCT": "Accounting",
+    "ELEC": "Electrical Engineering",
+    "PSYC": "Psychology",
+    "LAW": "Law",
+}
+TERMS = ["Semester 1", "Semester 2", "Summer School", "Online Term 1"]
+FUNNELBACK_URL = "https://uosa-search.funnelback.squiz.cloud/s/search.html"
+COMPONENTS = ["Lecture", "Tutorial", "Practical", "Workshop", "Seminar"]
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+CAMPUSES = ["City West", "City East", "Magill", "Mawson Lakes", "Online"]
+WORDS = (
+    "students develop knowledge skills analysis design critical evaluation systems "
+    "theory practice research communication professional applied methods problem "
+    "solving data modelling ethical context industry project learning outcomes"
+).split()
+
+
+def course_codes(count: int, seed: int = 0) -> list[str]:
+    """Deterministic list of course codes such as COMP1010."""
+    rng = random.Random(seed)
+    codes = set()
+    while len(codes) < count:
+        codes.add(f"{rng.choice(list(SUBJECTS))}{rng.randint(1000, 7999)}")
+    return sorted(codes)
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def page_chrome(rng: random.Random) -> tuple[str, str]:
+    """Navigation, scripts and footer surrounding the main content of a real page."""
+    links = "\n".join(
+        f'<li class="nav-item"><a href="/study/{rng.choice(WORDS)}/{i}">'
+        f"{sentence(rng, 3)}</a></li>"
+        for i in range(250)
+    )
+    script = "var config = " + repr([rng.random() for _ in range(800)]) + ";"
+    head = (
+        "<!DOCTYPE html>\n<html lang='en'><head><meta charset='utf-8'>"
+        f"<title>Course</title><script>{script}</script>"
+        "<link rel='stylesheet' href='/etc.clientlibs/site.css'></head>\n<body>\n"
+        f"<header><nav><ul>\n{links}\n</ul></nav></header>\n"
+    )
+    foot = (
+        f"<footer><ul>\n{links}\n</ul><p>{sentence(rng, 30)}</p></footer>\n"
+        "</body></html>\n"
+    )
+    return head, foot
+
+
+def generate_course_page(code: str, seed: int = 0) -> str:
+    rng = random.Random(f"{seed}{code}")
+    subject = SUBJECTS[re.match(r"[A-Z]+", code).group(0)]
+    level = int(code[-4])
+    head, foot = page_chrome(rng)
+
+    fields = {
+        "Course ID": str(rng.randint(100000, 999999)),
+        "Campus": rng.choice(CAMPUSES),
+        "Level of study": "Undergraduate" if level < 4 else "Postgraduate",
+        "Unit value": "6",
+        "Course coordinator": f"Dr {rng.choice(WORDS).title()}",
+        "Course level": str(level),
+        "Course overview": " ".join(sentence(rng, 18) for _ in range(4)),
+        "Prerequisite(s)": (
+            f"{code[:-4]} {code[-4] if level > 1 else 1}{rng.randint(0, 999):03d}"
+            if level > 1
+            else "None"
+        ),
+        "Corequisite(s)": "None",
+        "Antirequisite(s)": "None",
+        "University-wide elective course": rng.choice(["Yes", "No"]),
+    }
+    details = "\n".join(
+        f"<div class='cmp-course-details__item'>\n<dt>{label}</dt>\n<dd>{value}</dd>\n</div>"
+        for label, value in fields.items()
+    )
+
+    containers = []
+    for index, component in enumerate(
+        rng.sample(COMPONENTS, rng.randint(1, len(COMPONENTS)))
+    ):
+        category = "Enrolment class" if index == 0 else "Related class"
+        sessions = []
+        for _ in range(rng.randint(1, 6)):
+            size = rng.randint(20, 300)
+            rows = "\n".join(
+                "<tr>"
+                f"<td><div class='table-content'>{rng.randint(1, 28)} Mar - {rng.randint(1, 28)} Jun</div></td>"
+                f"<td><div class='table-content'>{rng.choice(DAYS)}</div></td>"
+                f"<td><div class='table-content'>{rng.randint(8, 12)}am - {rng.randint(1, 5)}pm</div></td>"
+                f"<td><div class='table-content'>{rng.choice(CAMPUSES)}</div></td>"
+                f"<td><div class='table-content'>Building {rng.randint(1, 40)}, Room {rng.randint(100, 500)}</div></td>"
+                f"<td><div class='table-content'>{rng.choice(['-', 'Dr ' + rng.choice(WORDS).title()])}</div></td>"
+                "</tr>"
+                for _ in range(rng.randint(1, 3))
+            )
+            sessions.append(
+                "<div class='cmp-course-accordion--container-session'>\n"
+                f"<div class='cmp-course-accordion--card'><p class='cmp-course-accordion--card-text'><span>Class number</span> {rng.randint(10000, 99999)}</p></div>\n"
+                f"<div class='cmp-course-accordion--card'><p class='cmp-course-accordion--card-text'><span>Section</span> {component[:2].upper()}{rng.randint(1, 9):02d}</p></div>\n"
+                f"<div class='cmp-course-accordion--card'><p class='cmp-course-accordion--card-text'><span>Size</span> {size}</p></div>\n"
+                f"<div class='cmp-course-accordion--card'><p class='cmp-course-accordion--card-text'><span>Available</span> {rng.randint(0, size)}</p></div>\n"
+                "<table><thead><tr><th>Dates</th><th>Days</th><th>Time</th><th>Campus</th><th>Location</th><th>Instructor</th></tr></thead>\n"
+                f"<tbody>\n{rows}\n</tbody></table>\n</div>"
+            )
+        container = (
+            "<div class='cmp-course-accordion--container'>\n"
+            f"<h5 class='cmp-course-accordion__title'>{category}: {component}</h5>\n"
+            "<div class='cmp-course-accordion--container-content'>\n"
+            + "\n".join(sessions)
+            + "\n</div></div>"
+        )
+        if rng.random() < 0.3:
+            container = (
+                "<div class='cmp-course-accordion--group'>\n"
+                "<div class='cmp-course-accordion--group-title'>"
+                f"<span class='cmp-course-accordion--group-title-text'>Group {rng.randint(1, 3)}</span></div>\n"
+                f"{container}\n</div>"
+            )
+        containers.append(container)
+
+    return (
+        head
+        + f"<main>\n<h1>{subject} {sentence(rng, 3)[:-1]}</h1>\n"
+        + f"<div class='cmp-course-details'>\n{details}\n</div>\n"
+        + "<div class='cmp-course-accordion__class-details'><div class='cmp-course-accordion'>\n"
+        + "\n".join(containers)
+        + "\n</div></div>\n</main>\n"
+        + foot
+    )
+
+
+def generate_outline_page(code: str, seed: int = 0) -> str:
+    rng = random.Random(f"{seed}outline{code}")
+    head, foot = page_chrome(rng)
+    outcomes = "\n".join(
+        f"<tr><td>{i}</td><td>Course Learning Outcome {sentence(rng, 14)}</td></tr>"
+        for i in range(1, rng.randint(3, 8))
+    )
+    assessments = "\n".join(
+        f"<tr><td>Title {sentence(rng, 3)}</td><td>Weighting {rng.choice([10, 20, 30, 40])}%</td>"
+        f"<td>Hurdle {rng.choice(['Yes', 'No'])}</td><td>Learning Outcomes 1, 2, 3</td></tr>"
+        for _ in range(rng.randint(2, 5))
+    )
+    return (
+        head
+        + f"<main>\n<h2>Course Overview</h2>\n<p>{code}</p>\n"
+        + "<h3>Aim</h3>\n"
+        + "\n".join(f"<p>{sentence(rng, 25)}</p>" for _ in range(3))
+        + "\n<h2>Learning Outcomes</h2>\n<p>On completion students will be able to:</p>\n"
+        + f"<table>\n{outcomes}\n</table>\n"
+        + f"<h2>Learning Resources</h2>\n<p>{sentence(rng, 12)}</p>\n<ul><li>{sentence(rng, 6)}</li></ul>\n"
+        + "<h2>Assessment Descriptions</h2>\n<table>\n"
+        + "<tr><th>Title</th><th>Weighting</th><th>Hurdle</th><th>Learning Outcomes</th></tr>\n"
+        + f"{assessments}\n</table>\n</main>\n"
+        + foot
+    )
+
+
+def funnelback_response(results: list[dict], facet_values: list[str] = ()) -> dict:
+    """A Funnelback search response holding the given results and study area facet."""
+    facets = [{"name": name, "allValues": []} for name in range(5)]
+    facets.append(
+        {"name": "Area of study", "allValues": [{"data": v} for v in facet_values]}
+    )
+    return {
+        "response": {
+            "resultPacket": {
+                "resultsSummary": {"totalMatching": len(results)},
+                "results": results,
+            },
+            "facets": facets,
+        }
+    }
+
+
+def funnelback_result(code: str, subject: str, seed: int = 0) -> dict:
+    rng = random.Random(f"{seed}result{code}")
+    encoded = re.sub(r"([a-zA-Z]+)([0-9]+)", r"\1-\2", code).lower()
+    return {
+        "title": f"{subject} {code}",
+        "liveUrl": f"https://adelaideuni.edu.au/study/courses/{encoded}/",
+        "listMetadata": {
+            "courseCode": [code],
+            "term": sorted(rng.sample(TERMS, rng.randint(1, 2))),
+            "studyArea": [subject],
+        },
+    }
+
+
+def subject_file(subject: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", subject).strip("_") + ".json"
+
+
+def generate(corpus_dir: Path, courses: int, seed: int = 0) -> None:
+    """Write a synthetic corpus of Funnelback responses, course pages and outlines."""
+    (corpus_dir / "course_pages").mkdir(parents=True, exist_ok=True)
+    (corpus_dir / "outlines").mkdir(parents=True, exist_ok=True)
+    (corpus_dir / "funnelback").mkdir(parents=True, exist_ok=True)
+
+    by_subject = {}
+    for code in course_codes(courses, seed):
+        subject = SUBJECTS[re.match(r"[A-Z]+", code).group(0)]
+        by_subject.setdefault(subject, []).append(
+            funnelback_result(code, subject, seed)
+        )
+        # About one course in ten is also listed in another study area
+        rng = random.Random(f"{seed}crosslist{code}")
+        if rng.random() < 0.1:
+            other = rng.choice(sorted(set(SUBJECTS.values()) - {subject}))
+            by_subject.setdefault(other, []).append(
+                funnelback_result(code, other, seed)
+            )
+    (corpus_dir / "funnelback" / "subjects.json").write_text(
+        json.dumps(funnelback_response([{}], sorted(by_subject)))
+    )
+    for subject, results in by_subject.items():
+        (corpus_dir / "funnelback" / subject_file(subject)).write_text(
+            json.dumps(funnelback_response(results))
+        )
+
+    for code in course_codes(courses, seed):
+        (corpus_dir / "course_pages" / f"{code}.html").write_text(
+            generate_course_page(code, seed)
+        )
+        (corpus_dir / "outlines" / f"{code}.html").write_text(
+            generate_outline_page(code, seed)
+        )
+
+
+def record(corpus_dir: Path, codes: list[str], outline_instance: str) -> None:
+    """Save the live course page (and outline, if an instance id prefix is given) of each course."""
+    (corpus_dir / "course_pages").mkdir(parents=True, exist_ok=True)
+    (corpus_dir / "outlines").mkdir(parents=True, exist_ok=True)
+    for code in codes:
+        encoded = re.sub(r"([a-zA-Z]+)([0-9]+)", r"\1-\2", code).lower()
+        url = f"https://adelaideuni.edu.au/study/courses/{encoded}/"
+        response = requests.get(url, impersonate="chrome146", timeout=15)
+        print(f"{response.status_code} {url}")
+        if response.status_code == 200:
+            (corpus_dir / "course_pages" / f"{code}.html").write_text(response.text)
+
+        if outline_instance:
+            formatted = re.sub(r"([a-zA-Z]+)\s*(\d+)", r"\1_\2", code)
+            for suffix in range(1, 7):
+                url = (
+                    "https://apps.adelaide.edu.au/public/courseoutline?courseInstanceId="
+                    f"{outline_instance}_{formatted}_{suffix}"
+                )
+                response = requests.get(url, impersonate="chrome146", timeout=15)
+                print(f"{response.status_code} {url}")
+                if response.status_code == 200 and "course overview" in (
+                    response.text.lower()
+                ):
+                    (corpus_dir / "outlines" / f"{code}.html").write_text(response.text)
+                    break
+
+
+def record_year(corpus_dir: Path, year: int, outline_instance: str) -> None:
+    """Save the live Funnelback listings of a year and the pages of every listed course."""
+    (corpus_dir / "funnelback").mkdir(parents=True, exist_ok=True)
+    query = (
+        "?f.Tabs|type=Degrees+%26+Courses&form=json&num_ranks=10&profile=site-search"
+        f"&query=&f.Year|year={year}&collection=uosa~sp-aem-prod"
+        "&f.Study+type|studyType=Course&start_rank=1"
+    )
+    response = requests.get(FUNNELBACK_URL + query, impersonate="chrome146", timeout=30)
+    (corpus_dir / "funnelback" / "subjects.json").write_text(response.text)
+    subjects = [
+        value["data"]
+        for value in response.json()["response"]["facets"][5].get("allValues", [])
+    ]
+
+    codes = []
+    for subject in subjects:
+        query = (
+            "?f.Tabs%7Ctype=Degrees+%26+Courses&form=json"
+            f"&f.Year%7Cyear={year}&num_ranks=1000&profile=site-search&query="
+            f"&f.Area+of+study%7CstudyArea={urllib.parse.quote(subject)}"
+            "&collection=uosa%7Esp-aem-prod&f.Study+type%7CstudyType=Course"
+        )
+        response = requests.get(
+            FUNNELBACK_URL + query, impersonate="chrome146", timeout=30
+        )
+        print(f"{response.status_code} {subject}")
+        (corpus_dir / "funnelback" / subject_file(subject)).write_text(response.text)
+        for result in response.json()["response"]["resultPacket"]["results"]:
+            code = result.get("listMetadata", {}).get("courseCode")
+            if code:
+                codes.append(code[0] if isinstance(code, list) else code)
+
+    record(corpus_dir, sorted(set(codes)), outline_instance)
+
+
+def load_funnelback(corpus_dir: Path) -> tuple[dict, dict[str, dict]]:
+    """Load the saved subject listing and the course listing of each subject."""
+    funnelback_dir = corpus_dir / "funnelback"
+    subjects = json.loads((funnelback_dir / "subjects.json").read_text())
+    listings = {}
+    for value in subjects["response"]["facets"][5].get("allValues", []):
+        path = funnelback_dir / subject_file(value["data"])
+        if path.exists():
+            listings[value["data"]] = json.loads(path.read_text())
+    return subjects, listings
+
+
+def year_results(listings: dict[str, dict]) -> list[dict]:
+    """Every course of the subject listings once, with all of its study areas."""
+    results = {}
+    for subject, listing in sorted(listings.items()):
+        for result in listing["response"]["resultPacket"]["results"]:
+            metadata = result.get("listMetadata", {})
+            key = (str(metadata.get("courseCode")), str(metadata.get("term")))
+            if key not in results:
+                results[key] = json.loads(json.dumps(result))
+                results[key]["listMetadata"]["studyArea"] = []
+            results[key]["listMetadata"]["studyArea"].append(subject)
+    return list(results.values())
+
+
+def load_pages(corpus_dir: Path, kind: str) -> dict[str, str]:
+    """Load the saved pages of a kind ("course_pages" or "outlines"), keyed by course code."""
+    return {
+        path.stem: path.read_text()
+        for path in sorted((corpus_dir / kind).glob("*.html"))
+    }
+
+
+def ensure_corpus(corpus_dir: Path = CORPUS_DIR, courses: int = 50) -> None:
+    """Generate a synthetic corpus if nothing has been saved yet."""
+    if not (corpus_dir / "funnelback" / "subjects.json").exists():
+        generate(corpus_dir, courses)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", type=Path, default=CORPUS_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = commands.add_parser("generate", help="Write a synthetic corpus")
+    generate_parser.add_argument("--courses", type=int, default=200)
+    generate_parser.add_argument("--seed", type=int, default=0)
+
+    record_parser = commands.add_parser("record", help="Save live responses")
+    record_parser.add_argument("codes", nargs="*")
+    record_parser.add_argument(
+        "--year", type=int, help="Record the listings and pages of a whole year"
+    )
+    record_parser.add_argument(
+        "--outline-instance",
+        default="",
+        help="Year and term prefix of outline instance ids, e.g. 2620",
+    )
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        generate(args.dir, args.courses, args.seed)
+    elif args.year:
+        record_year(args.dir, args.year, args.outline_instance)
+    else:
+        record(args.dir, args.codes, args.outline_instance)
+
+
+if __name__ == "__main__":
+    main()
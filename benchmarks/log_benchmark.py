@@ -0,0 +1,160 @@
+"""Cost of the scraper's logging at DEBUG and ERROR level.
+
+Scraper threads log what the scraper logs for every request (the endpoint, the proxy,
+the course being processed) and, for every subject listing, the whole Funnelback
+response. Each level is run in a fresh process in two modes:
+
+    - sync: f-strings formatted by the logging thread and written by it, every record
+    - queue: %-style arguments, formatted, capped and written by the background
+      listener thread, with repeated debug messages sampled (the default settings)
+
+The time the scraper threads spend logging per request, the CPU time of the process
+until it has exited with the log fully written and the size of the log are recorded.
+
+Usage:
+    uv run python benchmarks/log_benchmark.py [--threads 8] [--requests 20000]
+        [--output results.json]
+"""
+
+import argparse
+import importlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import corpus
+
+ROOT = Path(__file__).resolve().parent.parent
+MODES = {
+    "sync": {"LOG_QUEUE": "false", "LOG_SAMPLE_RATE": "1"},
+    "queue": {"LOG_QUEUE": "true"},
+}
+
+
+def listing(courses: int) -> dict:
+    """A Funnelback response listing a subject's courses, as logged by get_course_codes."""
+    results = [
+        corpus.funnelback_result(code, "Computer Science")
+        for code in corpus.course_codes(courses)
+    ]
+    return corpus.funnelback_response(results)["response"]
+
+
+def log_requests(logger, requests: int, data: dict, eager: bool) -> None:
+    """Log like a scraper thread fetching `requests` pages, one listing in 20."""
+    proxy = {"http": "http://10.0.0.1:8080", "https": "http://10.0.0.1:8080"}
+    for i in range(requests):
+        code = f"COMP{1000 + i % 9000}"
+        endpoint = f"/study/courses/comp-{1000 + i % 9000}/"
+        if eager:
+            logger.debug(f"Fetching {endpoint}...")
+            logger.debug(f"Using proxy: {proxy}")
+            logger.debug(f"Processing course {code}...")
+            if i % 20 == 0:
+                logger.debug(f"Course data: {data}")
+        else:
+            logger.debug("Fetching %s...", endpoint)
+            logger.debug("Using proxy: %s", proxy)
+            logger.debug("Processing course %s...", code)
+            if i % 20 == 0:
+                logger.debug("Course data: %s", data)
+
+
+def run_child(args) -> dict:
+    """Run the logging workload in this process, configured by the environment."""
+    sys.path.insert(0, str(ROOT / "src"))
+    log = importlib.import_module("log")
+
+    data = listing(args.courses)
+    eager = os.environ["LOG_QUEUE"] == "false"
+    requests = args.requests // args.threads
+    threads = [
+        threading.Thread(target=log_requests, args=(log.logger, requests, data, eager))
+        for _ in range(args.threads)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # Queued records are written before the process exits
+    return {
+        "us_per_request": round(
+            (time.perf_counter() - start) / (requests * args.threads) * 1e6, 2
+        )
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--courses", type=int, default=300, help="Courses per listing")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args)))
+        return
+
+    results = {}
+    for mode, settings in MODES.items():
+        for level in ("ERROR", "DEBUG"):
+            log_dir = tempfile.mkdtemp(prefix="log-benchmark-")
+            usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+            output = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--child",
+                    f"--threads={args.threads}",
+                    f"--requests={args.requests}",
+                    f"--courses={args.courses}",
+                ],
+                env={
+                    **os.environ,
+                    **settings,
+                    "DEFAULT_LOGGING_LEVEL": level,
+                    "LOG_DIR": log_dir,
+                },
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            usage_after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            # The log is complete once the process has exited
+            result = json.loads(output.splitlines()[-1])
+            result["cpu_seconds"] = round(
+                usage_after.ru_utime
+                + usage_after.ru_stime
+                - usage_before.ru_utime
+                - usage_before.ru_stime,
+                3,
+            )
+            result["log_bytes"] = sum(
+                path.stat().st_size for path in Path(log_dir).iterdir()
+            )
+            results[f"{mode} {level}"] = result
+            print(f"{mode} {level}: {json.dumps(result)}", flush=True)
+
+    for mode in MODES:
+        error = results[f"{mode} ERROR"]
+        debug = results[f"{mode} DEBUG"]
+        print(
+            f"{mode}: DEBUG adds "
+            f"{debug['us_per_request'] - error['us_per_request']:.1f} us per request "
+            f"and {debug['cpu_seconds'] - error['cpu_seconds']:.2f}s of CPU time"
+        )
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Local mock of the upstream hosts the scraper talks to, served from the benchmark corpus.
+
+    /s/search.html                          Funnelback subject and course listings, per
+                                            subject or for the whole year (paged with
+                                            start_rank and num_ranks)
+    /study/courses/<code>/                  course pages
+    /public/courseoutline?courseInstanceId= course outlines (only one suffix of each
+                                            course resolves, the rest are 404s, so the
+                                            scraper's suffix probing is exercised)
+    /__stats                                request counts by route and status
+
+Latency, jitter and the rate of 429 (with `Retry-After: 1`) and 403 responses are
+configurable so that retry and backoff paths can be measured too.
+
+Usage:
+    uv run python benchmarks/mock_upstream.py --port 8765 --latency-ms 20 --rate-429 0.01
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import corpus
+
+OUTLINE_ID_PATTERN = re.compile(r"^\d{4}_([A-Za-z]+)_(\w+)_(\d)$")
+
+
+def outline_suffix(code: str) -> int:
+    """The one courseInstanceId suffix (1-6) that resolves for a course."""
+    return zlib.crc32(code.encode()) % 6 + 1
+
+
+class MockUpstream:
+    """Corpus responses plus the failure and latency settings of the mock."""
+
+    def __init__(
+        self,
+        corpus_dir: Path,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        rate_429: float = 0,
+        rate_403: float = 0,
+        seed: int = 0,
+    ) -> None:
+        self.subjects, self.listings = corpus.load_funnelback(corpus_dir)
+        self.year_results = corpus.year_results(self.listings)
+        self.pages = {
+            path.stem: path.read_text()
+            for path in (corpus_dir / "course_pages").glob("*.html")
+        }
+        self.outlines = {
+            path.stem: path.read_text()
+            for path in (corpus_dir / "outlines").glob("*.html")
+        }
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.rate_403 = rate_403
+        self.random = random.Random(seed)
+        self.stats = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, route: str, status: int) -> None:
+        with self.lock:
+            self.stats[f"{route} {status}"] += 1
+            self.stats["requests"] += 1
+
+    def injected_status(self) -> int:
+        """A 429 or 403 status to fail the request with, or 0 to serve it."""
+        with self.lock:
+            roll = self.random.random()
+            delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+        time.sleep(delay / 1000)
+        if roll < self.rate_429:
+            return 429
+        if roll < self.rate_429 + self.rate_403:
+            return 403
+        return 0
+
+    def search(self, query: dict) -> tuple[int, str]:
+        subject = query.get("f.Area of study|studyArea")
+        if subject is None:
+            # Every course of the year, a page at a time, with the study area facet
+            start = int(query.get("start_rank", ["1"])[0]) - 1
+            count = int(query.get("num_ranks", ["10"])[0])
+            response = json.loads(json.dumps(self.subjects))
+            response["response"]["resultPacket"] = {
+                "resultsSummary": {"totalMatching": len(self.year_results)},
+                "results": self.year_results[start : start + count],
+            }
+            return 200, json.dumps(response)
+        listing = self.listings.get(subject[0])
+        if listing is None:
+            return 200, json.dumps(corpus.funnelback_response([]))
+        return 200, json.dumps(listing)
+
+    def course_page(self, encoded: str) -> tuple[int, str]:
+        page = self.pages.get(encoded.replace("-", "").upper())
+        return (200, page) if page else (404, "Not Found")
+
+    def outline(self, query: dict) -> tuple[int, str]:
+        instance_id = query.get("courseInstanceId", [""])[0]
+        match = OUTLINE_ID_PATTERN.match(instance_id)
+        if not match:
+            return 404, "Not Found"
+        code = f"{match.group(1)}{match.group(2)}".upper()
+        outline = self.outlines.get(code)
+        if outline is None or int(match.group(3)) != outline_suffix(code):
+            return 404, "Not Found"
+        return 200, outline
+
+
+def make_handler(upstream: MockUpstream):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urllib.parse.urlsplit(self.path)
+            query = urllib.parse.parse_qs(url.query)
+
+            if url.path == "/__stats":
+                self.send(200, json.dumps(upstream.stats), "application/json")
+                return
+
+            if url.path == "/s/search.html":
+                route, content_type = "search", "application/json"
+            elif url.path.startswith("/study/courses/"):
+                route, content_type = "course_page", "text/html"
+            elif url.path == "/public/courseoutline":
+                route, content_type = "outline", "text/html"
+            else:
+                upstream.record("unknown", 404)
+                self.send(404, "Not Found", "text/plain")
+                return
+
+            status = upstream.injected_status()
+            if status:
+                upstream.record(route, status)
+                self.send(status, "", "text/plain")
+                return
+
+            if route == "search":
+                status, body = upstream.search(query)
+            elif route == "course_page":
+                status, body = upstream.course_page(url.path.strip("/").split("/")[-1])
+            else:
+                status, body = upstream.outline(query)
+            upstream.record(route, status)
+            self.send(status, body, content_type)
+
+        def send(self, status: int, body: str, content_type: str) -> None:
+            payload = body.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            if status == 429:
+                self.send_header("Retry-After", "1")
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The scraper opens many connections at once, the default backlog of 5 drops some
+    request_queue_size = 1024
+
+
+def serve(upstream: MockUpstream, port: int) -> ThreadingHTTPServer:
+    """Create a threaded HTTP server for the mock on localhost."""
+    return MockServer(("127.0.0.1", port), make_handler(upstream))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", type=Path, default=corpus.CORPUS_DIR)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-429", type=float, default=0)
+    parser.add_argument("--rate-403", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus.ensure_corpus(args.dir)
+    upstream = MockUpstream(
+        args.dir,
+        args.latency_ms,
+        args.jitter_ms,
+        args.rate_429,
+        args.rate_403,
+        args.seed,
+    )
+    server = serve(upstream, args.port)
+    print(f"Mock upstream listening on http://127.0.0.1:{args.port}", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
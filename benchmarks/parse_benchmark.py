@@ -0,0 +1,95 @@
+"""Compare the HTML parser backends on the benchmark corpus.
+
+Every course page and outline in benchmarks/corpus/ is parsed with each backend (a
+synthetic corpus is generated first if none has been saved). The parsed results are
+checked against `html.parser`, the parser the scraper used before, and the parse
+time per page is reported.
+
+Usage:
+    uv run python benchmarks/parse_benchmark.py [--repeat 3] [--output results.json]
+"""
+
+import argparse
+import importlib.util
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import corpus  # noqa: E402
+
+import data_parser  # noqa: E402
+from html_backend import get_backend  # noqa: E402
+
+BACKENDS = ["html.parser", "selectolax"]
+if importlib.util.find_spec("lxml"):
+    BACKENDS.insert(1, "lxml")
+
+
+def time_backend(name: str, pages: dict, outlines: dict, repeat: int) -> dict:
+    data_parser.html = get_backend(name)
+    results = {"course_pages": {}, "outlines": {}}
+    timings = {}
+    for kind, parse, documents in (
+        ("course_pages", data_parser.parse_course_page, pages),
+        ("outlines", data_parser.parse_course_outline, outlines),
+    ):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for code, document in documents.items():
+                results[kind][code] = parse(document)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[kind] = {
+            "pages": len(documents),
+            "seconds": round(best, 4),
+            "ms_per_page": round(best * 1000 / max(1, len(documents)), 3),
+        }
+    return {"timings": timings, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", type=Path, default=corpus.CORPUS_DIR)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    corpus.ensure_corpus(args.dir)
+    pages = corpus.load_pages(args.dir, "course_pages")
+    outlines = corpus.load_pages(args.dir, "outlines")
+    size = sum(len(page) for page in pages.values()) / max(1, len(pages))
+    print(
+        f"Corpus: {len(pages)} course pages ({size / 1024:.0f} KiB avg), {len(outlines)} outlines"
+    )
+
+    runs = {name: time_backend(name, pages, outlines, args.repeat) for name in BACKENDS}
+    baseline = runs["html.parser"]
+
+    report = {}
+    for name, run in runs.items():
+        mismatches = [
+            f"{kind}/{code}"
+            for kind, results in run["results"].items()
+            for code, result in results.items()
+            if result != baseline["results"][kind][code]
+        ]
+        report[name] = {**run["timings"], "mismatches": mismatches}
+        for kind, timing in run["timings"].items():
+            speedup = baseline["timings"][kind]["seconds"] / max(
+                timing["seconds"], 1e-9
+            )
+            print(
+                f"{name:>12} {kind:<13} {timing['ms_per_page']:>8.2f} ms/page "
+                f"{speedup:>6.1f}x  mismatches: {len(mismatches)}"
+            )
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""End-to-end scrape benchmark against the local mock upstream.
+
+The mock upstream (benchmarks/mock_upstream.py) is started on the benchmark corpus and
+the scraper is pointed at it through its settings (FUNNELBACK_URL, COURSE_SITE_URL,
+COURSE_OUTLINE_URL, with proxies disabled). A full `scraper.main()` run is then timed
+in-process, writing the year's shard to a temporary directory, and the throughput,
+CPU time, peak memory and upstream request counts are reported.
+
+The rate limiter is effectively disabled unless --rate-limit is given, so the timings
+measure the scraper rather than the limiter's pacing. The time threads spent waiting
+for the limiter is reported separately.
+
+Usage:
+    uv run python benchmarks/scrape_benchmark.py [--latency-ms 20] [--rate-429 0.01]
+        [--year 2026] [--output results.json]
+"""
+
+import argparse
+import importlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import corpus
+from sqlalchemy import create_engine, inspect, text
+
+ROOT = Path(__file__).resolve().parent.parent
+# Requests/sec high enough that the rate limiter never waits
+UNLIMITED_RATE = 1_000_000
+
+
+def wait_for(url: str, timeout: float = 10) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def count_rows(db_path: str) -> dict[str, int]:
+    engine = create_engine(f"sqlite:///{db_path}")
+    with engine.connect() as conn:
+        counts = {
+            table: conn.execute(text(f'SELECT COUNT(*) FROM "{table}"')).scalar()
+            for table in inspect(engine).get_table_names()
+        }
+    engine.dispose()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", type=Path, default=corpus.CORPUS_DIR)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--year", type=int, default=2026)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--rate-429", type=float, default=0)
+    parser.add_argument("--rate-403", type=float, default=0)
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        help="Initial requests/sec per host (RATE_LIMIT), unlimited by default",
+    )
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    corpus.ensure_corpus(args.dir)
+    mock = subprocess.Popen(
+        [
+            sys.executable,
+            str(Path(__file__).resolve().parent / "mock_upstream.py"),
+            f"--dir={args.dir}",
+            f"--port={args.port}",
+            f"--latency-ms={args.latency_ms}",
+            f"--jitter-ms={args.jitter_ms}",
+            f"--rate-429={args.rate_429}",
+            f"--rate-403={args.rate_403}",
+        ],
+        stdout=subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    shard_dir = tempfile.mkdtemp(prefix="scrape-benchmark-")
+    try:
+        wait_for(f"{base}/__stats")
+
+        # Settings are read when the scraper modules are imported
+        os.environ.update(
+            {
+                "FUNNELBACK_URL": f"{base}/s/search.html",
+                "COURSE_SITE_URL": base,
+                "COURSE_OUTLINE_URL": f"{base}/public/courseoutline",
+                "USE_PROXIES": "false",
+                "SHARD_DIR": shard_dir,
+                "SCRAPE_REPORT_DIR": shard_dir,
+                "YEAR": str(args.year),
+            }
+        )
+        if args.rate_limit:
+            os.environ["RATE_LIMIT"] = str(args.rate_limit)
+        else:
+            os.environ.update(
+                {
+                    "RATE_LIMIT": str(UNLIMITED_RATE),
+                    "RATE_LIMIT_MAX": str(UNLIMITED_RATE),
+                    "RATE_LIMIT_BURST": str(UNLIMITED_RATE),
+                }
+            )
+        os.chdir(ROOT)
+        sys.path.insert(0, str(ROOT / "src"))
+        scraper = importlib.import_module("scraper")
+        shards = importlib.import_module("shards")
+        telemetry = importlib.import_module("telemetry").telemetry
+
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        start = time.perf_counter()
+        scraper.main([])
+        elapsed = time.perf_counter() - start
+        usage_after = resource.getrusage(resource.RUSAGE_SELF)
+
+        stats = json.loads(urllib.request.urlopen(f"{base}/__stats").read())
+        stages = telemetry.report()["stages"]
+        rows = count_rows(shards.shard_path("dev", args.year, shard_dir))
+    finally:
+        mock.terminate()
+        mock.wait()
+
+    pages = sum(
+        count
+        for key, count in stats.items()
+        if key.startswith(("course_page 200", "outline 200"))
+    )
+    total_rows = sum(rows.values())
+    results = {
+        "year": args.year,
+        "mock": {
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "rate_429": args.rate_429,
+            "rate_403": args.rate_403,
+        },
+        "rate_limit": args.rate_limit,
+        "seconds": round(elapsed, 3),
+        "requests": stats.get("requests", 0),
+        "requests_per_second": round(stats.get("requests", 0) / elapsed, 1),
+        "pages": pages,
+        "pages_per_second": round(pages / elapsed, 1),
+        "cpu_seconds": round(
+            (usage_after.ru_utime - usage_before.ru_utime)
+            + (usage_after.ru_stime - usage_before.ru_stime),
+            3,
+        ),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(usage_after.ru_maxrss / 1024, 1),
+        "rows": total_rows,
+        "rows_per_second": round(total_rows / elapsed, 1),
+        "rows_by_table": rows,
+        # Summed over the scraper threads, so it can be more than the elapsed time
+        "rate_limit_wait_seconds": stages.get("rate_limit_wait", {}).get("total_s", 0),
+        "stages": stages,
+        "upstream": stats,
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""Throughput and memory of the API server by number of worker processes.
+
+A synthetic shard of realistic size (benchmarks/api_dataset.py) is served by uvicorn
+with each number of workers, with and without the shared documents file. Once every
+worker is ready, client processes request /courses and /courses/{id} of the current
+term. The requests/sec and the resident (RSS) and proportional (PSS, shared pages
+divided between the processes mapping them) memory of every worker are recorded.
+
+Usage:
+    uv run python benchmarks/workers_benchmark.py [--workers 1,2,4] [--clients 4]
+        [--requests 2000] [--output results.json]
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import api_dataset
+import httpx
+from api_benchmark import git_commit, percentile
+
+ROOT = Path(__file__).resolve().parent.parent
+# The term the server prebuilds documents for, see current_sem in src/server.py
+TERM = "Semester 1" if datetime.now().month <= 6 else "Semester 2"
+
+
+def term_urls(db_path: str, year: int, requests: int, seed: int = 0) -> list[str]:
+    """Paths of the course lists and course details of the current term, shuffled."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    subjects = [
+        row[0]
+        for row in conn.execute(
+            "SELECT subject FROM subject_terms WHERE year = ? AND term = ?",
+            (str(year), TERM),
+        )
+    ]
+    course_ids = [
+        row[0]
+        for row in conn.execute(
+            "SELECT courses.id FROM courses "
+            "JOIN interned_strings ON interned_strings.id = courses.terms "
+            "WHERE interned_strings.value LIKE ?",
+            (f"%{TERM}%",),
+        )
+    ]
+    conn.close()
+    return [
+        f"/courses?year={year}&term={TERM}&subject={rng.choice(subjects)}"
+        if rng.random() < 0.25
+        else f"/courses/{rng.choice(course_ids)}"
+        for _ in range(requests)
+    ]
+
+
+async def drive(base_url: str, urls: list[str], concurrency: int) -> list[float]:
+    latencies = []
+    pending = iter(urls)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits) as client:
+
+        async def worker():
+            for url in pending:
+                start = time.perf_counter()
+                response = await client.get(url)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies
+
+
+def run_client(base_url: str, urls: list[str], concurrency: int) -> list[float]:
+    return asyncio.run(drive(base_url, urls, concurrency))
+
+
+def worker_pids(pid: int) -> list[int]:
+    """The worker processes of a uvicorn server, or the server itself if it has none."""
+    children = []
+    for task in Path(f"/proc/{pid}/task").iterdir():
+        children += [int(child) for child in (task / "children").read_text().split()]
+    # uvicorn's multiprocess supervisor also starts a resource tracker
+    workers = [
+        child
+        for child in children
+        if b"resource_tracker" not in Path(f"/proc/{child}/cmdline").read_bytes()
+    ]
+    return workers or [pid]
+
+
+def memory(pid: int) -> dict:
+    """The RSS and PSS of a process in KiB."""
+    values = {}
+    for name, field in (("status", "VmRSS:"), ("smaps_rollup", "Pss:")):
+        for line in Path(f"/proc/{pid}/{name}").read_text().splitlines():
+            if line.startswith(field):
+                values[field.rstrip(":").lower()] = int(line.split()[1])
+    return {"rss_kib": values.get("vmrss"), "pss_kib": values.get("pss")}
+
+
+def wait_ready(base_url: str, workers: int, timeout: float = 300) -> None:
+    """Wait until /ready answers 200 on fresh connections often enough that every
+    worker has answered."""
+    deadline = time.monotonic() + timeout
+    streak = 0
+    while streak < workers * 10:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{base_url} wasn't ready after {timeout:.0f}s")
+        try:
+            ready = httpx.get(f"{base_url}/ready").status_code == 200
+        except httpx.TransportError:
+            ready = False
+        streak = streak + 1 if ready else 0
+        if not ready:
+            time.sleep(0.2)
+
+
+def run_server(args, db_path: str, workers: int, shared: bool) -> dict:
+    # The shared documents are rebuilt by each run that uses them
+    for suffix in (".documents", ".documents.lock"):
+        Path(os.path.splitext(db_path)[0] + suffix).unlink(missing_ok=True)
+    env = {
+        **os.environ,
+        "SHARD_DIR": args.dir,
+        "DB_TYPE": "local",
+        "YEAR": str(args.year),
+        "SHARED_DOCUMENTS": str(shared).lower(),
+    }
+    base_url = f"http://127.0.0.1:{args.port}"
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "src.server:app",
+            "--port",
+            str(args.port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        start = time.perf_counter()
+        wait_ready(base_url, workers)
+        ready_seconds = time.perf_counter() - start
+
+        urls = term_urls(db_path, args.year, args.requests, args.seed)
+        shares = [urls[i :: args.clients] for i in range(args.clients)]
+        with multiprocessing.Pool(args.clients) as pool:
+            start = time.perf_counter()
+            latencies = [
+                latency
+                for client in pool.starmap(
+                    run_client,
+                    [(base_url, share, args.concurrency) for share in shares],
+                )
+                for latency in client
+            ]
+            elapsed = time.perf_counter() - start
+
+        processes = [memory(pid) for pid in worker_pids(process.pid)]
+        return {
+            "workers": workers,
+            "shared_documents": shared,
+            "ready_seconds": round(ready_seconds, 1),
+            "requests": len(latencies),
+            "throughput": round(len(latencies) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+            "rss_mib_per_worker": round(
+                statistics.fmean(p["rss_kib"] for p in processes) / 1024, 1
+            ),
+            "pss_mib_total": round(sum(p["pss_kib"] for p in processes) / 1024, 1),
+            "processes": processes,
+        }
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dir", help="Shard directory, a temporary one by default")
+    parser.add_argument("--year", type=int, default=2026)
+    parser.add_argument("--courses", type=int, default=4000)
+    parser.add_argument("--subjects", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--clients", type=int, default=4, help="Client processes")
+    parser.add_argument("--concurrency", type=int, default=8, help="Per client")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+    args.dir = os.path.abspath(
+        args.dir or tempfile.mkdtemp(prefix="workers-benchmark-")
+    )
+
+    db_path = api_dataset.build(
+        args.dir, args.year, args.courses, args.subjects, args.seed
+    )
+
+    results = []
+    print(f"{os.cpu_count()} CPUs")
+    for workers in [int(count) for count in args.workers.split(",")]:
+        for shared in (False, True):
+            result = run_server(args, db_path, workers, shared)
+            results.append(result)
+            print(
+                f"workers={workers} shared_documents={str(shared).lower()}: "
+                f"{result['throughput']} req/s, p50 {result['p50_ms']} ms, "
+                f"p99 {result['p99_ms']} ms, RSS {result['rss_mib_per_worker']} MiB "
+                f"per worker, PSS {result['pss_mib_total']} MiB in total",
+                flush=True,
+            )
+
+    if args.output:
+        args.output.write_text(
+            json.dumps(
+                {
+                    "commit": git_commit(),
+                    "cpus": os.cpu_count(),
+                    "dataset": {
+                        "year": args.year,
+                        "courses": args.courses,
+                        "subjects": args.subjects,
+                        "seed": args.seed,
+                    },
+                    "results": results,
+                },
+                indent=2,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
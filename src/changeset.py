@@ -0,0 +1,153 @@
+import json
+from datetime import datetime, timezone
+
+from sqlalchemy import MetaData, inspect, select
+
+# Tables whose rows are tracked between dataset versions, keyed by their short hash ids
+TRACKED_TABLES = ("courses", "course_classes", "meetings")
+OPERATIONS = ("added", "modified", "removed")
+
+
+def new_version() -> int:
+    """Create a dataset version number from the current UTC time, e.g. 20261019003000."""
+    return int(datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S"))
+
+
+def read_rows(engine, table_name: str, decode_row=None) -> dict[str, dict]:
+    """Read every row of a table, keyed by id. Missing tables have no rows.
+
+    `decode_row(table_name, row)`, if given, converts each row as it is read.
+    """
+    if engine is None or not inspect(engine).has_table(table_name):
+        return {}
+    metadata = MetaData()
+    metadata.reflect(bind=engine, only=[table_name])
+    table = metadata.tables[table_name]
+    # Interned strings are compared by value, as their ids differ between databases
+    columns = []
+    for column in table.columns:
+        strings = next(
+            (
+                foreign_key.column.table
+                for foreign_key in column.foreign_keys
+                if foreign_key.column.table.name == "interned_strings"
+            ),
+            None,
+        )
+        if strings is None:
+            columns.append(column)
+        else:
+            columns.append(
+                select(strings.c.value)
+                .where(strings.c.id == column)
+                .scalar_subquery()
+                .label(column.name)
+            )
+    with engine.connect() as connection:
+        rows = connection.execute(select(*columns)).mappings()
+        if decode_row is None:
+            return {row["id"]: dict(row) for row in rows}
+        return {row["id"]: decode_row(table_name, dict(row)) for row in rows}
+
+
+def diff_rows(old: dict[str, dict], new: dict[str, dict]) -> dict:
+    """Compare two sets of rows keyed by id.
+    Returns:
+        dict: The added and modified rows keyed by id, and the ids of removed rows
+    """
+    return {
+        "added": {row_id: row for row_id, row in new.items() if row_id not in old},
+        "modified": {
+            row_id: row
+            for row_id, row in new.items()
+            if row_id in old and old[row_id] != row
+        },
+        "removed": sorted(row_id for row_id in old if row_id not in new),
+    }
+
+
+def build_changeset(
+    previous_engine, engine, tables=TRACKED_TABLES, row_decoder=None
+) -> dict:
+    """Build the changes of each tracked table between two databases.
+
+    `row_decoder(engine)`, if given, returns the `decode_row` of a database's rows.
+    """
+    previous_decode = decode = None
+    if row_decoder:
+        previous_decode = row_decoder(previous_engine) if previous_engine else None
+        decode = row_decoder(engine)
+    return {
+        table_name: diff_rows(
+            read_rows(previous_engine, table_name, previous_decode),
+            read_rows(engine, table_name, decode),
+        )
+        for table_name in tables
+    }
+
+
+def changeset_rows(version: int, changeset: dict) -> list[dict]:
+    """Flatten a changeset into rows of the changes table."""
+    rows = []
+    for entity, changes in changeset.items():
+        for operation in ("added", "modified"):
+            for entity_id, data in changes[operation].items():
+                rows.append(
+                    {
+                        "id": f"{version}{entity}{entity_id}",
+                        "version": version,
+                        "entity": entity,
+                        "entity_id": entity_id,
+                        "operation": operation,
+                        "data": json.dumps(data, separators=(",", ":")),
+                    }
+                )
+        for entity_id in changes["removed"]:
+            rows.append(
+                {
+                    "id": f"{version}{entity}{entity_id}",
+                    "version": version,
+                    "entity": entity,
+                    "entity_id": entity_id,
+                    "operation": "removed",
+                    "data": None,
+                }
+            )
+    return rows
+
+
+def merge_changes(changes) -> dict:
+    """Fold changes from several versions into the net change of each record.
+
+    Args:
+        changes: (entity, entity_id, operation, data) tuples, oldest version first
+    Returns:
+        dict: {entity: {"added": [...], "modified": [...], "removed": [...]}} where
+        added and modified hold the latest row data and removed holds ids
+    """
+    net = {}
+    for entity, entity_id, operation, data in changes:
+        entity_changes = net.setdefault(entity, {})
+        previous = entity_changes.get(entity_id)
+        if previous is None:
+            entity_changes[entity_id] = (operation, data)
+        elif previous[0] == "added":
+            # A record added and then removed within the range never existed for the client
+            if operation == "removed":
+                del entity_changes[entity_id]
+            else:
+                entity_changes[entity_id] = ("added", data)
+        elif previous[0] == "removed" and operation == "added":
+            entity_changes[entity_id] = ("modified", data)
+        else:
+            entity_changes[entity_id] = (operation, data)
+
+    merged = {}
+    for entity, entity_changes in net.items():
+        merged[entity] = {operation: [] for operation in OPERATIONS}
+        for entity_id, (operation, data) in sorted(entity_changes.items()):
+            if operation == "removed":
+                merged[entity]["removed"].append(entity_id)
+            else:
+                merged[entity][operation].append(json.loads(data))
+    return merged
@@ -1,14 +1,14 @@
-import random
-import re
 import threading
 import time
-from typing import Any
 
 import json_repair
-from bs4 import BeautifulSoup
-from curl_cffi import requests
+from curl_cffi import CurlInfo, requests
 
 from log import logger
+from proxy_pool import ProxyPool
+from rate_limiter import RateLimiter, parse_retry_after
+from settings import get_setting
+from telemetry import telemetry
 
 
 class DataFetcher:
@@ -21,32 +21,35 @@ class DataFetcher:
     as a path under the course content base URL.
     """
 
-    BASE_URL = "https://uosa-search.funnelback.squiz.cloud/s/search.html"
-    BASE_INFO_URL = "https://adelaideuni.edu.au"
+    BASE_URL = get_setting(
+        "FUNNELBACK_URL", "https://uosa-search.funnelback.squiz.cloud/s/search.html"
+    )
+    BASE_INFO_URL = get_setting("COURSE_SITE_URL", "https://adelaideuni.edu.au")
     PROXY_FILE = "src/working_proxies.txt"
+    PROXY_SCORES_FILE = get_setting("PROXY_SCORES_FILE", "src/proxy_scores.json")
+    USE_PROXIES = get_setting("USE_PROXIES", "true").lower() == "true"
 
-    # Global proxy list and lock to share working proxies across all scraper threads
-    _proxies = None
-    _proxy_lock = threading.Lock()
+    # Requests to each host are paced by a token bucket shared by all scraper threads
+    rate_limiter = RateLimiter(
+        initial_rate=float(get_setting("RATE_LIMIT", "10")),
+        max_rate=float(get_setting("RATE_LIMIT_MAX", "50")),
+        burst=float(get_setting("RATE_LIMIT_BURST", "10")),
+        on_rate_change=lambda host, rate: telemetry.gauge(f"rate_limit {host}", rate),
+    )
 
-    @staticmethod
-    def _sanitise_for_log(value: Any) -> str:
-        """Sanitise a value for safe logging to avoid log injection.
+    # Global proxy pool and lock to share working proxies across all scraper threads
+    _proxy_pool = None
+    _proxy_lock = threading.Lock()
 
-        Removes newlines and truncates long values.
-        """
-        s = str(value)
-        s = s.replace("\r", "").replace("\n", "")
-        if len(s) > 200:
-            s = s[:200] + "...(truncated)"
-        return s
+    # One persistent session per scraper thread, see `session`
+    _local = threading.local()
 
     def __init__(
         self,
         endpoint: str,
         use_class_url: bool = False,
         full_url: str = None,
-        use_proxy: bool = True,
+        use_proxy: bool = None,
     ) -> None:
         self.endpoint = endpoint
         self.use_class_url = use_class_url
@@ -62,58 +65,113 @@ class DataFetcher:
             self.url = self.BASE_URL + endpoint
         self.data = None
         self.last_response = None
-        self.use_proxy = use_proxy
+        self.use_proxy = self.USE_PROXIES if use_proxy is None else use_proxy
 
         # Load proxies globally if not already loaded
         with DataFetcher._proxy_lock:
-            if DataFetcher._proxies is None:
-                DataFetcher._proxies = self.load_proxies()
+            if DataFetcher._proxy_pool is None:
+                DataFetcher._proxy_pool = ProxyPool(
+                    self.load_proxies(), state_file=self.PROXY_SCORES_FILE or None
+                )
 
     def load_proxies(self) -> list:
         """Load proxies from the file."""
         try:
             with open(self.PROXY_FILE, "r") as file:
                 proxies = file.read().splitlines()
-                logger.debug(f"Loaded {len(proxies)} proxies from {self.PROXY_FILE}.")
+                logger.debug(
+                    "Loaded %d proxies from %s.", len(proxies), self.PROXY_FILE
+                )
                 return proxies
         except FileNotFoundError:
-            logger.error(f"Proxy file {self.PROXY_FILE} not found.")
+            logger.error("Proxy file %s not found.", self.PROXY_FILE)
             return []
 
-    def get_random_proxy(self) -> dict:
-        """Get a random proxy from the loaded list."""
+    @classmethod
+    def session(cls) -> requests.Session:
+        """Get the persistent session of the current thread.
+
+        Connections are kept alive and reused (over HTTP/2 where the host supports it)
+        for later requests to the same host through the same proxy, instead of a new TCP
+        and TLS handshake per request.
+        """
+        session = getattr(cls._local, "session", None)
+        if session is None:
+            session = requests.Session(
+                impersonate="chrome146",
+                curl_infos=[
+                    CurlInfo.NUM_CONNECTS,
+                    CurlInfo.CONNECT_TIME,
+                    CurlInfo.APPCONNECT_TIME,
+                ],
+            )
+            cls._local.session = session
+        return session
+
+    @staticmethod
+    def connection_info(response) -> dict:
+        """New connections made for a response and the time spent on handshakes."""
+        infos = getattr(response, "infos", None) or {}
+        return {
+            "connects": infos.get(CurlInfo.NUM_CONNECTS, 0),
+            "handshake": max(
+                infos.get(CurlInfo.APPCONNECT_TIME, 0),
+                infos.get(CurlInfo.CONNECT_TIME, 0),
+            ),
+        }
+
+    @classmethod
+    def add_proxy(cls, proxy: str, latency: float = None) -> None:
+        """Add a newly validated proxy to the pool shared by all fetchers."""
+        with cls._proxy_lock:
+            if cls._proxy_pool is None:
+                cls._proxy_pool = ProxyPool(
+                    [], state_file=cls.PROXY_SCORES_FILE or None
+                )
+        cls._proxy_pool.add(proxy, latency)
+
+    @classmethod
+    def save_proxy_scores(cls) -> None:
+        """Save the proxy scores of this run so the next run starts from them."""
+        if cls._proxy_pool is not None:
+            cls._proxy_pool.save()
+
+    def get_proxy(self) -> dict:
+        """Get a proxy from the pool, weighted towards fast and reliable proxies."""
         if not self.use_proxy:
             return None
-        with DataFetcher._proxy_lock:
-            if not DataFetcher._proxies:
-                logger.warning("No proxies available. Proceeding without a proxy.")
-                return None
-            proxy = random.choice(DataFetcher._proxies)
+        proxy = DataFetcher._proxy_pool.choose()
+        if proxy is None:
+            logger.warning("No proxies available. Proceeding without a proxy.")
+            return None
         return {
             "http": f"http://{proxy}",
             "https": f"http://{proxy}",
         }
 
-    def remove_proxy(self, proxy: dict) -> None:
-        """Remove a bad/blocked proxy from the global list."""
+    def report_proxy_success(self, proxy: dict, latency: float) -> None:
+        if proxy:
+            DataFetcher._proxy_pool.record_success(
+                proxy["http"].replace("http://", ""), latency
+            )
+
+    def report_proxy_failure(self, proxy: dict, latency: float = None) -> None:
+        """Put a bad/blocked proxy on cooldown, removing it if it keeps failing."""
         if not proxy:
             return
         proxy_str = proxy.get("http", "").replace("http://", "")
         if not proxy_str:
             return
-        with DataFetcher._proxy_lock:
-            if DataFetcher._proxies and proxy_str in DataFetcher._proxies:
-                try:
-                    DataFetcher._proxies.remove(proxy_str)
-                    logger.info(
-                        f"Removed bad proxy: {proxy_str}. Remaining proxies: {len(DataFetcher._proxies)}"
-                    )
-                except ValueError:
-                    pass
+        if DataFetcher._proxy_pool.record_failure(proxy_str, latency):
+            logger.info(
+                "Removed bad proxy: %s. Remaining proxies: %d",
+                proxy_str,
+                len(DataFetcher._proxy_pool),
+            )
 
     def get(self, max_retries: int = 50) -> dict:
         """Fetch data from the API, handling retries and rate-limiting."""
-        logger.debug("Fetching %s...", self._sanitise_for_log(self.endpoint))
+        logger.debug("Fetching %s...", self.endpoint)
         if self.data is not None:
             return self.data
 
@@ -153,54 +211,75 @@ class DataFetcher:
             }
 
         while retries < max_retries:
-            proxy = self.get_random_proxy()
+            proxy = self.get_proxy()
+            proxy_name = proxy["http"].replace("http://", "") if proxy else None
             request_url = self.url
+            telemetry.record_stage(
+                "rate_limit_wait", self.rate_limiter.acquire(request_url)
+            )
+            start = time.perf_counter()
             try:
-                logger.debug("Using proxy: %s", self._sanitise_for_log(proxy))
-                response = requests.get(
+                logger.debug("Using proxy: %s", proxy)
+                response = self.session().get(
                     request_url,
                     proxies=proxy,
                     headers=headers,
                     timeout=10,
-                    impersonate="chrome146",
                 )
                 self.last_response = response
+                elapsed = time.perf_counter() - start
+                telemetry.record_request(
+                    request_url,
+                    response.status_code,
+                    elapsed,
+                    proxy_name,
+                    **self.connection_info(response),
+                )
+                if response.status_code in (403, 429):
+                    # Blocks and rate limits apply to the proxy's address
+                    self.report_proxy_failure(proxy, elapsed)
+                else:
+                    self.report_proxy_success(proxy, elapsed)
+                if response.status_code in (200, 404):
+                    self.rate_limiter.record_success(request_url)
 
                 if response.status_code == 429:
                     # Handle rate limiting properly, use Retry-After if available
                     logger.warning("HTTP 429 - Too Many Requests.")
-                    retry_after = response.headers.get("Retry-After")
-                    if retry_after:
-                        try:
-                            wait_seconds = int(retry_after)
-                        except ValueError:
-                            # Retry-After may be a HTTP-date; fall back to default
-                            wait_seconds = min(60, int(backoff_base**retries))
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    if retry_after is not None:
+                        wait_seconds = retry_after
                     else:
                         wait_seconds = min(60, int(backoff_base**retries))
 
+                    # Pause every request to the host, the retry waits in acquire
                     logger.warning(
-                        f"Sleeping for {wait_seconds} seconds due to 429 response"
+                        "Pausing requests to the host for %s seconds due to 429 response",
+                        wait_seconds,
                     )
-                    time.sleep(wait_seconds)
+                    telemetry.record_retry(request_url, "rate_limited")
+                    self.rate_limiter.record_rate_limited(request_url, wait_seconds)
                     retries += 1
                     continue
 
                 if response.status_code == 404:
-                    logger.warning(f"HTTP 404 - Not Found: {request_url}")
+                    logger.warning("HTTP 404 - Not Found: %s", request_url)
                     return {}
 
                 if response.status_code == 403:
-                    logger.warning(f"HTTP 403 - Forbidden for proxy: {proxy}")
-                    self.remove_proxy(proxy)
+                    logger.warning("HTTP 403 - Forbidden for proxy: %s", proxy)
+                    telemetry.record_retry(request_url, "forbidden")
                     retries += 1
                     continue
 
                 if response.status_code != 200:
                     # Small backoff for other HTTP errors
-                    logger.error(f"HTTP {response.status_code} - {response.text[:200]}")
+                    logger.error(
+                        "HTTP %s - %s", response.status_code, response.text[:200]
+                    )
                     wait_seconds = min(10, int(backoff_base**retries))
-                    logger.debug(f"Waiting for {wait_seconds}s before retrying")
+                    logger.debug("Waiting for %ss before retrying", wait_seconds)
+                    telemetry.record_retry(request_url, "http_error")
                     time.sleep(wait_seconds)
                     retries += 1
                     continue
@@ -210,51 +289,47 @@ class DataFetcher:
                     resp = json_repair.loads(response.text)
                     if not resp.get("response", {}).get("resultPacket"):
                         logger.error(
-                            f"Funnelback API Error: {resp.get('error', 'Unknown error')}"
+                            "Funnelback API Error: %s",
+                            resp.get("error", "Unknown error"),
                         )
+                        telemetry.record_retry(request_url, "funnelback_error")
                         retries += 1
                         continue
                     self.data = resp.get("response", {})
                     return self.data
 
-                # If fetching a class/course content page, just return the HTML text as {'data': <text>}.
+                # If fetching a class/course content page, return the raw HTML as {'html': <text>}.
+                # Pages are parsed once by data_parser.parse_course_page.
                 if self.use_class_url:
-                    soup = BeautifulSoup(response.content, "html.parser")
-                    # Get main content
-                    main_tag = soup.find("main")
-                    if main_tag:
-                        text = main_tag.get_text()
-                    else:
-                        text = soup.get_text()
-                    # Grab H1 text if present as a separate field to help parsers
-                    h1_tag = soup.find("h1")
-                    h1_text = h1_tag.get_text().strip() if h1_tag else ""
-                    self.data = {
-                        "h1": h1_text,
-                        "data": re.sub(r"\n+", "\n", text),
-                        "html": response.text,
-                    }
+                    self.data = {"html": response.text}
                     return self.data
 
             except requests.exceptions.ProxyError:
-                logger.error(
-                    "Proxy error with proxy: %s", self._sanitise_for_log(proxy)
-                )
-                self.remove_proxy(proxy)
+                logger.error("Proxy error with proxy: %s", proxy)
+                elapsed = time.perf_counter() - start
+                telemetry.record_request(request_url, "ProxyError", elapsed, proxy_name)
+                telemetry.record_retry(request_url, "proxy_error")
+                self.report_proxy_failure(proxy, elapsed)
                 retries += 1
                 # Reduce retry flurry by sleeping a moment
                 time.sleep(min(3, backoff_base**retries))
             except requests.exceptions.RequestException as e:
-                logger.error("Request failed: %s", self._sanitise_for_log(e))
-                self.remove_proxy(proxy)
+                logger.error("Request failed: %s", e)
+                elapsed = time.perf_counter() - start
+                telemetry.record_request(
+                    request_url, type(e).__name__, elapsed, proxy_name
+                )
+                telemetry.record_retry(request_url, "request_error")
+                self.report_proxy_failure(proxy, elapsed)
                 retries += 1
                 time.sleep(min(3, backoff_base**retries))
             except Exception as e:
-                logger.error("Unexpected error: %s", self._sanitise_for_log(e))
+                logger.error("Unexpected error: %s", e)
+                telemetry.record_retry(request_url, "unexpected_error")
                 retries += 1
                 time.sleep(min(3, backoff_base**retries))
 
         logger.error(
-            f"Failed to fetch data from {self.url} after {max_retries} retries."
+            "Failed to fetch data from %s after %d retries.", self.url, max_retries
         )
         return {}
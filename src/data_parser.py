@@ -1,9 +1,15 @@
 import re
-
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
 
 import data_fetcher
+from html_backend import get_backend
 from log import logger
+from parse_pool import parse_pool
+from settings import get_setting
+from telemetry import telemetry
+
+# HTML parser used for course pages and outlines, see html_backend
+html = get_backend(get_setting("HTML_PARSER", "selectolax"))
 
 
 def get_subjects(year: int) -> dict[str, list[dict[str, str]]]:
@@ -13,7 +19,8 @@ def get_subjects(year: int) -> dict[str, list[dict[str, str]]]:
     )
 
     try:
-        data = subjects.get()
+        with telemetry.stage("subject_listing"):
+            data = subjects.get()
         if (
             subjects.last_response is None
             or subjects.last_response.status_code != 200
@@ -33,7 +40,7 @@ def get_subjects(year: int) -> dict[str, list[dict[str, str]]]:
         for subject in data:
             subj = subject.get("data")
             subject_list.append({"subject": subj})
-        logger.debug(f"Subjects: {subject_list}")
+        logger.debug("Subjects: %s", subject_list)
         return {"subjects": subject_list}
 
     except Exception as e:
@@ -48,8 +55,9 @@ def get_course_codes(subject: str, year: int):
     )
 
     try:
-        data = courses.get()
-        logger.debug(f"Course data: {data}")
+        with telemetry.stage("course_list"):
+            data = courses.get()
+        logger.debug("Course data: %s", data)
         if (
             courses.last_response is None
             or courses.last_response.status_code != 200
@@ -63,19 +71,23 @@ def get_course_codes(subject: str, year: int):
             print(f"Error: {status} - {data}")
             return {"courses": []}
         results = data.get("resultPacket", []).get("results", [])
-        logger.debug(f"Number of courses found: {len(results)}")
+        logger.debug("Number of courses found: %d", len(results))
 
         if not results:
             logger.debug("No results found in course codes.")
             return {}
 
-        course_codes = [
-            {
-                "code": course.get("listMetadata", {}).get("courseCode"),
-                "terms": course.get("listMetadata", {}).get("term"),
-            }
-            for course in results
-        ]
+        total = (
+            data.get("resultPacket", {})
+            .get("resultsSummary", {})
+            .get("totalMatching", len(results))
+        )
+        if total > len(results):
+            print(
+                f"[LISTING] {subject} has {total} courses but only {len(results)} were listed."
+            )
+
+        course_codes = [course_entry(course) for course in results]
         logger.debug("Course codes extracted successfully.")
         return {"courses": course_codes}
 
@@ -84,75 +96,175 @@ def get_course_codes(subject: str, year: int):
         return {"courses": []}
 
 
-def get_course_details(course_code: str, max_retries=3):
-    """Return the details for a given course."""
-    logger.debug(f"Fetching details for course {course_code}")
+def course_entry(result: dict) -> dict:
+    """The course code and terms of a Funnelback search result."""
+    return {
+        "code": result.get("listMetadata", {}).get("courseCode"),
+        "terms": result.get("listMetadata", {}).get("term"),
+    }
+
+
+def get_listing_page(year: int, start_rank: int, page_size: int):
+    """Return a page of the courses of a year, or None if it failed to load."""
+    page = data_fetcher.DataFetcher(
+        f"?f.Tabs%7Ctype=Degrees+%26+Courses&form=json&f.Year%7Cyear={year}&num_ranks={page_size}&start_rank={start_rank}&profile=site-search&query=&collection=uosa%7Esp-aem-prod&f.Study+type%7CstudyType=Course"
+    )
+    with telemetry.stage("course_list"):
+        data = page.get()
+    if page.last_response is None or page.last_response.status_code != 200 or not data:
+        status = page.last_response.status_code if page.last_response else "NO_RESPONSE"
+        print(f"Error: {status} - course listing page at {start_rank}")
+        return None
+    return data.get("resultPacket", {})
+
+
+def get_year_listing(year: int, page_size: int = 500, concurrency: int = 8):
+    """Return the courses of every subject of a year, listed a page at a time.
+
+    The first page gives the number of courses, the rest are fetched concurrently.
+    Courses are grouped by their study areas, so a course listed in several subjects
+    appears in each of them.
+
+    Returns:
+        dict: Lists of courses keyed by subject name, or None if a page failed to load
+        or fewer courses were listed than Funnelback matched.
+    """
+    try:
+        first = get_listing_page(year, 1, page_size)
+        if first is None:
+            return None
+        total = first.get("resultsSummary", {}).get("totalMatching", 0)
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            pages = [first] + list(
+                executor.map(
+                    lambda start_rank: get_listing_page(year, start_rank, page_size),
+                    range(page_size + 1, total + 1, page_size),
+                )
+            )
+        if any(page is None for page in pages):
+            return None
+
+        results = [result for page in pages for result in page.get("results", [])]
+        if len(results) < total:
+            print(
+                f"[LISTING] {year}: {total} courses matched but {len(results)} listed."
+            )
+            return None
+
+        by_subject = {}
+        for result in results:
+            subjects = result.get("listMetadata", {}).get("studyArea") or []
+            if isinstance(subjects, str):
+                subjects = [subjects]
+            entry = {**course_entry(result), "subjects": subjects}
+            for subject in subjects:
+                by_subject.setdefault(subject, []).append(entry)
+        logger.debug(
+            "Listed %d courses of %d subjects in %d pages",
+            len(results),
+            len(by_subject),
+            len(pages),
+        )
+        return by_subject
+
+    except Exception as e:
+        print(f"An error occurred while listing the courses of {year}: {e}")
+        return None
+
+
+def get_course_page(course_code: str) -> dict:
+    """Fetch a course page once and return both its details and its class list."""
+    logger.debug("Fetching details for course %s", course_code)
     code_str = course_code[0] if isinstance(course_code, (list, tuple)) else course_code
     encoded_course_code = re.sub(
         r"([a-zA-Z]+)([0-9]+)", r"\1-\2", str(code_str)
     ).lower()
 
-    course_details = data_fetcher.DataFetcher(
+    course_page = data_fetcher.DataFetcher(
         f"/study/courses/{encoded_course_code}/", use_class_url=True
     )
     try:
-        data = course_details.get()
+        with telemetry.stage("course_page_fetch"):
+            data = course_page.get()
         if (
-            course_details.last_response is None
-            or course_details.last_response.status_code != 200
+            course_page.last_response is None
+            or course_page.last_response.status_code != 200
             or not data
         ):
             status = (
-                course_details.last_response.status_code
-                if course_details.last_response
+                course_page.last_response.status_code
+                if course_page.last_response
                 else "NO_RESPONSE"
             )
             logger.error(
-                f"Error fetching course details for {course_code}: Status {status}"
+                "Error fetching course details for %s: Status %s", course_code, status
             )
             return None
 
-        # Return plain text string without extra newlines
-        text = data.get("data", "")
-
-        # Strip HTML tags
-        soup = BeautifulSoup(text, "html.parser")
-        body_text = soup.get_text() if soup else text
-
-        # Parse the plain-body text for label/value pairs
-        parsed = parse_course_text(body_text)
-
-        # Return a dict with the parsed fields and the canonical code string
-        course_details = {
-            "code": code_str,
-            "title": data.get("h1", ""),
-            "course_id": parsed.get("course_id"),
-            "campus": parsed.get("campus"),
-            "level_of_study": parsed.get("level_of_study"),
-            "units": parsed.get("units"),
-            "course_coordinator": parsed.get("course_coordinator"),
-            "course_level": parsed.get("course_level"),
-            "course_overview": parsed.get("course_overview"),
-            "prerequisites": parsed.get("prerequisites"),
-            "corequisites": parsed.get("corequisites"),
-            "antirequisites": parsed.get("antirequisites"),
-            "university_wide_elective": (
-                True
-                if parsed.get("university_wide_elective") == "Yes"
-                else False
-                if parsed.get("university_wide_elective") == "No"
-                else parsed.get("university_wide_elective")
-            ),
-        }
-
+        with telemetry.stage("html_parse"):
+            parsed = parse_pool.run(parse_course_page, data.get("html", ""))
         logger.debug("Course details extracted successfully.")
-        return course_details
+        return {
+            "details": build_course_details(code_str, parsed["h1"], parsed["fields"]),
+            "classes": parsed["classes"],
+        }
 
     except Exception as e:
         print(f"An error occurred while fetching course details for {course_code}: {e}")
         return None
 
 
+def parse_course_page(html_content: str) -> dict:
+    """
+    Parse a course page in a single pass.
+    Returns the H1 title, the label/value fields parsed from the plain text of the main
+    content and the class list.
+    """
+    doc = html.parse(html_content or "")
+
+    # Get main content
+    main_tag = html.select_one(doc, "main")
+    text = html.text(main_tag if main_tag else doc)
+
+    # Grab H1 text if present as a separate field to help parsers
+    h1_tag = html.select_one(doc, "h1")
+    h1_text = html.text(h1_tag).strip() if h1_tag else ""
+
+    # Parse the plain-body text for label/value pairs
+    text = re.sub(r"\n+", "\n", text)
+    return {
+        "h1": h1_text,
+        "fields": parse_course_text(text),
+        "classes": parse_class_sessions(doc),
+    }
+
+
+def build_course_details(code_str: str, title: str, parsed: dict) -> dict:
+    """Return a dict with the parsed fields and the canonical code string."""
+    return {
+        "code": code_str,
+        "title": title,
+        "course_id": parsed.get("course_id"),
+        "campus": parsed.get("campus"),
+        "level_of_study": parsed.get("level_of_study"),
+        "units": parsed.get("units"),
+        "course_coordinator": parsed.get("course_coordinator"),
+        "course_level": parsed.get("course_level"),
+        "course_overview": parsed.get("course_overview"),
+        "prerequisites": parsed.get("prerequisites"),
+        "corequisites": parsed.get("corequisites"),
+        "antirequisites": parsed.get("antirequisites"),
+        "university_wide_elective": (
+            True
+            if parsed.get("university_wide_elective") == "Yes"
+            else False
+            if parsed.get("university_wide_elective") == "No"
+            else parsed.get("university_wide_elective")
+        ),
+    }
+
+
 def parse_course_text(text: str) -> dict:
     """Parse a course details plain text and return a dict of fields."""
     if not isinstance(text, str):
@@ -193,64 +305,15 @@ def parse_course_text(text: str) -> dict:
     return parsed
 
 
-def get_course_class_list(course_code: int):
-    """Return the class list of a course for a given course code."""
-
-    # Encode course code to match URL format
-    code_str = course_code[0] if isinstance(course_code, (list, tuple)) else course_code
-    encoded_course_code = re.sub(
-        r"([a-zA-Z]+)([0-9]+)", r"\1-\2", str(code_str)
-    ).lower()
-
-    course_details = data_fetcher.DataFetcher(
-        f"/study/courses/{encoded_course_code}/", use_class_url=True
-    )
-
-    try:
-        data = course_details.get()
-        if (
-            course_details.last_response is None
-            or course_details.last_response.status_code != 200
-        ):
-            status = (
-                course_details.last_response.status_code
-                if course_details.last_response
-                else "NO_RESPONSE"
-            )
-            text = (
-                course_details.last_response.text
-                if course_details.last_response
-                else ""
-            )
-            print(f"Error: {status} - {text}")
-            # Return a minimal dict so callers don't KeyError when accessing title/course_id
-            title = ""
-            if isinstance(data, dict):
-                title = data.get("h1", "")
-            return {
-                "code": code_str,
-                "title": title,
-                "course_id": None,
-                "classes": [],
-            }
-        # Use raw HTML for BeautifulSoup parsing
-        text = data.get("html", "") or data.get("data", "")
-
-        # Parse the plain-body text for class list details
-        parsed_classes = parse_course_class_list(text)
-        return {"classes": parsed_classes}
-
-    except Exception as e:
-        print(f"An error occurred while fetching course class list: {e}")
-        return {}
-
-
 def parse_course_class_list(text: str) -> list[dict]:
     """Parse course class list details from the given text."""
     if not isinstance(text, str):
         return []
+    return parse_class_sessions(html.parse(text))
 
-    soup = BeautifulSoup(text, "html.parser")
+
+def parse_class_sessions(doc) -> list[dict]:
+    """Parse course class list details from a parsed course page."""
     parsed_classes = []
 
     # Find all component containers (e.g. Enrolment class, Related class)
@@ -261,7 +324,7 @@ def parse_course_class_list(text: str) -> list[dict]:
 
     # Iterate over all .cmp-course-accordion--container-session to find classes
 
-    sessions = soup.select(".cmp-course-accordion--container-session")
+    sessions = html.select(doc, ".cmp-course-accordion--container-session")
     for session in sessions:
         class_info = {
             "meetings": [],
@@ -274,20 +337,20 @@ def parse_course_class_list(text: str) -> list[dict]:
         }
 
         # Find group name if session is inside a group container
-        group_el = session.find_parent("div", class_="cmp-course-accordion--group")
+        group_el = html.find_parent(session, "div", "cmp-course-accordion--group")
         if group_el:
-            title_text_el = group_el.select_one(
-                ".cmp-course-accordion--group-title-text"
+            title_text_el = html.select_one(
+                group_el, ".cmp-course-accordion--group-title-text"
             )
             raw_group = ""
             if title_text_el:
-                raw_group = title_text_el.get_text(strip=True)
+                raw_group = html.text(title_text_el, strip=True)
             else:
-                group_title_el = group_el.select_one(
-                    ".cmp-course-accordion--group-title"
+                group_title_el = html.select_one(
+                    group_el, ".cmp-course-accordion--group-title"
                 )
                 if group_title_el:
-                    raw_group = group_title_el.get_text(strip=True)
+                    raw_group = html.text(group_title_el, strip=True)
 
             if raw_group:
                 clean_group = re.sub(r"(?i)^group\s*", "", raw_group).strip()
@@ -295,16 +358,16 @@ def parse_course_class_list(text: str) -> list[dict]:
 
         # Find component name from parent container
         # session -> content -> container -> h5(title)
-        container = session.find_parent("div", class_="cmp-course-accordion--container")
+        container = html.find_parent(session, "div", "cmp-course-accordion--container")
         if container:
-            title_el = container.select_one(".cmp-course-accordion__title")
+            title_el = html.select_one(container, ".cmp-course-accordion__title")
             if title_el:
-                class_info["component"] = title_el.get_text(strip=True)
+                class_info["component"] = html.text(title_el, strip=True)
 
         # Parse cards for class details
-        cards = session.select(".cmp-course-accordion--card-text")
+        cards = html.select(session, ".cmp-course-accordion--card-text")
         for card in cards:
-            text = card.get_text(strip=True)
+            text = html.text(card, strip=True)
             if "Class number" in text:
                 class_info["class_number"] = text.replace("Class number", "").strip()
             elif "Section" in text:
@@ -315,19 +378,19 @@ def parse_course_class_list(text: str) -> list[dict]:
                 class_info["available"] = text.replace("Available", "").strip()
 
         # Parse meetings table
-        rows = session.select("table tbody tr")
+        rows = html.select(session, "table tbody tr")
         for row in rows:
-            cols = row.select("td")
+            cols = html.select(row, "td")
             if not cols:
                 continue
 
             def get_val(col):
                 # Attempt to find .table-content div first (used in responsive tables)
-                content = col.select_one(".table-content")
+                content = html.select_one(col, ".table-content")
                 if content:
-                    val = content.get_text(separator=" ", strip=True)
+                    val = html.text(content, separator=" ", strip=True)
                 else:
-                    val = col.get_text(separator=" ", strip=True)
+                    val = html.text(col, separator=" ", strip=True)
 
                 # Clean up specific placeholders like "-", ",", "N/A"
                 if val in ["-", ",", "N/A"]:
@@ -367,7 +430,7 @@ def parse_course_outline(html_content: str) -> dict:
     if not html_content:
         return {}
 
-    soup = BeautifulSoup(html_content, "html.parser")
+    doc = html.parse(html_content)
     result = {
         "aim": None,
         "learning_outcomes": [],
@@ -375,68 +438,76 @@ def parse_course_outline(html_content: str) -> dict:
         "assessments": [],
     }
 
+    # Headers, tables and lists in document order, so sections can be found with a
+    # single walk over the page
+    elements = [
+        (html.tag(el), el)
+        for el in html.elements(doc)
+        if html.tag(el) in ("h2", "h3", "h4", "table", "ul", "ol")
+    ]
+
+    def find_header(header_tags, header_text, match_case=True):
+        for index, (tag, el) in enumerate(elements):
+            if tag in header_tags:
+                text = html.text(el)
+                if match_case and header_text in text:
+                    return index, el
+                if not match_case and header_text.lower() in text.lower():
+                    return index, el
+        return None, None
+
+    def find_next(index, next_tag):
+        for tag, el in elements[index + 1 :]:
+            if tag == next_tag:
+                return el
+        return None
+
     # Helper to find section content based on header
     def get_section_text(header_text):
-        header = soup.find(
-            lambda tag: (
-                tag.name in ["h2", "h3", "h4"]
-                and header_text.lower() in tag.get_text().lower()
-            )
-        )
+        _, header = find_header(("h2", "h3", "h4"), header_text, match_case=False)
         if header:
             content = []
-            curr = header.find_next_sibling()
-            while curr and curr.name not in ["h2", "h3", "h4"]:
-                text = curr.get_text(strip=True, separator=" ")
+            curr = html.next_sibling(header)
+            while curr and html.tag(curr) not in ["h2", "h3", "h4"]:
+                text = html.text(curr, strip=True, separator=" ")
                 if text:
                     content.append(text)
-                curr = curr.find_next_sibling()
+                curr = html.next_sibling(curr)
             return "\n\n".join(content)
         return None
 
-    aim_text = get_section_text("Aim")
-    if not aim_text:
-        pass
-    result["aim"] = aim_text
+    result["aim"] = get_section_text("Aim")
 
-    lo_header = soup.find(
-        lambda tag: tag.name in ["h2", "h3"] and "Learning Outcomes" in tag.get_text()
-    )
+    lo_index, lo_header = find_header(("h2", "h3"), "Learning Outcomes")
     if lo_header:
-        lo_table = lo_header.find_next("table")
+        lo_table = find_next(lo_index, "table")
         if lo_table:
-            rows = lo_table.find_all("tr")
+            rows = html.select(lo_table, "tr")
             for row in rows:
-                cols = row.find_all("td")
+                cols = html.select(row, "td")
                 if len(cols) >= 2:
-                    text = cols[1].get_text(strip=True)
+                    text = html.text(cols[1], strip=True)
                     if text.startswith("Course Learning Outcome"):
                         text = text[len("Course Learning Outcome") :].strip()
                     result["learning_outcomes"].append(text)
         else:
-            lo_list = lo_header.find_next("ul") or lo_header.find_next("ol")
+            lo_list = find_next(lo_index, "ul") or find_next(lo_index, "ol")
             if lo_list:
-                for li in lo_list.find_all("li"):
-                    text = li.get_text(strip=True)
+                for li in html.select(lo_list, "li"):
+                    text = html.text(li, strip=True)
                     if text.startswith("Course Learning Outcome"):
                         text = text[len("Course Learning Outcome") :].strip()
                     result["learning_outcomes"].append(text)
 
-    text_res = get_section_text("Learning Resources")
-    if text_res:
-        pass
-    result["textbooks"] = text_res
+    result["textbooks"] = get_section_text("Learning Resources")
 
-    assess_header = soup.find(
-        lambda tag: (
-            tag.name in ["h2", "h3"] and "Assessment Descriptions" in tag.get_text()
-        )
-    )
+    assess_index, assess_header = find_header(("h2", "h3"), "Assessment Descriptions")
     if assess_header:
-        assess_table = assess_header.find_next("table")
+        assess_table = find_next(assess_index, "table")
         if assess_table:
             headers = [
-                th.get_text(strip=True).lower() for th in assess_table.find_all("th")
+                html.text(th, strip=True).lower()
+                for th in html.select(assess_table, "th")
             ]
             idx_title = 0
             idx_weight = -1
@@ -453,16 +524,16 @@ def parse_course_outline(html_content: str) -> dict:
                 elif "learning outcome" in h:
                     idx_lo = i
 
-            rows = assess_table.find_all("tr")[1:]  # Skip header
+            rows = html.select(assess_table, "tr")[1:]  # Skip header
             for row in rows:
-                cols = row.find_all("td")
+                cols = html.select(row, "td")
                 if not cols:
                     continue
 
                 # Helper to safely get cleaned text
                 def get_col_text(idx, prefix=None):
                     if idx >= 0 and idx < len(cols):
-                        text = cols[idx].get_text(strip=True)
+                        text = html.text(cols[idx], strip=True)
                         if prefix and text.startswith(prefix):
                             text = text[len(prefix) :].strip()
                         return text
@@ -0,0 +1,318 @@
+"""Row-level deltas between two versions of a year's database.
+
+A delta holds the rows added, changed and removed in every table, and checksums of the
+content of both versions. Applying it patches a copy of the previous version, checks
+that the result matches the new version and swaps it in. When the local copy isn't the
+delta's base or the result doesn't match, the full database is downloaded instead.
+
+Usage:
+    uv run python src/delta.py build local-2026.sqlite3 dev-2026.sqlite3 dev-2026.delta.json.gz
+    uv run python src/delta.py apply src/shards/local-2026.sqlite3 \\
+        --delta local-2026.delta.json.gz --full-url https://.../local-2026.sqlite3
+    uv run python src/delta.py checksum src/shards/local-2026.sqlite3
+"""
+
+import argparse
+import base64
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import time
+import urllib.request
+
+from sqlalchemy import create_engine
+
+from snapshot import snapshot_path, write_snapshot
+
+FORMAT = 1
+# Scraper bookkeeping, not served and rewritten on every run
+SKIPPED_TABLES = ("scrape_progress",)
+
+
+class DeltaError(Exception):
+    pass
+
+
+# Failures of a delta that a full download recovers from
+UPDATE_ERRORS = (DeltaError, OSError, ValueError, KeyError, sqlite3.Error)
+
+
+def delta_path(database_path: str) -> str:
+    """Gets the delta path of a database, e.g. local-2026.delta.json.gz for local-2026.sqlite3."""
+    return os.path.splitext(database_path)[0] + ".delta.json.gz"
+
+
+def quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def encode(value):
+    """A JSON value of a column value. Blobs are base64 encoded."""
+    if isinstance(value, bytes):
+        return {"b64": base64.b64encode(value).decode()}
+    return value
+
+
+def decode(value):
+    if isinstance(value, dict):
+        return base64.b64decode(value["b64"])
+    return value
+
+
+def read_schema(connection) -> dict[str, dict]:
+    """The columns, primary key and indexes of every table, keyed by table name.
+
+    A delta only holds rows, so a database whose indexes differ is downloaded whole.
+    """
+    schema = {}
+    for (table_name,) in connection.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' "
+        "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+    ):
+        if table_name in SKIPPED_TABLES:
+            continue
+        columns = connection.execute(
+            f"PRAGMA table_info({quote(table_name)})"
+        ).fetchall()
+        schema[table_name] = {
+            "columns": [column[1] for column in columns],
+            "key": [
+                column[1] for column in sorted(columns, key=lambda c: c[5]) if column[5]
+            ],
+            "indexes": sorted(
+                index[1]
+                for index in connection.execute(
+                    f"PRAGMA index_list({quote(table_name)})"
+                )
+                if index[3] == "c"
+            ),
+        }
+    return schema
+
+
+def read_table(connection, table_name: str, table: dict):
+    """The rows of a table in primary key order."""
+    columns = ", ".join(quote(column) for column in table["columns"])
+    order = ", ".join(quote(column) for column in table["key"] or table["columns"])
+    return connection.execute(
+        f"SELECT {columns} FROM {quote(table_name)} ORDER BY {order}"
+    )
+
+
+def checksum(connection) -> str:
+    """A checksum of the schema and rows of a database, independent of its file layout."""
+    digest = hashlib.sha256()
+    schema = read_schema(connection)
+    for table_name, table in schema.items():
+        digest.update(json.dumps([table_name, table]).encode())
+        for row in read_table(connection, table_name, table):
+            digest.update(json.dumps([encode(value) for value in row]).encode())
+            digest.update(b"\n")
+    return digest.hexdigest()
+
+
+def build_delta(previous_path: str, path: str) -> dict:
+    """Build the delta from the database at `previous_path` to the one at `path`.
+
+    Raises:
+        DeltaError: If the schemas differ, as a delta only holds rows.
+    """
+    previous = sqlite3.connect(previous_path)
+    current = sqlite3.connect(path)
+    try:
+        schema = read_schema(current)
+        if read_schema(previous) != schema:
+            raise DeltaError("The schema changed")
+
+        tables = {}
+        for table_name, table in schema.items():
+            key = [table["columns"].index(column) for column in table["key"]]
+            old = {
+                tuple(row[i] for i in key): row
+                for row in read_table(previous, table_name, table)
+            }
+            upserts = []
+            for row in read_table(current, table_name, table):
+                if old.pop(tuple(row[i] for i in key), None) != row:
+                    upserts.append([encode(value) for value in row])
+            deletes = [[encode(value) for value in row_key] for row_key in old]
+            if upserts or deletes:
+                tables[table_name] = {"upsert": upserts, "delete": deletes}
+
+        return {
+            "format": FORMAT,
+            "base_checksum": checksum(previous),
+            "checksum": checksum(current),
+            "schema": schema,
+            "tables": tables,
+        }
+    finally:
+        previous.close()
+        current.close()
+
+
+def write_delta(previous_path: str, path: str, output_path: str) -> dict:
+    """Write the delta between two databases, compressed, replacing any previous one.
+
+    Returns:
+        dict: The number of changed rows and the size of the delta in bytes.
+    """
+    delta = build_delta(previous_path, path)
+    temporary_path = f"{output_path}.tmp"
+    with gzip.open(temporary_path, "wt", encoding="utf-8") as file:
+        json.dump(delta, file, separators=(",", ":"))
+    os.replace(temporary_path, output_path)
+    return {
+        "rows": sum(
+            len(changes["upsert"]) + len(changes["delete"])
+            for changes in delta["tables"].values()
+        ),
+        "bytes": os.path.getsize(output_path),
+    }
+
+
+def read_delta(path: str) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        delta = json.load(file)
+    if delta.get("format") != FORMAT:
+        raise DeltaError(f"Unsupported delta format {delta.get('format')}")
+    return delta
+
+
+def apply_delta(database_path: str, delta: dict) -> bool:
+    """Patch a copy of a database with a delta and swap it in once its checksum matches.
+
+    Returns:
+        bool: False if the database was already the delta's result, True if patched.
+    Raises:
+        DeltaError: If the database isn't the delta's base or the result doesn't match.
+    """
+    temporary_path = f"{database_path}.tmp"
+    shutil.copyfile(database_path, temporary_path)
+    connection = sqlite3.connect(temporary_path)
+    try:
+        local_checksum = checksum(connection)
+        if local_checksum == delta["checksum"]:
+            connection.close()
+            os.remove(temporary_path)
+            return False
+        if local_checksum != delta["base_checksum"]:
+            raise DeltaError(f"{database_path} isn't the base of the delta")
+        with connection:
+            for table_name, changes in delta["tables"].items():
+                table = delta["schema"][table_name]
+                key = " AND ".join(f"{quote(column)} = ?" for column in table["key"])
+                connection.executemany(
+                    f"DELETE FROM {quote(table_name)} WHERE {key}",
+                    ([decode(value) for value in row] for row in changes["delete"]),
+                )
+                columns = ", ".join(quote(column) for column in table["columns"])
+                values = ", ".join("?" for _ in table["columns"])
+                connection.executemany(
+                    f"INSERT OR REPLACE INTO {quote(table_name)} ({columns}) "
+                    f"VALUES ({values})",
+                    ([decode(value) for value in row] for row in changes["upsert"]),
+                )
+        if checksum(connection) != delta["checksum"]:
+            raise DeltaError("The patched database doesn't match the delta's checksum")
+        connection.execute("VACUUM")
+    except BaseException:
+        connection.close()
+        os.remove(temporary_path)
+        raise
+    connection.close()
+    os.replace(temporary_path, database_path)
+    return True
+
+
+def download(url: str, database_path: str, expected_checksum: str = None) -> None:
+    """Download a full database and swap it in, checking it if a checksum is given."""
+    temporary_path = f"{database_path}.tmp"
+    with urllib.request.urlopen(url) as response, open(temporary_path, "wb") as file:
+        shutil.copyfileobj(response, file)
+    if expected_checksum:
+        connection = sqlite3.connect(temporary_path)
+        matches = checksum(connection) == expected_checksum
+        connection.close()
+        if not matches:
+            os.remove(temporary_path)
+            raise DeltaError(f"The download from {url} doesn't match the checksum")
+    os.replace(temporary_path, database_path)
+
+
+def update(database_path: str, delta_file: str = None, full_url: str = None) -> str:
+    """Bring a local database up to date, by delta if possible, else by full download.
+
+    The database's snapshot is rebuilt afterwards.
+
+    Returns:
+        str: How the database was updated, "delta", "full" or "none" if it was current.
+    """
+    delta = None
+    method = "full"
+    try:
+        if not delta_file or not os.path.exists(delta_file):
+            raise DeltaError("No delta")
+        delta = read_delta(delta_file)
+        if not os.path.exists(database_path):
+            raise DeltaError(f"No local copy at {database_path}")
+        method = "delta" if apply_delta(database_path, delta) else "none"
+    except UPDATE_ERRORS as e:
+        if not full_url:
+            raise
+        print(f"[DELTA] {e}, downloading the full database")
+        download(full_url, database_path, delta["checksum"] if delta else None)
+
+    engine = create_engine(f"sqlite:///{database_path}")
+    write_snapshot(engine, snapshot_path(database_path))
+    engine.dispose()
+    return method
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Write the delta between two databases")
+    build.add_argument("previous")
+    build.add_argument("current")
+    build.add_argument("output")
+    apply = commands.add_parser("apply", help="Update a database from a delta")
+    apply.add_argument("database")
+    apply.add_argument("--delta", help="Defaults to the delta next to the database")
+    apply.add_argument("--full-url", help="Where to download the full database from")
+    show = commands.add_parser("checksum", help="Print the checksum of a database")
+    show.add_argument("database")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        stats = write_delta(args.previous, args.current, args.output)
+        print(
+            f"[DELTA] Wrote {args.output}: {stats['rows']} rows in "
+            f"{stats['bytes'] / 1024:.0f} KiB"
+        )
+    elif args.command == "apply":
+        start = time.perf_counter()
+        try:
+            method = update(
+                args.database, args.delta or delta_path(args.database), args.full_url
+            )
+        except UPDATE_ERRORS as e:
+            print(f"[DELTA] Failed to update {args.database}: {e}")
+            sys.exit(1)
+        seconds = time.perf_counter() - start
+        if method == "none":
+            print(f"[DELTA] {args.database} is up to date ({seconds:.1f}s)")
+        else:
+            print(f"[DELTA] Updated {args.database} by {method} in {seconds:.1f}s")
+    else:
+        connection = sqlite3.connect(args.database)
+        print(checksum(connection))
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
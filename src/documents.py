@@ -0,0 +1,152 @@
+"""Built response documents, cached in memory or shared by every worker through a file.
+
+A shared documents file holds the JSON responses of the current term, sorted by key.
+Every worker process maps the same file, so the documents are stored once in the OS
+page cache and served straight from the mapping.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from threading import Lock
+
+MAGIC = b"CAPIDOCS"
+VERSION = 1
+# Magic, format version, byte order of the offsets, document count and stamp length
+HEADER = struct.Struct("<8sHcxII")
+BYTE_ORDER = b"<" if sys.byteorder == "little" else b">"
+
+
+class DocumentCache:
+    """Built response documents, keyed by route and parameters, least recently used first out.
+
+    Documents are shared between requests, so they must not be changed once stored.
+    A size of 0 disables the cache.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.documents = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            document = self.documents.get(key)
+            if document is not None:
+                self.documents.move_to_end(key)
+            return document
+
+    def put(self, key, document) -> None:
+        if self.size <= 0:
+            return
+        with self.lock:
+            self.documents[key] = document
+            self.documents.move_to_end(key)
+            while len(self.documents) > self.size:
+                self.documents.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+
+class SharedDocumentsError(Exception):
+    pass
+
+
+def documents_path(database_path: str) -> str:
+    """Gets the shared documents path of a database, e.g. local-2026.documents for local-2026.sqlite3."""
+    return os.path.splitext(database_path)[0] + ".documents"
+
+
+def write_documents(path: str, documents, stamp: dict) -> int:
+    """Write a shared documents file, replacing any previous one atomically.
+
+    Args:
+        documents: (key, JSON bytes) pairs.
+        stamp (dict): What the documents were built from, to tell when they are stale.
+    Returns:
+        int: The size of the file in bytes.
+    """
+    documents = sorted((key.encode(), document) for key, document in documents)
+    key_offsets = array("Q", [0])
+    document_offsets = array("Q", [0])
+    for key, document in documents:
+        key_offsets.append(key_offsets[-1] + len(key))
+        document_offsets.append(document_offsets[-1] + len(document))
+    encoded_stamp = json.dumps(stamp).encode()
+
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(
+            HEADER.pack(MAGIC, VERSION, BYTE_ORDER, len(documents), len(encoded_stamp))
+        )
+        # The offsets start at a multiple of 8 bytes
+        file.write(encoded_stamp + bytes(-(file.tell() + len(encoded_stamp)) % 8))
+        file.write(key_offsets.tobytes())
+        file.write(document_offsets.tobytes())
+        for key, _ in documents:
+            file.write(key)
+        for _, document in documents:
+            file.write(document)
+        size = file.tell()
+    os.replace(temporary_path, path)
+    return size
+
+
+class SharedDocuments:
+    """A shared documents file mapped into memory read-only."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as file:
+            try:
+                self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise SharedDocumentsError(f"Empty documents file {path}") from e
+        view = memoryview(self.buffer)
+        if len(view) < HEADER.size:
+            raise SharedDocumentsError(f"Truncated documents file {path}")
+        magic, version, byte_order, count, stamp_length = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise SharedDocumentsError(
+                f"Unsupported documents file {path} (version {version})"
+            )
+        if byte_order != BYTE_ORDER:
+            raise SharedDocumentsError(
+                f"Documents file {path} was written on another byte order"
+            )
+
+        offset = HEADER.size
+        self.stamp = json.loads(bytes(view[offset : offset + stamp_length]))
+        offset += stamp_length + -(offset + stamp_length) % 8
+        self.count = count
+        self.key_offsets = view[offset : offset + (count + 1) * 8].cast("Q")
+        offset += (count + 1) * 8
+        self.document_offsets = view[offset : offset + (count + 1) * 8].cast("Q")
+        offset += (count + 1) * 8
+        self.keys = view[offset : offset + self.key_offsets[count]]
+        offset += self.key_offsets[count]
+        self.documents = view[offset : offset + self.document_offsets[count]]
+        if len(self.documents) != self.document_offsets[count]:
+            raise SharedDocumentsError(f"Truncated documents file {path}")
+
+    def key(self, index: int) -> bytes:
+        return bytes(self.keys[self.key_offsets[index] : self.key_offsets[index + 1]])
+
+    def get(self, key: str) -> memoryview:
+        """Gets the JSON of a document, without copying it out of the mapping, or None."""
+        key = key.encode()
+        index = bisect_left(range(self.count), key, key=self.key)
+        if index == self.count or self.key(index) != key:
+            return None
+        return self.documents[
+            self.document_offsets[index] : self.document_offsets[index + 1]
+        ]
+
+    def __len__(self) -> int:
+        return self.count
@@ -1,7 +1,9 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import threading
+import time
 
 import requests
-from requests.exceptions import RequestException, Timeout
+from curl_cffi.requests import AsyncSession
 from rich.progress import (
     BarColumn,
     Progress,
@@ -9,6 +11,13 @@ from rich.progress import (
     TimeRemainingColumn,
 )
 
+from settings import get_setting
+
+PROXY_LIST_URL = (
+    "https://raw.githubusercontent.com/TheSpeedX/PROXY-List/refs/heads/master/http.txt"
+)
+TEST_URL = "https://adelaideuni.edu.au/study/courses/"
+
 
 def fetch_proxies(url):
     """Fetch the list of proxies from the URL."""
@@ -21,37 +30,99 @@ def fetch_proxies(url):
         return []
 
 
-def test_proxy(
-    proxy,
-    test_url="https://adelaideuni.edu.au/study/courses/",
+async def test_proxy(session, proxy, test_url=TEST_URL, timeout=5):
+    """Test if the given proxy is working by making a request.
+
+    Returns:
+        float: The latency of the proxy in seconds, or None if it doesn't work.
+    """
+    start = time.perf_counter()
+    try:
+        response = await session.get(
+            test_url,
+            proxies={"http": f"http://{proxy}", "https": f"http://{proxy}"},
+            timeout=timeout,
+        )
+    except Exception:
+        return None
+    # A 403 is a WAF block, the proxy is of no use
+    if response.status_code != 200:
+        return None
+    return time.perf_counter() - start
+
+
+async def validate_proxies(
+    proxies,
+    on_working,
+    concurrency=200,
     timeout=5,
-    retries=2,  # Number of retries
+    stop=None,
+    on_tested=None,
 ):
-    """Test if the given proxy is working by making a request."""
-    proxies = {
-        "http": f"http://{proxy}",
-        "https": f"http://{proxy}",
-    }
-    for attempt in range(retries + 1):  # Retry logic
-        try:
-            # Use realistic User-Agent to avoid WAF block
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            }
-            response = requests.get(
-                test_url, proxies=proxies, headers=headers, timeout=timeout
-            )
-            if response.status_code == 200:
-                return proxy  # Return the working proxy
-            elif response.status_code == 403:
-                # WAF block, skip immediately
-                return None
-        except (RequestException, Timeout):
-            if attempt < retries:
-                continue  # Retry on failure
-            else:
-                return None  # Skip the proxy if all retries fail
-    return None
+    """Test proxies with at most `concurrency` requests in flight.
+
+    `on_working(proxy, latency)` is called as soon as each working proxy is found, and
+    `on_tested()` after every test. Validation ends early if the `stop` event is set.
+    """
+    queue = asyncio.Queue()
+    for proxy in proxies:
+        queue.put_nowait(proxy)
+
+    async def worker(session):
+        while not queue.empty() and not (stop and stop.is_set()):
+            proxy = queue.get_nowait()
+            latency = await test_proxy(session, proxy, timeout=timeout)
+            if latency is not None:
+                on_working(proxy, latency)
+            if on_tested:
+                on_tested()
+
+    async with AsyncSession(
+        max_clients=concurrency, impersonate="chrome146"
+    ) as session:
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+
+
+def start_validation(on_working, target=50, wait_timeout=60):
+    """Validate the public proxy list in the background.
+
+    Blocks until `target` working proxies are found (or `wait_timeout` seconds pass, or
+    every proxy has been tested), then returns while validation continues in a daemon
+    thread so the scrape can start straight away.
+
+    Returns:
+        threading.Event: Set to stop the background validation.
+    """
+    proxies = fetch_proxies(PROXY_LIST_URL)
+    found = []
+    enough = threading.Event()
+    stop = threading.Event()
+    concurrency = int(get_setting("PROXY_VALIDATION_CONCURRENCY", "200"))
+    timeout = float(get_setting("PROXY_TIMEOUT", "5"))
+
+    def working(proxy, latency):
+        found.append((latency, proxy))
+        on_working(proxy, latency)
+        if len(found) >= target:
+            enough.set()
+
+    def run():
+        asyncio.run(validate_proxies(proxies, working, concurrency, timeout, stop=stop))
+        enough.set()
+        if found:
+            save_working_proxies([proxy for _, proxy in sorted(found)])
+        print(
+            f"[PROXIES] Validation finished, {len(found)} of {len(proxies)} proxies work."
+        )
+
+    start = time.perf_counter()
+    threading.Thread(target=run, daemon=True).start()
+    enough.wait(wait_timeout)
+    print(
+        f"[PROXIES] Starting with {len(found)} working proxies after "
+        f"{time.perf_counter() - start:.1f}s, validating the rest in the background."
+    )
+    return stop
 
 
 def save_working_proxies(proxies, filename="src/working_proxies.txt"):
@@ -62,8 +133,7 @@ def save_working_proxies(proxies, filename="src/working_proxies.txt"):
 
 
 def main():
-    proxy_url = "https://raw.githubusercontent.com/TheSpeedX/PROXY-List/refs/heads/master/http.txt"
-    proxies = fetch_proxies(proxy_url)
+    proxies = fetch_proxies(PROXY_LIST_URL)
 
     working_proxies = []
 
@@ -74,24 +144,19 @@ def main():
         TimeRemainingColumn(),
     ) as progress:
         task = progress.add_task("Testing Proxies...", total=len(proxies))
+        asyncio.run(
+            validate_proxies(
+                proxies,
+                lambda proxy, latency: working_proxies.append((latency, proxy)),
+                concurrency=int(get_setting("PROXY_VALIDATION_CONCURRENCY", "200")),
+                timeout=float(get_setting("PROXY_TIMEOUT", "5")),
+                on_tested=lambda: progress.update(task, advance=1),
+            )
+        )
 
-        # Use ThreadPoolExecutor for concurrency
-        with ThreadPoolExecutor(max_workers=1000) as executor:
-            future_to_proxy = {
-                executor.submit(test_proxy, proxy): proxy for proxy in proxies
-            }
-            for future in as_completed(future_to_proxy):
-                progress.update(task, advance=1)
-                try:
-                    result = future.result()
-                    if result:
-                        working_proxies.append(result)
-                except Exception:
-                    pass  # Handle or log specific proxy testing errors if needed
-
-    # Save working proxies to file
+    # Save working proxies to file, fastest first
     if working_proxies:
-        save_working_proxies(working_proxies)
+        save_working_proxies([proxy for _, proxy in sorted(working_proxies)])
         print(
             f"\n[+] Saved {len(working_proxies)} working proxies to 'working_proxies.txt'."
         )
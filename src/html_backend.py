@@ -0,0 +1,86 @@
+from bs4 import BeautifulSoup
+from selectolax.lexbor import LexborHTMLParser
+
+DEFAULT_BACKEND = "selectolax"
+
+
+class SelectolaxBackend:
+    """Parse HTML with the Lexbor C parser through selectolax."""
+
+    name = "selectolax"
+
+    def parse(self, html: str):
+        return LexborHTMLParser(html).root
+
+    def select(self, node, selector: str) -> list:
+        return node.css(selector)
+
+    def select_one(self, node, selector: str):
+        return node.css_first(selector)
+
+    def text(self, node, separator: str = "", strip: bool = False) -> str:
+        return node.text(separator=separator, strip=strip)
+
+    def tag(self, node) -> str:
+        return node.tag
+
+    def find_parent(self, node, tag: str, class_name: str):
+        parent = node.parent
+        while parent is not None:
+            classes = (parent.attributes.get("class") or "").split()
+            if parent.tag == tag and class_name in classes:
+                return parent
+            parent = parent.parent
+        return None
+
+    def next_sibling(self, node):
+        sibling = node.next
+        while sibling is not None and not sibling.is_element_node:
+            sibling = sibling.next
+        return sibling
+
+    def elements(self, node):
+        iterator = node.traverse(include_text=False)
+        next(iterator, None)  # Skip the node itself
+        return iterator
+
+
+class BeautifulSoupBackend:
+    """Parse HTML with BeautifulSoup, using `html.parser` or `lxml` to build the tree."""
+
+    def __init__(self, features: str = "html.parser") -> None:
+        self.name = features
+        self.features = features
+
+    def parse(self, html: str):
+        return BeautifulSoup(html, self.features)
+
+    def select(self, node, selector: str) -> list:
+        return node.select(selector)
+
+    def select_one(self, node, selector: str):
+        return node.select_one(selector)
+
+    def text(self, node, separator: str = "", strip: bool = False) -> str:
+        return node.get_text(separator=separator, strip=strip)
+
+    def tag(self, node) -> str:
+        return node.name
+
+    def find_parent(self, node, tag: str, class_name: str):
+        return node.find_parent(tag, class_=class_name)
+
+    def next_sibling(self, node):
+        return node.find_next_sibling()
+
+    def elements(self, node):
+        return iter(node.find_all(True))
+
+
+def get_backend(name: str = DEFAULT_BACKEND):
+    """Get an HTML parser backend by name: "selectolax", "html.parser" or "lxml"."""
+    if name == "selectolax":
+        return SelectolaxBackend()
+    if name in ("html.parser", "lxml"):
+        return BeautifulSoupBackend(name)
+    raise ValueError(f"Unknown HTML parser backend: {name}")
@@ -0,0 +1,43 @@
+from concurrent.futures import Future
+from threading import Lock
+
+
+class InFlight:
+    """Shares the result of a call per key between concurrent and later callers.
+
+    The first caller of a key runs the call, callers arriving while it runs wait for
+    its result, and later callers get the kept result. Failed calls (raising or
+    returning None) are not kept, so the next caller tries again.
+    """
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.calls = {}
+
+    def get(self, key, call, *args):
+        with self.lock:
+            future = self.calls.get(key)
+            owner = future is None
+            if owner:
+                future = self.calls[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            result = call(*args)
+        except BaseException as e:
+            self.forget(key)
+            future.set_exception(e)
+            raise
+        if result is None:
+            self.forget(key)
+        future.set_result(result)
+        return result
+
+    def forget(self, key) -> None:
+        with self.lock:
+            self.calls.pop(key, None)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.calls = {}
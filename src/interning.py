@@ -0,0 +1,69 @@
+from threading import Lock
+
+from sqlalchemy import inspect, text
+
+# Columns holding ids of the interned_strings table instead of repeated strings
+INTERNED_COLUMNS = {
+    "courses": ("terms", "campus", "level_of_study"),
+    "course_classes": ("component",),
+    "meetings": ("campus", "location", "instructor"),
+}
+
+
+def load_strings(engine) -> dict[int, str]:
+    """Read the interned strings of a database, keyed by id.
+
+    Databases written before strings were interned have none.
+    """
+    if not inspect(engine).has_table("interned_strings"):
+        return {}
+    with engine.connect() as connection:
+        return dict(
+            connection.execute(text("SELECT id, value FROM interned_strings")).all()
+        )
+
+
+def resolve(strings: dict[int, str], value):
+    """The string of an interned id. Strings of older databases are returned as they are."""
+    if isinstance(value, int):
+        return strings.get(value)
+    return value
+
+
+class StringInterner:
+    """Gives each distinct string a small integer id, shared by all scraper threads.
+
+    `on_new(id, value)` is called when a string is first seen, to store it.
+    """
+
+    def __init__(self, strings: dict[int, str] = None, on_new=None) -> None:
+        self.lock = Lock()
+        self.on_new = on_new
+        self.reset(strings)
+
+    def reset(self, strings: dict[int, str] = None) -> None:
+        """Start from the strings already stored in a database."""
+        with self.lock:
+            self.ids = {
+                value: string_id for string_id, value in (strings or {}).items()
+            }
+
+    def id(self, value):
+        if value is None:
+            return None
+        value = str(value)
+        with self.lock:
+            string_id = self.ids.get(value)
+            if string_id is None:
+                string_id = self.ids[value] = len(self.ids) + 1
+                if self.on_new:
+                    self.on_new(string_id, value)
+        return string_id
+
+    def intern_row(self, table_name: str, row: dict) -> dict:
+        """Replace the strings of a table row's interned columns with their ids."""
+        columns = INTERNED_COLUMNS.get(table_name, ())
+        return {
+            name: self.id(value) if name in columns else value
+            for name, value in row.items()
+        }
@@ -1,8 +1,97 @@
+import atexit
 import logging
+import queue
+import reprlib
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from threading import Lock
 
-from dotenv import dotenv_values
+from settings import get_setting
+
+LOGS_DIR = Path(__file__).resolve().parent.parent / "logs"
+FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps the first `first` debug and info records of each message, then one in `rate`.
+
+    Records are grouped by their unformatted message, so messages must be logged with
+    %-style arguments rather than f-strings. Warnings and errors are always kept.
+    """
+
+    def __init__(self, first: int, rate: int) -> None:
+        super().__init__()
+        self.first = first
+        self.rate = max(1, rate)
+        self.counts = {}
+        self.lock = Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.rate == 1:
+            return True
+        with self.lock:
+            count = self.counts[record.msg] = self.counts.get(record.msg, 0) + 1
+        return count <= self.first or (count - self.first) % self.rate == 0
+
+    def dropped(self) -> dict[str, tuple[int, int]]:
+        """The number of dropped and seen records of every message that was sampled."""
+        dropped = {}
+        with self.lock:
+            for msg, count in self.counts.items():
+                kept = min(count, self.first) + max(0, count - self.first) // self.rate
+                if kept < count:
+                    dropped[msg] = (count - kept, count)
+        return dropped
+
+
+class CappedFormatter(logging.Formatter):
+    """Formats the arguments of a record capped at `max_length` characters each, with
+    newlines removed so a value can't forge log lines.
+
+    Containers are only read up to the cap, so logging a whole response stays cheap.
+    """
+
+    def __init__(self, fmt: str, max_length: int) -> None:
+        super().__init__(fmt)
+        self.max_length = max_length
+        self.repr = reprlib.Repr()
+        self.repr.maxlevel = 4
+        self.repr.maxdict = self.repr.maxlist = self.repr.maxtuple = 50
+        self.repr.maxset = self.repr.maxfrozenset = self.repr.maxdeque = 50
+        self.repr.maxstring = self.repr.maxother = self.repr.maxlong = max_length
+
+    def cap(self, value):
+        if value is None or isinstance(value, (bool, int, float)):
+            return value
+        if isinstance(value, (dict, list, tuple, set)):
+            text = self.repr.repr(value)
+        else:
+            text = str(value)
+        text = text.replace("\r", "").replace("\n", "")
+        if len(text) > self.max_length:
+            text = text[: self.max_length] + "...(truncated)"
+        return text
+
+    def format(self, record: logging.LogRecord) -> str:
+        if isinstance(record.args, dict) and "%(" in str(record.msg):
+            record.args = {key: self.cap(value) for key, value in record.args.items()}
+        elif isinstance(record.args, dict):
+            # A single dictionary argument is kept as the record's arguments
+            record.args = (self.cap(record.args),)
+        elif record.args:
+            record.args = tuple(self.cap(value) for value in record.args)
+        return super().format(record)
+
+
+class LazyQueueHandler(QueueHandler):
+    """Puts records on the queue unformatted, so the listener's thread formats them.
+
+    Values logged must not be changed afterwards, as they are formatted later.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
 
 def setup_logger() -> logging.Logger:
@@ -10,18 +99,21 @@ def setup_logger() -> logging.Logger:
     Sets up a logger that writes logs to a file in the form {timestamp}.log
     The level of logging that is written to the file depends on the environment
     variable "DEFAULT_LOGGING_LEVEL".
+
+    With LOG_QUEUE enabled, records are written to the file by a background thread
+    instead of the thread logging them.
     Returns:
         logging.Logger = a customised logger object
     """
 
     # Initialise logger
     logger = logging.getLogger("courseAPICallLogger")
-    default_logging_level = dotenv_values().get("DEFAULT_LOGGING_LEVEL")
+    default_logging_level = get_setting("DEFAULT_LOGGING_LEVEL", "ERROR")
     logger.setLevel(default_logging_level)
 
     if not logger.hasHandlers():
         # Initialise log dir path
-        logs_dir = Path(__file__).resolve().parent.parent / "logs"
+        logs_dir = Path(get_setting("LOG_DIR", LOGS_DIR))
         logs_dir.mkdir(parents=True, exist_ok=True)
 
         # Each error log sent into separate file
@@ -36,12 +128,53 @@ def setup_logger() -> logging.Logger:
         # Set level of file handler
         log_file_handler.setLevel(default_logging_level)
 
-        # Setup file formatter
-        file_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
+        # Setup file formatter, capping the logged values
+        file_formatter = CappedFormatter(
+            FORMAT, int(get_setting("LOG_MAX_VALUE_LENGTH", "2000"))
+        )
         log_file_handler.setFormatter(file_formatter)
 
+        # Debug and info records repeated many times are sampled
+        sampling = SamplingFilter(
+            int(get_setting("LOG_SAMPLE_FIRST", "100")),
+            int(get_setting("LOG_SAMPLE_RATE", "100")),
+        )
+
+        if get_setting("LOG_QUEUE", "true").lower() == "true":
+            log_queue = queue.SimpleQueue()
+            handler = LazyQueueHandler(log_queue)
+            listener = QueueListener(
+                log_queue, log_file_handler, respect_handler_level=True
+            )
+            listener.start()
+        else:
+            handler = log_file_handler
+            listener = None
+        handler.addFilter(sampling)
+
+        def close() -> None:
+            # Write the queued records, then how many records were sampled out
+            if listener is not None:
+                listener.stop()
+            if not logger.isEnabledFor(logging.INFO):
+                return
+            for msg, (dropped, count) in sampling.dropped().items():
+                log_file_handler.handle(
+                    logger.makeRecord(
+                        logger.name,
+                        logging.INFO,
+                        __file__,
+                        0,
+                        "Sampled out %d of %d records of %r",
+                        (dropped, count, msg),
+                        None,
+                    )
+                )
+
+        atexit.register(close)
+
         # Add handler to logger
-        logger.addHandler(log_file_handler)
+        logger.addHandler(handler)
 
     return logger
 
@@ -0,0 +1,379 @@
+import json
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from pathlib import Path
+from threading import Lock, Thread
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+SIZE_BUCKETS = (100, 1000, 5000, 10000, 50000, 100000, 500000, 1000000)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    return (
+        "{"
+        + ",".join(f'{name}="{escape_label(value)}"' for name, value in labels)
+        + "}"
+    )
+
+
+class Metric:
+    """A metric family with one value per set of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labels: tuple = ()) -> None:
+        self.name = name
+        self.description = description
+        self.label_names = labels
+        self.lock = Lock()
+
+    def key(self, labels: dict) -> tuple:
+        return tuple((name, labels.get(name, "")) for name in self.label_names)
+
+    def header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: tuple = ()) -> None:
+        super().__init__(name, description, labels)
+        self.values = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(self.key(labels), 0)
+
+    def samples(self, labels: tuple = ()) -> list[str]:
+        with self.lock:
+            values = sorted(self.values.items())
+        return [
+            f"{self.name}{format_labels((*key, *labels))} {value}"
+            for key, value in values
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self.lock:
+            self.values[self.key(labels)] = value
+
+    def remove(self, **labels) -> None:
+        with self.lock:
+            self.values.pop(self.key(labels), None)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, description: str, labels: tuple = (), buckets: tuple = ()
+    ) -> None:
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        self.values = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self.key(labels)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            counts, total = self.values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[index] += 1
+            self.values[key] = (counts, total + value)
+
+    def samples(self, labels: tuple = ()) -> list[str]:
+        with self.lock:
+            values = sorted((key, (list(c), s)) for key, (c, s) in self.values.items())
+        lines = []
+        for key, (counts, total) in values:
+            sample_labels = (*key, *labels)
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts, strict=True):
+                cumulative += count
+                bucket_labels = format_labels((*sample_labels, ("le", bound)))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(sample_labels)} {total}")
+            lines.append(
+                f"{self.name}_count{format_labels(sample_labels)} {cumulative}"
+            )
+        return lines
+
+
+class Registry:
+    """Holds the metrics of the app and renders them in the Prometheus text format.
+
+    Collectors registered with `add_collector` are called before the metrics are read,
+    to update gauges such as the number of open databases.
+    """
+
+    def __init__(self) -> None:
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect) -> None:
+        self.collectors.append(collect)
+
+    def samples(self, labels: tuple = ()) -> dict[str, list[str]]:
+        """The sample lines of every metric, keyed by metric name."""
+        for collect in self.collectors:
+            collect()
+        return {metric.name: metric.samples(labels) for metric in self.metrics}
+
+    def render(self, processes: list[dict[str, list[str]]] = None) -> str:
+        """Render the metrics of this process, or the `samples` of several processes."""
+        processes = processes if processes is not None else [self.samples()]
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.header())
+            for samples in processes:
+                lines.extend(samples.get(metric.name, []))
+        return "\n".join(lines) + "\n"
+
+
+class WorkerMetrics:
+    """Metrics of every worker process of the server, exchanged through a directory.
+
+    Each worker writes its samples, labelled with its process id as `worker`, to
+    `{directory}/{pid}.json` every `interval` seconds, so whichever worker serves
+    /metrics renders the metrics of all of them. Files not written for three intervals
+    belong to workers that have exited and are removed.
+    """
+
+    def __init__(self, registry: Registry, directory: str, interval: float = 5) -> None:
+        self.registry = registry
+        self.directory = Path(directory)
+        self.interval = interval
+        self.thread = None
+
+    def start(self) -> None:
+        """Write this worker's samples now and then every interval in the background."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.write()
+        if self.thread is None:
+            self.thread = Thread(target=self.run, daemon=True)
+            self.thread.start()
+
+    def run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.write()
+            except OSError as e:
+                print(f"[METRICS] Failed to write the worker metrics: {e}")
+
+    def write(self) -> dict[str, list[str]]:
+        samples = self.registry.samples((("worker", os.getpid()),))
+        path = self.directory / f"{os.getpid()}.json"
+        temporary_path = path.with_suffix(".tmp")
+        temporary_path.write_text(json.dumps(samples))
+        os.replace(temporary_path, path)
+        return samples
+
+    def render(self) -> str:
+        processes = [self.write()]
+        for path in sorted(self.directory.glob("*.json")):
+            if path.stem == str(os.getpid()):
+                continue
+            try:
+                if time.time() - path.stat().st_mtime > 3 * self.interval:
+                    path.unlink()
+                    continue
+                processes.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                continue  # Removed or replaced while being read
+        return self.registry.render(processes)
+
+
+class SlowRequests:
+    """The slowest requests seen for each resource (e.g. course), keeping only the top few."""
+
+    def __init__(self, gauge: Gauge, limit: int = 20) -> None:
+        self.gauge = gauge
+        self.limit = limit
+        self.slowest = {}
+        self.lock = Lock()
+
+    def observe(self, route: str, resource: str, seconds: float) -> None:
+        with self.lock:
+            key = (route, resource)
+            if seconds <= self.slowest.get(key, 0):
+                return
+            self.slowest[key] = seconds
+            self.gauge.set(seconds, route=route, resource=resource)
+            if len(self.slowest) > self.limit:
+                fastest = min(self.slowest, key=self.slowest.get)
+                del self.slowest[fastest]
+                self.gauge.remove(route=fastest[0], resource=fastest[1])
+
+
+registry = Registry()
+request_latency = registry.register(
+    Histogram(
+        "courses_api_request_duration_seconds",
+        "Time taken to serve a request.",
+        ("method", "route", "status"),
+        LATENCY_BUCKETS,
+    )
+)
+requests_in_flight = registry.register(
+    Gauge("courses_api_requests_in_flight", "Requests currently being served.")
+)
+response_size = registry.register(
+    Histogram(
+        "courses_api_response_size_bytes",
+        "Size of response bodies.",
+        ("route",),
+        SIZE_BUCKETS,
+    )
+)
+request_statements = registry.register(
+    Histogram(
+        "courses_api_request_sql_statements",
+        "SQL statements executed per request.",
+        ("route",),
+        STATEMENT_BUCKETS,
+    )
+)
+request_sql_time = registry.register(
+    Histogram(
+        "courses_api_request_sql_duration_seconds",
+        "Time spent executing SQL per request.",
+        ("route",),
+        LATENCY_BUCKETS,
+    )
+)
+cache_requests = registry.register(
+    Counter(
+        "courses_api_cache_requests_total",
+        "Cache lookups by cache and result (hit or miss).",
+        ("cache", "result"),
+    )
+)
+cache_hit_ratio = registry.register(
+    Gauge(
+        "courses_api_cache_hit_ratio",
+        "Share of cache lookups that were hits.",
+        ("cache",),
+    )
+)
+slow_requests = SlowRequests(
+    registry.register(
+        Gauge(
+            "courses_api_slowest_request_seconds",
+            "Slowest requests seen per resource, for the slowest resources only.",
+            ("route", "resource"),
+        )
+    )
+)
+
+# SQL statements and time of the request being served
+current_request_sql = ContextVar("current_request_sql", default=None)
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """Count a cache lookup and update the cache's hit ratio."""
+    cache_requests.inc(cache=cache, result="hit" if hit else "miss")
+    hits = cache_requests.get(cache=cache, result="hit")
+    misses = cache_requests.get(cache=cache, result="miss")
+    cache_hit_ratio.set(hits / (hits + misses), cache=cache)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    request_sql = current_request_sql.get()
+    if request_sql is not None:
+        request_sql[0] += 1
+        request_sql[1] += elapsed
+
+
+def instrument_sqlalchemy() -> None:
+    """Time the SQL statements of every engine and add them to the current request."""
+    if not event.contains(Engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording the latency, size and SQL use of each request.
+
+    Requests are labelled by route template (e.g. /courses/{course_cid}) so the number
+    of series stays bounded. The slowest few course ids are tracked separately.
+    """
+
+    def __init__(self, app, exclude: tuple = ("/metrics",)) -> None:
+        self.app = app
+        self.exclude = exclude
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+        body_size = [0]
+        request_sql = [0, 0.0]
+        token = current_request_sql.set(request_sql)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            elif message["type"] == "http.response.body":
+                body_size[0] += len(message.get("body", b""))
+            await send(message)
+
+        requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_sql.reset(token)
+            requests_in_flight.dec()
+            elapsed = time.perf_counter() - start
+
+            # The router stores the matched route in the scope
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            request_latency.observe(
+                elapsed, method=scope["method"], route=route_path, status=status[0]
+            )
+            response_size.observe(body_size[0], route=route_path)
+            request_statements.observe(request_sql[0], route=route_path)
+            request_sql_time.observe(request_sql[1], route=route_path)
+
+            course_cid = scope.get("path_params", {}).get("course_cid")
+            if course_cid is not None:
+                slow_requests.observe(route_path, course_cid, elapsed)
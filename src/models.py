@@ -3,6 +3,7 @@ from sqlalchemy import (
     Column,
     ForeignKey,
     Integer,
+    LargeBinary,
     String,
 )
 from sqlalchemy.ext.declarative import declarative_base
@@ -11,6 +12,18 @@ from sqlalchemy.orm import relationship
 Base = declarative_base()
 
 
+class InternedString(Base):
+    __tablename__ = "interned_strings"
+    id = Column(Integer, primary_key=True)
+    value = Column(String, unique=True, nullable=False)
+
+
+class TextDictionary(Base):
+    __tablename__ = "text_dictionary"
+    id = Column(Integer, primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+
+
 class Subject(Base):
     __tablename__ = "subjects"
     id = Column(String, primary_key=True)
@@ -18,17 +31,33 @@ class Subject(Base):
     courses = relationship("Course", backref="subject_ref")
 
 
+class CourseSubject(Base):
+    __tablename__ = "course_subjects"
+    id = Column(String, primary_key=True)
+    course_id = Column(String, ForeignKey("courses.id"), nullable=False, index=True)
+    subject = Column(String, ForeignKey("subjects.name"), nullable=False, index=True)
+
+
+class SubjectTerm(Base):
+    __tablename__ = "subject_terms"
+    id = Column(String, primary_key=True)
+    year = Column(String, nullable=False)
+    term = Column(String, nullable=False)
+    subject = Column(String, ForeignKey("subjects.name"), nullable=False)
+    course_count = Column(Integer, nullable=False)
+
+
 class Course(Base):
     __tablename__ = "courses"
     id = Column(String, primary_key=True)
     course_id = Column(Integer, unique=True, nullable=False)
     year = Column(String, nullable=False)
-    terms = Column(String, nullable=False)
+    terms = Column(Integer, ForeignKey("interned_strings.id"), nullable=False)
     subject = Column(String, ForeignKey("subjects.name"), nullable=False)
     course_code = Column(String, nullable=False)
     title = Column(String, nullable=False)
-    campus = Column(String, nullable=False)
-    level_of_study = Column(String, nullable=True)
+    campus = Column(Integer, ForeignKey("interned_strings.id"), nullable=False)
+    level_of_study = Column(Integer, ForeignKey("interned_strings.id"), nullable=True)
     units = Column(Integer, nullable=False)
     course_coordinator = Column(String, nullable=True)
     course_level = Column(String, nullable=False)
@@ -55,7 +84,7 @@ class Course(Base):
 class LearningOutcome(Base):
     __tablename__ = "learning_outcomes"
     id = Column(String, primary_key=True)
-    course_id = Column(String, ForeignKey("courses.id"), nullable=False)
+    course_id = Column(String, ForeignKey("courses.id"), nullable=False, index=True)
     description = Column(String, nullable=False)
     outcome_index = Column(Integer, nullable=False)
 
@@ -63,7 +92,7 @@ class LearningOutcome(Base):
 class Assessment(Base):
     __tablename__ = "assessments"
     id = Column(String, primary_key=True)
-    course_id = Column(String, ForeignKey("courses.id"), nullable=False)
+    course_id = Column(String, ForeignKey("courses.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     weighting = Column(String, nullable=True)
     hurdle = Column(String, nullable=True)
@@ -77,10 +106,12 @@ class Meetings(Base):
     days = Column(String, nullable=False)
     start_time = Column(String, nullable=False)
     end_time = Column(String, nullable=False)
-    campus = Column(String, nullable=False)
-    location = Column(String, nullable=False)
-    instructor = Column(String, nullable=True)
-    course_class_id = Column(String, ForeignKey("course_classes.id"), nullable=False)
+    campus = Column(Integer, ForeignKey("interned_strings.id"), nullable=False)
+    location = Column(Integer, ForeignKey("interned_strings.id"), nullable=False)
+    instructor = Column(Integer, ForeignKey("interned_strings.id"), nullable=True)
+    course_class_id = Column(
+        String, ForeignKey("course_classes.id"), nullable=False, index=True
+    )
 
 
 class CourseClass(Base):
@@ -90,7 +121,60 @@ class CourseClass(Base):
     section = Column(String, nullable=False)
     size = Column(Integer, nullable=False)
     available = Column(Integer, nullable=False)
-    component = Column(String, nullable=False)
+    component = Column(Integer, ForeignKey("interned_strings.id"), nullable=False)
     group = Column(String, nullable=True)
     meetings = relationship("Meetings", backref="course_class")
+    course_id = Column(String, ForeignKey("courses.id"), nullable=False, index=True)
+
+
+class Requisite(Base):
+    __tablename__ = "requisites"
+    id = Column(String, primary_key=True)
+    year = Column(String, nullable=False)
+    course_code = Column(String, nullable=False, index=True)
+    course_id = Column(String, ForeignKey("courses.id"), nullable=False)
+    kind = Column(String, nullable=False)
+    group_index = Column(Integer, nullable=False)
+    requires_all = Column(Boolean, nullable=False)
+    requisite_code = Column(String, nullable=False, index=True)
+    requisite_id = Column(String, ForeignKey("courses.id"), nullable=True)
+
+
+class PrerequisiteClosure(Base):
+    __tablename__ = "prerequisite_closure"
+    id = Column(String, primary_key=True)
+    year = Column(String, nullable=False)
+    course_code = Column(String, nullable=False, index=True)
     course_id = Column(String, ForeignKey("courses.id"), nullable=False)
+    prerequisite_code = Column(String, nullable=False, index=True)
+    prerequisite_id = Column(String, ForeignKey("courses.id"), nullable=True)
+    depth = Column(Integer, nullable=False)
+
+
+class DatasetVersion(Base):
+    __tablename__ = "dataset_versions"
+    version = Column(Integer, primary_key=True)
+    created_at = Column(String, nullable=False)
+    previous_version = Column(Integer, nullable=True)
+
+
+class Change(Base):
+    __tablename__ = "changes"
+    id = Column(String, primary_key=True)
+    version = Column(
+        Integer, ForeignKey("dataset_versions.version"), nullable=False, index=True
+    )
+    entity = Column(String, nullable=False)
+    entity_id = Column(String, nullable=False)
+    operation = Column(String, nullable=False)
+    data = Column(String, nullable=True)
+
+
+class ScrapeProgress(Base):
+    __tablename__ = "scrape_progress"
+    id = Column(String, primary_key=True)
+    kind = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    status = Column(String, nullable=False, index=True)
+    error = Column(String, nullable=True)
+    updated_at = Column(String, nullable=False)
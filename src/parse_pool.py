@@ -0,0 +1,39 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+class ParsePool:
+    """Parses pages in worker processes, so parsing uses every core and doesn't hold the
+    GIL the fetching threads need.
+
+    Until `start` is called (or with 0 processes), pages are parsed in the calling thread.
+    """
+
+    def __init__(self) -> None:
+        self.executor = None
+
+    def start(self, processes: int) -> None:
+        if self.executor is not None or processes <= 0:
+            return
+        # Spawned workers don't inherit the locks held by the scraper's threads
+        self.executor = ProcessPoolExecutor(
+            max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def run(self, parse, *args):
+        """Run `parse(*args)` in a worker process and wait for its result.
+
+        `parse` must be a module-level function returning plain data (dicts, lists and
+        strings) so that it can be sent between processes.
+        """
+        if self.executor is None:
+            return parse(*args)
+        return self.executor.submit(parse, *args).result()
+
+    def stop(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+
+parse_pool = ParsePool()
@@ -0,0 +1,169 @@
+import json
+import os
+import random
+import time
+from threading import Lock
+
+# Weight of the latest request in the moving average of a proxy's latency
+LATENCY_SMOOTHING = 0.3
+# Latency assumed for proxies without any requests yet
+DEFAULT_LATENCY = 2.0
+# Failures in the recent window decay by half every this many seconds
+FAILURE_HALF_LIFE = 120
+
+
+class ProxyStats:
+    """Health of a single proxy."""
+
+    def __init__(self, data: dict = None) -> None:
+        data = data or {}
+        self.successes = data.get("successes", 0)
+        self.failures = data.get("failures", 0)
+        self.latency = data.get("latency", DEFAULT_LATENCY)
+        self.recent_failures = data.get("recent_failures", 0.0)
+        self.consecutive_failures = data.get("consecutive_failures", 0)
+        self.cooldown_until = 0.0
+        self.updated = time.monotonic()
+
+    def decay(self, now: float) -> None:
+        """Let recent failures fade so that proxies recover from bad spells."""
+        self.recent_failures *= 0.5 ** ((now - self.updated) / FAILURE_HALF_LIFE)
+        self.updated = now
+
+    def score(self) -> float:
+        """Higher for proxies that succeed often, respond quickly and failed least recently."""
+        success_rate = (self.successes + 1) / (self.successes + self.failures + 2)
+        return success_rate / (max(self.latency, 0.05) * (1 + self.recent_failures))
+
+    def to_dict(self) -> dict:
+        return {
+            "successes": self.successes,
+            "failures": self.failures,
+            "latency": round(self.latency, 4),
+            "recent_failures": round(self.recent_failures, 4),
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+class ProxyPool:
+    """Picks proxies by a weighted health score and cools failed proxies down instead of dropping them.
+
+    A failed proxy is skipped for `base_cooldown` seconds, doubling with every consecutive
+    failure up to `max_cooldown`. Proxies that fail `max_failures` times in a row are
+    removed. Scores can be saved to and loaded from a JSON file between runs.
+    """
+
+    def __init__(
+        self,
+        proxies: list[str],
+        state_file: str = None,
+        base_cooldown: float = 30,
+        max_cooldown: float = 600,
+        max_failures: int = 8,
+    ) -> None:
+        self.state_file = state_file
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.max_failures = max_failures
+        self.lock = Lock()
+        self.random = random.Random()
+
+        # Saved scores are kept for proxies added later on
+        self.saved = self.load_state()
+        self.stats = {proxy: ProxyStats(self.saved.get(proxy)) for proxy in proxies}
+
+    def __len__(self) -> int:
+        return len(self.stats)
+
+    def load_state(self) -> dict:
+        if not self.state_file or not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def save(self) -> None:
+        """Save the proxy scores so the next run starts from them."""
+        if not self.state_file:
+            return
+        with self.lock:
+            state = {proxy: stats.to_dict() for proxy, stats in self.stats.items()}
+        with open(self.state_file, "w") as file:
+            json.dump(state, file)
+
+    def add(self, proxy: str, latency: float = None) -> None:
+        """Add a proxy, starting from its measured latency if it has no saved score."""
+        with self.lock:
+            if proxy in self.stats:
+                return
+            saved = self.saved.get(proxy)
+            stats = ProxyStats(saved)
+            if latency is not None and saved is None:
+                stats.latency = latency
+            self.stats[proxy] = stats
+
+    def choose(self) -> str:
+        """Pick a proxy, weighted by score, from those not cooling down.
+
+        If every proxy is cooling down, the one that recovers first is used. Returns None
+        if the pool is empty.
+        """
+        now = time.monotonic()
+        with self.lock:
+            if not self.stats:
+                return None
+            available = []
+            weights = []
+            for proxy, stats in self.stats.items():
+                if stats.cooldown_until <= now:
+                    stats.decay(now)
+                    available.append(proxy)
+                    weights.append(stats.score())
+            if not available:
+                return min(self.stats, key=lambda p: self.stats[p].cooldown_until)
+            return self.random.choices(available, weights=weights)[0]
+
+    def record_success(self, proxy: str, latency: float) -> None:
+        with self.lock:
+            stats = self.stats.get(proxy)
+            if stats is None:
+                return
+            stats.successes += 1
+            stats.consecutive_failures = 0
+            stats.cooldown_until = 0.0
+            stats.latency += LATENCY_SMOOTHING * (latency - stats.latency)
+
+    def record_failure(self, proxy: str, latency: float = None) -> bool:
+        """Put a proxy on cooldown after a failure.
+
+        Returns:
+            bool: True if the proxy failed too often in a row and was removed.
+        """
+        now = time.monotonic()
+        with self.lock:
+            stats = self.stats.get(proxy)
+            if stats is None:
+                return False
+            stats.decay(now)
+            stats.failures += 1
+            stats.recent_failures += 1
+            stats.consecutive_failures += 1
+            if latency is not None:
+                stats.latency += LATENCY_SMOOTHING * (latency - stats.latency)
+
+            if stats.consecutive_failures >= self.max_failures:
+                del self.stats[proxy]
+                return True
+            cooldown = self.base_cooldown * 2 ** (stats.consecutive_failures - 1)
+            stats.cooldown_until = now + min(cooldown, self.max_cooldown)
+            return False
+
+    def available(self) -> int:
+        """Number of proxies not cooling down."""
+        now = time.monotonic()
+        with self.lock:
+            return sum(
+                1 for stats in self.stats.values() if stats.cooldown_until <= now
+            )
@@ -0,0 +1,139 @@
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from urllib.parse import urlsplit
+
+
+def parse_retry_after(value: str) -> float:
+    """Seconds to wait from a Retry-After header, given in seconds or as an HTTP date.
+
+    Returns None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class HostBucket:
+    """Token bucket of a single host, with a rate adapted by AIMD."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.last_decrease = 0.0
+        self.lock = Lock()
+
+    def refill(self, now: float) -> None:
+        # Nothing is refilled until a pause set by Retry-After is over
+        if now > self.updated:
+            self.tokens = min(
+                self.burst, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+
+
+class RateLimiter:
+    """Per-host token-bucket rate limiter shared by all scraper threads.
+
+    Every request takes a token from its host's bucket, waiting if there is none. Each
+    host's rate grows additively with successful requests (by about `increase` requests
+    per second, every second) and is cut by `decrease` on a 429, at most once per
+    `decrease_interval` so a burst of 429s only counts once. A `Retry-After` pauses every
+    request to the host, not just the one that got it.
+    """
+
+    def __init__(
+        self,
+        initial_rate: float = 10,
+        min_rate: float = 0.5,
+        max_rate: float = 50,
+        burst: float = 10,
+        increase: float = 0.5,
+        decrease: float = 0.5,
+        decrease_interval: float = 1,
+        on_rate_change=None,
+    ) -> None:
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.decrease_interval = decrease_interval
+        self.on_rate_change = on_rate_change
+        self.buckets = {}
+        self.lock = Lock()
+
+    def bucket(self, url: str) -> tuple[str, HostBucket]:
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = HostBucket(self.initial_rate, self.burst)
+            return host, self.buckets[host]
+
+    def acquire(self, url: str) -> float:
+        """Wait for a token to request the url's host.
+
+        Returns:
+            float: The time waited in seconds.
+        """
+        _, bucket = self.bucket(url)
+        with bucket.lock:
+            now = time.monotonic()
+            bucket.refill(now)
+            # Tokens can go negative, reserving the next free slots in order, spaced
+            # 1/rate apart from the end of any pause
+            bucket.tokens -= 1
+            wait = max(0, bucket.blocked_until - now) + max(
+                0, -bucket.tokens / bucket.rate
+            )
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def record_success(self, url: str) -> None:
+        host, bucket = self.bucket(url)
+        with bucket.lock:
+            # Each success adds increase/rate, about `increase` per second at full rate
+            rate = min(self.max_rate, bucket.rate + self.increase / bucket.rate)
+            bucket.rate = rate
+        if self.on_rate_change:
+            self.on_rate_change(host, rate)
+
+    def record_rate_limited(self, url: str, retry_after: float = None) -> None:
+        """Slow a host down after a 429, pausing it for `retry_after` seconds if given."""
+        host, bucket = self.bucket(url)
+        with bucket.lock:
+            now = time.monotonic()
+            if retry_after and now + retry_after > bucket.blocked_until:
+                # Requests resume one at a time once the pause is over
+                bucket.blocked_until = now + retry_after
+                bucket.tokens = 0
+                bucket.updated = bucket.blocked_until
+            if now - bucket.last_decrease >= self.decrease_interval:
+                bucket.refill(now)
+                bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+                bucket.tokens = min(bucket.tokens, 0)
+                bucket.last_decrease = now
+            rate = bucket.rate
+        if self.on_rate_change:
+            self.on_rate_change(host, rate)
+
+    def rates(self) -> dict[str, float]:
+        """Current request rate of every host."""
+        with self.lock:
+            return {host: bucket.rate for host, bucket in self.buckets.items()}
@@ -0,0 +1,97 @@
+import re
+from collections import deque
+
+# Subject codes followed by a course number, e.g. "COMP SCI 1103" or "COMP1103". The
+# uppercase connectors in "MATHS 1011 OR COMP SCI 1103" aren't part of a subject
+REQUISITE_PATTERN = re.compile(
+    r"\b(?!(?:OR|AND)\b)([A-Z]{2,}(?:\s+(?!(?:OR|AND)\b)[A-Z]+)*)\s*(\d{4}\w*)\b"
+)
+REQUISITE_KINDS = ("prerequisites", "corequisites", "antirequisites")
+
+
+def normalise_code(course_code: str) -> str:
+    """Normalise a course code so that "COMP SCI 1103" and "COMPSCI1103" match."""
+    return re.sub(r"\s+", "", str(course_code or "")).upper()
+
+
+def parse_requisite_codes(raw_requisites: str) -> list[str]:
+    """Parse the course codes named in a requisites string, as they are written.
+
+    Examples:
+        "COMP SCI 1103 OR MATHS 1011" -> ["COMP SCI 1103", "MATHS 1011"]
+    Args:
+        raw_requisites (str): The raw requisites text
+    Returns:
+        list[str]: The course codes, or None if there are none
+    """
+    if not raw_requisites:
+        return None
+    codes = [
+        f"{subject} {number}"
+        for subject, number in REQUISITE_PATTERN.findall(raw_requisites)
+    ]
+    return codes or None
+
+
+def parse_requisite_groups(raw_requisites: str) -> list[tuple[bool, list[str]]]:
+    """Parse a requisites string into groups of normalised course codes.
+
+    Clauses are split on "and" and ";". A clause containing "or" is satisfied by any
+    of its courses, otherwise every course in it is required.
+    Examples:
+        "COMP SCI 1103 and MATHS 1011 or MATHS 1012"
+            -> [(True, ["COMPSCI1103"]), (False, ["MATHS1011", "MATHS1012"])]
+        "MATHS 1011 OR COMP SCI 1103" -> [(False, ["MATHS1011", "COMPSCI1103"])]
+    Args:
+        raw_requisites (str): The raw requisites text
+    Returns:
+        list[tuple[bool, list[str]]]: A (requires_all, codes) tuple for each clause
+    """
+    if not raw_requisites:
+        return []
+
+    groups = []
+    for clause in re.split(r"\s+and\s+|;", raw_requisites, flags=re.IGNORECASE):
+        codes = []
+        for subject, number in REQUISITE_PATTERN.findall(clause):
+            code = normalise_code(subject + number)
+            if code not in codes:
+                codes.append(code)
+        if codes:
+            requires_all = not re.search(r"\bor\b", clause, flags=re.IGNORECASE)
+            groups.append((requires_all, codes))
+    return groups
+
+
+def requisite_closure(edges: dict[str, set[str]]) -> dict[str, dict[str, int]]:
+    """Compute every course reachable through the requisite edges.
+    Args:
+        edges (dict[str, set[str]]): The direct requisites of each course code
+    Returns:
+        dict[str, dict[str, int]]: The reachable course codes of each course, mapped
+        to the shortest number of steps needed to reach them
+    """
+    closure = {}
+    for course_code, requisites in edges.items():
+        depths = {}
+        queue = deque((code, 1) for code in requisites)
+        while queue:
+            code, depth = queue.popleft()
+            if code in depths or code == course_code:
+                continue
+            depths[code] = depth
+            queue.extend((next_code, depth + 1) for next_code in edges.get(code, ()))
+        closure[course_code] = depths
+    return closure
+
+
+def check_eligibility(
+    groups: list[tuple[bool, list[str]]], completed: set[str]
+) -> list[list[str]]:
+    """Return the requisite groups not satisfied by the completed course codes."""
+    missing = []
+    for requires_all, codes in groups:
+        done = [code in completed for code in codes]
+        if not (all(done) if requires_all else any(done)):
+            missing.append(codes)
+    return missing
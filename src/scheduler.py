@@ -0,0 +1,95 @@
+from itertools import count
+from queue import PriorityQueue
+from threading import Condition, Thread
+
+# Retried tasks run after all fresh work, so one slow or failing task doesn't hold others up
+RETRY_PRIORITY = (float("inf"),)
+
+
+class Task:
+    def __init__(self, fn, args: tuple, priority: tuple, on_done) -> None:
+        self.fn = fn
+        self.args = args
+        self.priority = priority
+        self.on_done = on_done
+        self.attempts = 0
+
+
+class Scheduler:
+    """Runs tasks from a single priority queue on a fixed pool of worker threads.
+
+    Tasks with the lowest `priority` run first, and tasks may submit more tasks. A task
+    fails if it returns False or raises, and is retried after all other queued work up
+    to `max_attempts` times. `on_done(result)` is called with the task's final result.
+    """
+
+    def __init__(self, workers: int = 100, max_attempts: int = 2) -> None:
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.queue = PriorityQueue()
+        self.sequence = count()
+        self.pending = 0
+        self.idle = Condition()
+        self.threads = []
+
+    def submit(self, fn, *args, priority: tuple = (0,), on_done=None) -> None:
+        """Queue `fn(*args)`."""
+        with self.idle:
+            self.pending += 1
+        self.put(Task(fn, args, priority, on_done), priority)
+
+    def put(self, task: Task, priority: tuple) -> None:
+        # The sequence number keeps tasks of equal priority in submission order
+        self.queue.put((priority, next(self.sequence), task))
+
+    def queued(self) -> int:
+        return self.queue.qsize()
+
+    def run_task(self, task: Task) -> None:
+        task.attempts += 1
+        try:
+            result = task.fn(*task.args)
+        except Exception as e:
+            print(f"[SCHEDULER] {getattr(task.fn, '__name__', task.fn)} failed: {e}")
+            result = False
+
+        if result is False and task.attempts < self.max_attempts:
+            self.put(task, RETRY_PRIORITY)
+            return
+        try:
+            if task.on_done:
+                task.on_done(result)
+        except Exception as e:
+            # The worker thread keeps running the other tasks
+            print(
+                f"[SCHEDULER] on_done of {getattr(task.fn, '__name__', task.fn)} failed: {e}"
+            )
+        finally:
+            with self.idle:
+                self.pending -= 1
+                if self.pending == 0:
+                    self.idle.notify_all()
+
+    def worker(self) -> None:
+        while True:
+            _, _, task = self.queue.get()
+            if task is None:
+                break  # Stop signal
+            self.run_task(task)
+
+    def start(self) -> None:
+        for _ in range(self.workers):
+            thread = Thread(target=self.worker, daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def join(self) -> None:
+        """Wait for every task, including those submitted by other tasks, then stop the workers."""
+        with self.idle:
+            self.idle.wait_for(lambda: self.pending == 0)
+        for _ in self.threads:
+            # Stop signals sort after every task
+            self.put(None, (float("inf"), float("inf")))
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
@@ -1,57 +1,216 @@
+import argparse
 import os
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from datetime import datetime, timezone
 from hashlib import shake_256
 from queue import Queue
 from threading import Lock, Thread
 
-from curl_cffi import requests
-from dotenv import dotenv_values
 from rich.progress import Progress
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, insert, inspect, select
 from sqlalchemy.orm import sessionmaker
 
 import data_parser
 import fetch_proxies
+from changeset import build_changeset, changeset_rows, new_version
+from data_fetcher import DataFetcher
+from delta import DeltaError, delta_path, write_delta
+from inflight import InFlight
+from interning import StringInterner, load_strings, resolve
 from log import logger
 from models import (
     Assessment,
     Base,
+    Change,
     Course,
     CourseClass,
+    CourseSubject,
+    DatasetVersion,
+    InternedString,
     LearningOutcome,
     Meetings,
+    PrerequisiteClosure,
+    Requisite,
+    ScrapeProgress,
     Subject,
+    SubjectTerm,
 )
-from term_utils import get_term_code
+from parse_pool import parse_pool
+from rate_limiter import parse_retry_after
+from requisites import (
+    REQUISITE_KINDS,
+    normalise_code,
+    parse_requisite_groups,
+    requisite_closure,
+)
+from scheduler import Scheduler
+from settings import get_setting
+from shards import SHARD_DIR, parse_years, shard_path
+from snapshot import snapshot_path, write_snapshot
+from telemetry import REPORT_DIR, telemetry
+from term_utils import count_subjects_by_term, get_term_code
+from text_compression import compress_database, load_dictionary, row_decoder
 
 # Session and write queue for DB writer thread
 Session = sessionmaker()
 write_queue = Queue()
 
+# Course pages and scraped courses of the run, shared by every listing of a course
+course_pages = InFlight()
+scraped_courses = InFlight()
+
+
+def store_string(string_id, value):
+    write_queue.put(InternedString(id=string_id, value=value))
+
+
+# Repeated strings (terms, campuses, locations...) are stored once and referenced by id
+strings = StringInterner(on_new=store_string)
+
+COURSE_OUTLINE_URL = get_setting(
+    "COURSE_OUTLINE_URL", "https://apps.adelaide.edu.au/public/courseoutline"
+)
+
 
 def get_short_hash(content: str, even_length=12) -> str:
     """Generates a short hash from the given content using the shake_256 algorithm."""
     return shake_256(content.encode("utf8")).hexdigest(even_length // 2)
 
 
-def db_writer(engine):
-    """Dedicated DB writer thread to serialize all DB operations and prevent locking."""
-    while True:
+def write_batch(session, batch):
+    """Merge and commit a batch of objects, one at a time if the batch fails."""
+    try:
+        with telemetry.stage("db_write"):
+            for obj in batch:
+                session.merge(obj)
+            session.commit()
+    except Exception:
+        session.rollback()
+        for obj in batch:
+            try:
+                session.merge(obj)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                print(f"[DB ERROR] {e} on {obj}")
+    finally:
+        session.expunge_all()
+
+
+def db_writer(engine, batch_size=int(get_setting("WRITE_BATCH_SIZE", "500"))):
+    """Dedicated DB writer thread to serialize all DB operations and prevent locking.
+
+    Objects are committed in batches, whenever `batch_size` are waiting or the queue is
+    empty. Objects are written in the order they were queued, so a committed progress
+    checkpoint means everything queued before it is committed too.
+    """
+    session = Session(bind=engine)
+    batch = []
+    stopping = False
+    while not stopping:
         obj = write_queue.get()
         if obj is None:
-            break  # Stop signal
+            stopping = True  # Stop signal
+        else:
+            batch.append(obj)
+
+        telemetry.gauge("writer_queue_depth", write_queue.qsize())
+        if batch and (stopping or len(batch) >= batch_size or write_queue.empty()):
+            write_batch(session, batch)
+            batch = []
+    session.close()
+
+
+def checkpoint(kind, key, error=None):
+    """Queue a checkpoint of a subject or course, written once all its rows queued before it are."""
+    write_queue.put(
+        ScrapeProgress(
+            id=f"{kind}:{key}",
+            kind=kind,
+            key=key,
+            status="failed" if error else "done",
+            error=error,
+            updated_at=datetime.now(timezone.utc).isoformat(),
+        )
+    )
 
-        session = Session(bind=engine)
 
-        try:
-            session.merge(obj)
-            session.commit()
-        except Exception as e:
-            session.rollback()
-            print(f"[DB ERROR] {e} on {obj}")
-        finally:
-            session.close()
+def course_key(subject_name, course):
+    """Key of a course offering in the scrape checkpoints."""
+    return f"{subject_name}|{course.get('code')}|{join_str_if_iterable(course.get('terms'))}"
+
+
+def load_checkpoints(engine):
+    """Keys of the subjects and courses fully written by a previous run."""
+    session = Session(bind=engine)
+    try:
+        done = {"subject": set(), "course": set()}
+        for kind, key in session.query(ScrapeProgress.kind, ScrapeProgress.key).filter(
+            ScrapeProgress.status == "done"
+        ):
+            done[kind].add(key)
+        return done
+    finally:
+        session.close()
+
+
+def scrape_summary(engine, year):
+    """Print how many courses were written and which failed.
+
+    Returns:
+        list: The failed subjects and courses with their errors.
+    """
+    session = Session(bind=engine)
+    try:
+        rows = session.query(ScrapeProgress).all()
+        failures = [
+            {"kind": row.kind, "key": row.key, "error": row.error}
+            for row in rows
+            if row.status == "failed"
+        ]
+        written = sum(
+            1 for row in rows if row.kind == "course" and row.status == "done"
+        )
+    finally:
+        session.close()
+
+    print(f"[SUMMARY] {year}: {written} courses written, {len(failures)} failed.")
+    for failure in failures[:20]:
+        print(f"[SUMMARY]   {failure['kind']} {failure['key']}: {failure['error']}")
+    if len(failures) > 20:
+        print(f"[SUMMARY]   ...and {len(failures) - 20} more.")
+    if failures:
+        print("[SUMMARY] Run the scraper with --resume to retry them.")
+    return failures
+
+
+def fetch_outline(outline_url, max_attempts=3):
+    """Request a course outline through the shared rate limiter, retrying on 429."""
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/146.0.0.0 Safari/537.36"
+    }
+    for attempt in range(max_attempts):
+        telemetry.record_stage(
+            "rate_limit_wait", DataFetcher.rate_limiter.acquire(outline_url)
+        )
+        request_start = time.perf_counter()
+        resp = DataFetcher.session().get(outline_url, headers=headers, timeout=5)
+        telemetry.record_request(
+            outline_url,
+            resp.status_code,
+            time.perf_counter() - request_start,
+            **DataFetcher.connection_info(resp),
+        )
+        if resp.status_code != 429:
+            DataFetcher.rate_limiter.record_success(outline_url)
+            return resp
+        # Back off as DataFetcher does when the 429 has no Retry-After
+        retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+        if retry_after is None:
+            retry_after = min(60, 1.5**attempt)
+        DataFetcher.rate_limiter.record_rate_limited(outline_url, retry_after)
+    return resp
 
 
 def join_str_if_iterable(value):
@@ -63,30 +222,83 @@ def join_str_if_iterable(value):
     return str(value)
 
 
-def process_course(course, year, subject, engine, progress, subject_task, lock):
-    """Process a single course and insert data into the database."""
+class ScrapeError(Exception):
+    pass
+
+
+def process_course(course, year, subject, done=frozenset()):
+    """Process a single listing of a course and insert data into the database.
+
+    A course listed in several subjects is scraped once per run, the other listings
+    only add the course to their subject. Listings in `done` were written by a
+    previous run and are skipped.
+
+    Returns:
+        bool: False if the course failed and should be retried.
+    """
+    key = course_key(subject["subject"], course)
+    if not course.get("code"):
+        print(f"Skipping course with missing code: {course}")
+        return True
+    if key in done:
+        return True
+
+    # A cross-listed course belongs to the first by name of the study areas Funnelback
+    # gives for it, or without the year-wide listing, to whichever subject lists it
+    # first. Its id doesn't depend on the subject, so it's the same either way
+    primary_subject = min(course.get("subjects") or [subject["subject"]])
+    offering = f"{course['code']}|{join_str_if_iterable(course.get('terms'))}"
     try:
-        logger.debug(f"Processing course {course['code']}...")
+        course_cid = scraped_courses.get(
+            offering, scrape_course, course, year, primary_subject
+        )
+    except Exception as e:
+        print(f"Error processing course {course['code']}: {e}")
+        checkpoint("course", key, str(e))
+        return False
+
+    write_queue.put(
+        CourseSubject(
+            id=get_short_hash(f"{course_cid}{subject['subject']}"),
+            course_id=course_cid,
+            subject=subject["subject"],
+        )
+    )
+    # Queued after all of the course's rows, so it is only committed after them
+    checkpoint("course", key)
+    return True
+
+
+def scrape_course(course, year, name):
+    """Scrape a course into the database as part of subject `name`.
+
+    Returns:
+        str: The id of the course.
+
+    Raises:
+        ScrapeError: If the course could not be fetched or inserted.
+    """
+    try:
+        logger.debug("Processing course %s...", course["code"])
         course_code = course.get("code")
-        if not course_code:
-            print(f"Skipping course with missing code: {course}")
-            progress.update(subject_task, advance=1)
-            return
-        course_details = data_parser.get_course_details(course_code)
+        # Details and classes come from the same course page, fetched and parsed once
+        # per run, even if the course is offered in several terms
+        course_page = course_pages.get(
+            str(course_code), data_parser.get_course_page, course_code
+        )
+        course_details = course_page["details"] if course_page else None
         if not course_details:
             logger.error(
-                f"Failed to fetch course details for {course_code}. Skipping course."
+                "Failed to fetch course details for %s. Skipping course.", course_code
             )
-            progress.update(subject_task, advance=1)
-            return
+            raise ScrapeError("Failed to fetch course details")
 
-        name = subject["subject"]
         title = course_details.get("title", "")
         terms = course.get("terms")
         campus = course_details.get("campus")
 
-        # Course Custom ID
-        course_cid = get_short_hash(f"{name}{course_code}{title}{year}{terms}{campus}")
+        # Course Custom ID, the same whichever subject's listing scraped the course
+        course_cid = get_short_hash(f"{course_code}{title}{year}{terms}{campus}")
 
         # Encode course code to match URL format
         code_str = (
@@ -101,14 +313,14 @@ def process_course(course, year, subject, engine, progress, subject_task, lock):
                 id=course_cid,
                 course_id=course_details.get("course_id", 0),
                 year=year,
-                terms=join_str_if_iterable(terms),
+                terms=strings.id(join_str_if_iterable(terms)),
                 subject=name,
                 course_code=course_code[0]
                 if isinstance(course_code, (list, tuple))
                 else course_code,
                 title=title,
-                campus=join_str_if_iterable(campus),
-                level_of_study=course_details.get("level_of_study", "N/A"),
+                campus=strings.id(join_str_if_iterable(campus)),
+                level_of_study=strings.id(course_details.get("level_of_study", "N/A")),
                 units=int(course_details.get("unit_value", "6")),
                 course_coordinator=course_details.get("course_coordinator", "N/A"),
                 course_level=course_details.get("course_level", "N/A"),
@@ -141,34 +353,30 @@ def process_course(course, year, subject, engine, progress, subject_task, lock):
 
                 # Brute-force suffixes _1 to _6 to find the valid course outline
                 found_valid_outline = False
+                probe_start = time.perf_counter()
                 for suffix in range(1, 7):
                     course_instance_id = (
                         f"{year_short}{term_code}_{formatted_code}_{suffix}"
                     )
-                    outline_url = f"https://apps.adelaide.edu.au/public/courseoutline?courseInstanceId={course_instance_id}"
+                    outline_url = (
+                        f"{COURSE_OUTLINE_URL}?courseInstanceId={course_instance_id}"
+                    )
 
                     try:
-                        headers = {
-                            "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/146.0.0.0 Safari/537.36"
-                        }
-                        resp = requests.get(
-                            outline_url,
-                            headers=headers,
-                            timeout=5,
-                            impersonate="chrome146",
-                        )
+                        resp = fetch_outline(outline_url)
 
                         if resp.status_code == 200:
                             text = resp.text.lower()
                             if "course overview" in text or "subject area" in text:
                                 logger.debug(
-                                    f"Found valid course outline at {outline_url}"
+                                    "Found valid course outline at %s", outline_url
                                 )
                                 db_course.course_outline_url = outline_url
 
-                                parsed_outline = data_parser.parse_course_outline(
-                                    resp.text
-                                )
+                                with telemetry.stage("outline_parse"):
+                                    parsed_outline = parse_pool.run(
+                                        data_parser.parse_course_outline, resp.text
+                                    )
 
                                 if parsed_outline.get("aim"):
                                     db_course.course_overview = parsed_outline["aim"]
@@ -209,12 +417,16 @@ def process_course(course, year, subject, engine, progress, subject_task, lock):
                                 found_valid_outline = True
                                 break
                     except Exception as e:
-                        logger.debug(f"Failed check for {outline_url}: {e}")
+                        logger.debug("Failed check for %s: %s", outline_url, e)
                         pass
 
+                telemetry.record_stage(
+                    "outline_probe", time.perf_counter() - probe_start
+                )
                 if not found_valid_outline:
                     logger.debug(
-                        f"No valid course outline found for {course_code} (suffixes 1-6)"
+                        "No valid course outline found for %s (suffixes 1-6)",
+                        course_code,
                     )
 
             write_queue.put(db_course)
@@ -222,14 +434,10 @@ def process_course(course, year, subject, engine, progress, subject_task, lock):
             write_queue.put(db_course)
         except Exception as e:
             print(f"Error inserting course {course_code}: {e}")
-            progress.update(subject_task, advance=1)
-            return
+            raise ScrapeError(f"Error inserting course: {e}") from e
 
         if terms:
-            class_list = data_parser.get_course_class_list(course_code)
-            class_items = (
-                class_list.get("classes", []) if isinstance(class_list, dict) else []
-            )
+            class_items = course_page["classes"]
 
             for individual_class in class_items:
                 class_type = individual_class.get("component")
@@ -246,7 +454,7 @@ def process_course(course, year, subject, engine, progress, subject_task, lock):
                         section=section,
                         size=int(individual_class.get("size", 0)),
                         available=int(individual_class.get("available", 0)),
-                        component=class_type,
+                        component=strings.id(class_type),
                         group=group_name,
                         course_id=course_cid,
                     )
@@ -275,9 +483,9 @@ def process_course(course, year, subject, engine, progress, subject_task, lock):
                             days=meeting.get("days", ""),
                             start_time=start_time,
                             end_time=end_time,
-                            campus=meeting.get("campus", ""),
-                            location=meeting.get("location", ""),
-                            instructor=meeting.get("instructor"),
+                            campus=strings.id(meeting.get("campus", "")),
+                            location=strings.id(meeting.get("location", "")),
+                            instructor=strings.id(meeting.get("instructor")),
                             course_class_id=class_cid,
                         )
                         write_queue.put(db_meeting)
@@ -286,88 +494,384 @@ def process_course(course, year, subject, engine, progress, subject_task, lock):
                             f"Error inserting meeting for class {class_nbr} of course {course_code}: {e}"
                         )
 
-        progress.update(subject_task, advance=1)
+        return course_cid
 
+    except ScrapeError:
+        raise
     except Exception as e:
-        print(f"Error processing course {course['code']}: {e}")
+        raise ScrapeError(f"Error processing course: {e}") from e
 
 
-def process_subject(subject, year, engine, progress, all_task, lock):
-    """Process a single subject and insert data into the database."""
+def build_subject_terms(engine, year):
+    """Precompute the subject list and course counts for every term of the year."""
+    session = Session(bind=engine)
     try:
-        name = subject["subject"]
-        subject_task = progress.add_task(f"[cyan]{name}", total=None)
+        # Courses count towards their own subject and every other subject listing them
+        term_strings = load_strings(engine)
+        courses = {}
+        for course_id, course_year, terms, subject in session.query(
+            Course.id, Course.year, Course.terms, Course.subject
+        ).filter(Course.year == str(year)):
+            courses[(course_id, subject)] = (
+                course_year,
+                resolve(term_strings, terms),
+                subject,
+            )
+        for course_id, course_year, terms, subject in (
+            session.query(Course.id, Course.year, Course.terms, CourseSubject.subject)
+            .join(CourseSubject, CourseSubject.course_id == Course.id)
+            .filter(Course.year == str(year))
+        ):
+            courses[(course_id, subject)] = (
+                course_year,
+                resolve(term_strings, terms),
+                subject,
+            )
+        subject_counts = count_subjects_by_term(courses.values())
+
+        session.query(SubjectTerm).filter(SubjectTerm.year == str(year)).delete()
+        for term, subjects in subject_counts.get(str(year), {}).items():
+            for name, course_count in subjects.items():
+                session.add(
+                    SubjectTerm(
+                        id=get_short_hash(f"{year}{term}{name}"),
+                        year=str(year),
+                        term=term,
+                        subject=name,
+                        course_count=course_count,
+                    )
+                )
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"[DB ERROR] Failed to build subject terms for {year}: {e}")
+    finally:
+        session.close()
 
-        # Subject Custom ID
-        subject_cid = get_short_hash(f"{name}")
 
-        # Open a new session just before inserting data
-        session = Session(bind=engine)
+def build_requisite_graph(engine, year):
+    """Link course requisites to the courses they name and precompute the full prerequisite chains."""
+    session = Session(bind=engine)
+    try:
+        courses = (
+            session.query(Course)
+            .filter(Course.year == str(year))
+            .order_by(Course.id)
+            .all()
+        )
 
-        # Insert subject into the queue
-        db_subject = Subject(id=subject_cid, name=name)
+        # A course code can be offered as several courses (e.g. per campus), link to the first
+        course_ids = {}
+        for course in courses:
+            course_ids.setdefault(normalise_code(course.course_code), course.id)
+
+        session.query(Requisite).filter(Requisite.year == str(year)).delete()
+        session.query(PrerequisiteClosure).filter(
+            PrerequisiteClosure.year == str(year)
+        ).delete()
+
+        edges = {}
+        for course in courses:
+            course_code = normalise_code(course.course_code)
+            if course_code in edges:
+                continue
+            edges[course_code] = set()
+
+            for kind in REQUISITE_KINDS:
+                groups = parse_requisite_groups(getattr(course, kind))
+                for group_index, (requires_all, codes) in enumerate(groups):
+                    for code in codes:
+                        session.add(
+                            Requisite(
+                                id=get_short_hash(
+                                    f"{year}{course_code}{kind}{group_index}{code}"
+                                ),
+                                year=str(year),
+                                course_code=course_code,
+                                course_id=course_ids[course_code],
+                                kind=kind,
+                                group_index=group_index,
+                                requires_all=requires_all,
+                                requisite_code=code,
+                                requisite_id=course_ids.get(code),
+                            )
+                        )
+                        if kind == "prerequisites":
+                            edges[course_code].add(code)
+
+        for course_code, prerequisites in requisite_closure(edges).items():
+            for code, depth in prerequisites.items():
+                session.add(
+                    PrerequisiteClosure(
+                        id=get_short_hash(f"{year}{course_code}{code}"),
+                        year=str(year),
+                        course_code=course_code,
+                        course_id=course_ids[course_code],
+                        prerequisite_code=code,
+                        prerequisite_id=course_ids.get(code),
+                        depth=depth,
+                    )
+                )
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"[DB ERROR] Failed to build requisite graph for {year}: {e}")
+    finally:
         session.close()
-        write_queue.put(db_subject)
 
+
+def published_path(year):
+    """Path of the published database of a year, downloaded before the scrape."""
+    return shard_path("local", year, get_setting("SHARD_DIR", SHARD_DIR))
+
+
+def seed_strings(engine, year):
+    """Start the interned strings from those of the shard, or else the published database.
+
+    Keeping the published ids means rows whose strings are unchanged stay the same
+    between versions, so they are left out of the delta.
+    """
+    shard_strings = load_strings(engine)
+    if shard_strings or not os.path.exists(published_path(year)):
+        strings.reset(shard_strings)
+        return
+    previous_engine = create_engine(f"sqlite:///{published_path(year)}")
+    previous_strings = load_strings(previous_engine)
+    previous_engine.dispose()
+    strings.reset(previous_strings)
+    for string_id, value in sorted(previous_strings.items()):
+        store_string(string_id, value)
+
+
+def publish_delta(db_path, year):
+    """Write the delta from the published database of the year to the new one."""
+    output_path = delta_path(db_path)
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    if not os.path.exists(published_path(year)):
+        return
+    try:
+        stats = write_delta(published_path(year), db_path, output_path)
+    except DeltaError as e:
+        print(f"[DELTA] {year}: {e}, only the full database can be downloaded.")
+        return
+    print(
+        f"[DELTA] {year}: {stats['rows']} rows changed, {stats['bytes'] / 1024:.0f} KiB "
+        f"instead of {os.path.getsize(db_path) / 1024:.0f} KiB."
+    )
+
+
+def record_changes(engine, year):
+    """Record the courses, classes and meetings changed since the published database of the year."""
+    previous_path = published_path(year)
+    previous_engine = (
+        create_engine(f"sqlite:///{previous_path}")
+        if os.path.exists(previous_path)
+        else None
+    )
+    history_versions = int(get_setting("CHANGE_HISTORY_VERSIONS", "14"))
+
+    session = Session(bind=engine)
+    try:
+        # The shard is read before it's written, as a large write locks out readers
+        changeset = (
+            build_changeset(previous_engine, engine, row_decoder=row_decoder)
+            if previous_engine
+            else None
+        )
+
+        # A resumed shard may already have recorded its changes
+        session.query(Change).delete()
+        session.query(DatasetVersion).delete()
+
+        # Carry the recent change history over so clients can sync from older versions
+        previous_versions = []
+        if previous_engine and inspect(previous_engine).has_table("dataset_versions"):
+            previous_session = Session(bind=previous_engine)
+            previous_versions = (
+                previous_session.query(DatasetVersion)
+                .order_by(DatasetVersion.version.desc())
+                .limit(max(0, history_versions - 1))
+                .all()
+            )
+            kept = [dataset.version for dataset in previous_versions]
+            for dataset in previous_versions:
+                session.merge(dataset)
+            # The changes are copied in batches, as the table was emptied above
+            history = previous_session.execute(
+                select(Change.__table__)
+                .where(Change.version.in_(kept))
+                .execution_options(yield_per=5000)
+            )
+            for rows in history.mappings().partitions():
+                session.execute(insert(Change), rows)
+            previous_session.close()
+
+        version = new_version()
+        session.add(
+            DatasetVersion(
+                version=version,
+                created_at=datetime.now(timezone.utc).isoformat(),
+                previous_version=(
+                    previous_versions[0].version if previous_versions else None
+                ),
+            )
+        )
+
+        if changeset is not None:
+            session.bulk_insert_mappings(Change, changeset_rows(version, changeset))
+            for entity, changes in changeset.items():
+                print(
+                    f"[CHANGES] {year} {entity}: {len(changes['added'])} added, "
+                    f"{len(changes['modified'])} modified, {len(changes['removed'])} removed"
+                )
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print(f"[DB ERROR] Failed to record changes for {year}: {e}")
+    finally:
+        session.close()
+        if previous_engine:
+            previous_engine.dispose()
+
+
+def compress_text(engine, year):
+    """Compress the large text columns with the dictionary of the published database of the year.
+
+    Keeping the published dictionary means unchanged text compresses to the same bytes
+    in every version. A new dictionary is trained if there is none or
+    RETRAIN_TEXT_DICTIONARY is set.
+    """
+    previous_path = published_path(year)
+    dictionary = load_dictionary(engine)
+    retrain = get_setting("RETRAIN_TEXT_DICTIONARY", "false").lower() == "true"
+    if dictionary is None and not retrain and os.path.exists(previous_path):
+        previous_engine = create_engine(f"sqlite:///{previous_path}")
+        dictionary = load_dictionary(previous_engine)
+        previous_engine.dispose()
+
+    try:
+        stats = compress_database(engine, dictionary)
+    except Exception as e:
+        print(f"[DB ERROR] Failed to compress the text of {year}: {e}")
+        return
+    print(
+        f"[COMPRESS] {year}: {stats['text_bytes'] / 1024:.0f} KiB of text stored in "
+        f"{stats['compressed_bytes'] / 1024:.0f} KiB with a "
+        f"{stats['dictionary_bytes'] / 1024:.0f} KiB dictionary."
+    )
+
+
+def schedule_subject(
+    scheduler, subject, year, progress, all_task, done, course_list=None
+):
+    """List a subject's courses, unless given in `course_list`, and schedule a task for each of them.
+
+    Courses of bigger subjects are scheduled first so they don't finish last. The
+    subject is checkpointed once the last of its courses is done.
+
+    Returns:
+        bool: False if the course list failed to load and should be retried.
+    """
+    name = subject["subject"]
+    if name in done["subject"]:
+        progress.update(all_task, advance=1)
+        return True
+
+    # Subject Custom ID
+    subject_cid = get_short_hash(f"{name}")
+    write_queue.put(Subject(id=subject_cid, name=name))
+
+    if course_list is None:
         # Encode & in subject name
         encoded_name = name.replace("&", "%26")
         courses = data_parser.get_course_codes(encoded_name, year)
-        course_list = courses.get("courses", []) if isinstance(courses, dict) else []
-        progress.update(subject_task, total=len(course_list))
-
-        # Process each course concurrently
-        with ThreadPoolExecutor(max_workers=50) as executor:
-            futures = []
-            for course in course_list:
-                future = executor.submit(
-                    process_course,
-                    course,
-                    year,
-                    subject,
-                    engine,
-                    progress,
-                    subject_task,
-                    lock,
-                )
-                futures.append(future)
-
-            # Wait for all threads to complete
-            for future in as_completed(futures):
-                future.result()
+        # The course list is {"courses": []} when it failed to load, {} when it is empty
+        if not isinstance(courses, dict) or courses == {"courses": []}:
+            return False
+        course_list = courses.get("courses", [])
+    if not course_list:
+        checkpoint("subject", name)
+        progress.update(all_task, advance=1)
+        return True
 
+    subject_task = progress.add_task(f"[cyan]{name}", total=len(course_list))
+    lock = Lock()
+    remaining = len(course_list)
+    failed = 0
+
+    def course_done(result):
+        nonlocal remaining, failed
+        with lock:
+            remaining -= 1
+            failed += result is False
+            finished = remaining == 0
         progress.update(subject_task, advance=1)
-        progress.update(all_task, advance=1)
+        telemetry.gauge("scheduler_queue_depth", scheduler.queued())
+        if finished:
+            # Queued after the checkpoints of all of its courses
+            if failed:
+                checkpoint("subject", name, f"{failed} courses failed")
+            else:
+                checkpoint("subject", name)
+            progress.update(all_task, advance=1)
+
+    for course in course_list:
+        scheduler.submit(
+            process_course,
+            course,
+            year,
+            subject,
+            done["course"],
+            priority=(1, -len(course_list)),
+            on_done=course_done,
+        )
+    return True
 
-    except Exception as e:
-        print(f"Error processing subject {subject['subject']}: {e}")
 
+def subject_listed(name, progress, all_task):
+    """Checkpoint a subject whose course list could not be loaded."""
+
+    def on_done(result):
+        if result is False:
+            checkpoint("subject", name, "Failed to fetch the course list")
+            progress.update(all_task, advance=1)
 
-def main():
-    """Scrape data from the API and store it in a local database"""
+    return on_done
 
-    # Run proxy fetching and testing
-    fetch_proxies.main()
 
-    # If db already exists, delete it
-    if os.path.exists("src/dev.sqlite3"):
-        os.remove("src/dev.sqlite3")
+def scrape_year(year: int, resume: bool = False):
+    """Scrape the courses of a year into its own database shard.
+
+    With `resume`, the shard of an interrupted run is kept and only the subjects and
+    courses it did not finish are scraped.
+    """
+    telemetry.reset()
+    course_pages.clear()
+    scraped_courses.clear()
+    db_path = shard_path("dev", year, get_setting("SHARD_DIR", SHARD_DIR))
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+    # If db already exists, delete it, unless resuming from it
+    if os.path.exists(db_path) and not resume:
+        os.remove(db_path)
 
     engine = create_engine(
-        "sqlite:///src/dev.sqlite3",
+        f"sqlite:///{db_path}",
         pool_size=1000,  # Increase the pool size to allow for more connections
         max_overflow=1000,  # Allow overflow connections
         pool_timeout=30,  # Set the pool timeout to 30 seconds
     )
     Base.metadata.create_all(engine)
     Session.configure(bind=engine)
+    seed_strings(engine, year)
 
-    year_str = dotenv_values().get("YEAR")
-    if year_str is None:
-        raise ValueError("YEAR environment variable is not set")
-    year = int(year_str)
-
-    # Create lock for thread-safe operations
-    lock = Lock()
+    done = load_checkpoints(engine)
+    if resume:
+        print(
+            f"[RESUME] {year}: skipping {len(done['subject'])} subjects and "
+            f"{len(done['course'])} courses already written."
+        )
 
     # Start DB writer thread
     writer_thread = Thread(target=db_writer, args=(engine,))
@@ -376,27 +880,116 @@ def main():
     with Progress() as progress:
         subjects = data_parser.get_subjects(year)
 
+        # List every course of the year in a few pages instead of once per subject
+        listing = None
+        if get_setting("LISTING_MODE", "year") == "year":
+            listing = data_parser.get_year_listing(
+                year,
+                page_size=int(get_setting("LISTING_PAGE_SIZE", "500")),
+                concurrency=int(get_setting("LISTING_CONCURRENCY", "8")),
+            )
+            if listing is None:
+                print(f"[LISTING] {year}: falling back to listing each subject.")
+            else:
+                listed = {subject["subject"] for subject in subjects["subjects"]}
+                subjects["subjects"] += [
+                    {"subject": name} for name in sorted(listing) if name not in listed
+                ]
+
         all_task = progress.add_task(
-            "[cyan bold]All Courses", total=len(subjects["subjects"])
+            f"[cyan bold]All Courses ({year})", total=len(subjects["subjects"])
         )
 
-        # Create a thread pool with multiple threads
-        with ThreadPoolExecutor(max_workers=50) as executor:
-            futures = []
-            for subject in subjects["subjects"]:
-                future = executor.submit(
-                    process_subject, subject, year, engine, progress, all_task, lock
-                )
-                futures.append(future)
-
-            # Wait for all threads to complete
-            for future in as_completed(futures):
-                future.result()
+        # Every subject listing and course is a task on one shared pool of workers,
+        # listings first so the biggest subjects' courses can start early
+        scheduler = Scheduler(
+            workers=int(get_setting("SCRAPE_WORKERS", "100")),
+            max_attempts=int(get_setting("SCRAPE_TASK_ATTEMPTS", "2")),
+        )
+        for subject in subjects["subjects"]:
+            scheduler.submit(
+                schedule_subject,
+                scheduler,
+                subject,
+                year,
+                progress,
+                all_task,
+                done,
+                listing.get(subject["subject"], []) if listing is not None else None,
+                priority=(0,),
+                on_done=subject_listed(subject["subject"], progress, all_task),
+            )
+        scheduler.start()
+        scheduler.join()
 
     # Signal DB writer to stop and wait
     write_queue.put(None)
     writer_thread.join()
 
+    # Subject lists are served from this table instead of scanning courses per request
+    with telemetry.stage("build_indexes"):
+        build_subject_terms(engine, year)
+        build_requisite_graph(engine, year)
+    with telemetry.stage("record_changes"):
+        record_changes(engine, year)
+    if get_setting("COMPRESS_TEXT", "true").lower() == "true":
+        with telemetry.stage("compress_text"):
+            compress_text(engine, year)
+    # The server loads this instead of querying SQLite for subject and course lists
+    with telemetry.stage("write_snapshot"):
+        write_snapshot(engine, snapshot_path(db_path))
+    failures = scrape_summary(engine, year)
+    engine.dispose()
+    # Servers update their copy with this instead of downloading the whole database
+    with telemetry.stage("write_delta"):
+        publish_delta(db_path, year)
+
+    report_path = telemetry.write_report(
+        f"scrape-report-{year}",
+        get_setting("SCRAPE_REPORT_DIR", REPORT_DIR),
+        year=year,
+        subjects=len(subjects["subjects"]),
+        resumed=resume,
+        failures=failures,
+    )
+    print(f"[REPORT] Wrote the scrape report of {year} to {report_path}")
+
+
+def main(argv=None):
+    """Scrape data from the API and store each year in a local database shard"""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Keep the shards of an interrupted run and only scrape what it did not finish",
+    )
+    args = parser.parse_args(argv)
+
+    year_str = get_setting("YEAR")
+    if year_str is None:
+        raise ValueError("YEAR environment variable is not set")
+    years = parse_years(year_str)
+
+    # Start scraping once enough proxies work, the rest are tested in the background
+    if DataFetcher.USE_PROXIES:
+        stop_validation = fetch_proxies.start_validation(
+            DataFetcher.add_proxy,
+            target=int(get_setting("PROXY_TARGET", "50")),
+            wait_timeout=float(get_setting("PROXY_WAIT_TIMEOUT", "60")),
+        )
+
+    # Course pages and outlines are parsed in other processes, off the fetching threads
+    parse_pool.start(int(get_setting("PARSE_PROCESSES", str(os.cpu_count() or 1))))
+    try:
+        for year in years:
+            scrape_year(year, resume=args.resume)
+    finally:
+        parse_pool.stop()
+
+    if DataFetcher.USE_PROXIES:
+        stop_validation.set()
+        DataFetcher.save_proxy_scores()
+
 
 if __name__ == "__main__":
     main()
@@ -1,45 +1,114 @@
-import re
+import fcntl
+import hashlib
+import json
+import os
 import sys
+from contextlib import asynccontextmanager
 from datetime import datetime
+from pathlib import Path
+from threading import Lock
 from typing import Dict, List, Optional, Union
 
-from dotenv import dotenv_values
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import ValidationError
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
-
-from .models import Base, Course, CourseClass, Subject
+from sqlalchemy import String, cast, event, or_, select
+from sqlalchemy.orm import Session, defer, sessionmaker
+
+from . import metrics
+from .changeset import merge_changes
+from .documents import (
+    DocumentCache,
+    SharedDocuments,
+    SharedDocumentsError,
+    documents_path,
+    write_documents,
+)
+from .interning import load_strings, resolve
+from .models import (
+    Base,
+    Change,
+    Course,
+    CourseClass,
+    CourseSubject,
+    DatasetVersion,
+    PrerequisiteClosure,
+    Requisite,
+    SubjectTerm,
+)
+from .requisites import check_eligibility, normalise_code, parse_requisite_codes
 from .schemas import CourseSchema
+from .settings import get_setting
+from .shards import SHARD_DIR, ShardRouter, parse_years
+from .snapshot import SnapshotStore, snapshot_path
+from .term_utils import count_subjects_by_term, split_terms
+from .text_compression import decompress, load_dictionary
+from .warmup import Warmup
 
 # Check if the application is running in development mode
 is_dev_mode = "dev" in sys.argv
 
+# Caches and pages are warmed up in the background after startup, see /ready
+USE_WARMUP = get_setting("WARMUP", "true").lower() == "true"
+warmup = Warmup()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if USE_WARMUP:
+        warmup.start()
+    else:
+        warmup.skip()
+    if worker_metrics is not None:
+        worker_metrics.start()
+    yield
+
+
 # Configure FastAPI based on the mode
 app = FastAPI(
     docs_url="/docs" if is_dev_mode else None,
     redoc_url="/redoc" if is_dev_mode else None,
+    lifespan=lifespan,
 )
 
 # Determine the database type
-DB_TYPE = dotenv_values().get("DB_TYPE")
+DB_TYPE = get_setting("DB_TYPE")
 
+# Use dev db or completed courses db
+DB_PREFIX = "dev" if DB_TYPE == "dev" else "local"
 
-if DB_TYPE == "dev":
-    # Use dev db
-    DATABASE_URL = "sqlite:///src/dev.sqlite3"
-    engine = create_engine(DATABASE_URL)
-else:
-    # Use completed courses db
-    DATABASE_URL = "sqlite:///src/local.sqlite3"
-    engine = create_engine(DATABASE_URL)
+# Databases scraped before sharding hold every year in a single file
+DATABASE_URL = f"sqlite:///src/{DB_PREFIX}.sqlite3"
+
+# SQLite reads the database through a memory map instead of copying pages into each
+# connection's cache, so every worker shares the pages in the OS page cache
+SQLITE_MMAP_SIZE = int(get_setting("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+
+def set_mmap_size(connection, _) -> None:
+    connection.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+
+
+def open_database(engine) -> None:
+    if SQLITE_MMAP_SIZE > 0:
+        event.listen(engine, "connect", set_mmap_size)
+    Base.metadata.create_all(bind=engine)
+
+
+shard_router = ShardRouter(
+    DB_PREFIX,
+    fallback_url=DATABASE_URL,
+    shard_dir=get_setting("SHARD_DIR", SHARD_DIR),
+    max_open=int(get_setting("MAX_OPEN_SHARDS", "4")),
+    on_open=open_database,
+)
 
 print("DB_TYPE:", DB_TYPE)
 print("DATABASE_URL:", DATABASE_URL)
+print("SHARD_DIR:", shard_router.shard_dir)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base.metadata.create_all(bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
 # Configure CORS for local development and production
 origins = [
@@ -56,22 +125,325 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record the latency, response size and SQL statements of every request
+metrics.instrument_sqlalchemy()
+app.add_middleware(metrics.MetricsMiddleware, exclude=("/metrics", "/ready"))
+open_shards = metrics.registry.register(
+    metrics.Gauge("courses_api_open_shards", "Year databases currently open.")
+)
+metrics.registry.add_collector(
+    lambda: open_shards.set(len(shard_router.open_engines()))
+)
+
+# With several workers, each one's metrics are labelled with its pid and exchanged
+# through METRICS_DIR, so /metrics reports every worker whichever one serves it
+METRICS_DIR = get_setting("METRICS_DIR")
+worker_metrics = (
+    metrics.WorkerMetrics(
+        metrics.registry,
+        METRICS_DIR,
+        float(get_setting("METRICS_INTERVAL", "5")),
+    )
+    if METRICS_DIR
+    else None
+)
+snapshot_load_seconds = metrics.registry.register(
+    metrics.Gauge(
+        "courses_api_snapshot_load_seconds",
+        "Time taken to load the current snapshot of each database.",
+        ("snapshot",),
+    )
+)
+
+# Binary snapshots written next to the databases by the scraper, see snapshot.py
+USE_SNAPSHOTS = get_setting("USE_SNAPSHOTS", "true").lower() == "true"
+snapshots = SnapshotStore(
+    on_load=lambda path, seconds: snapshot_load_seconds.set(
+        seconds, snapshot=os.path.basename(path)
+    )
+)
+
+
+def get_snapshot(db):
+    """Gets the snapshot of a session's database, or None if it has none."""
+    return get_engine_snapshot(db.get_bind())
+
+
+def get_engine_snapshot(engine):
+    return get_database_snapshot(engine.url.database)
+
 
-def get_db():
-    """Get a database session."""
-    db = SessionLocal()
+def get_database_snapshot(database: str):
+    """Gets the snapshot of a database file, or None if it has none."""
+    if not USE_SNAPSHOTS or not database:
+        return None
+    return snapshots.get(snapshot_path(database))
+
+
+# Built /courses and /courses/{id} responses, prebuilt for the current term on warm-up
+documents = DocumentCache(int(get_setting("DOCUMENT_CACHE_SIZE", "20000")))
+
+# The current term's responses are written once to a file mapped by every worker, see
+# documents.py, instead of each worker building and caching its own copy
+USE_SHARED_DOCUMENTS = get_setting("SHARED_DOCUMENTS", "true").lower() == "true"
+shared_documents = {}
+
+# Shared documents built by another version of the server are rebuilt
+CODE_VERSION = hashlib.sha256(
+    b"".join(path.read_bytes() for path in sorted(Path(__file__).parent.glob("*.py")))
+).hexdigest()
+
+
+def courses_key(
+    year: int,
+    term_number: str,
+    subject: str,
+    university_wide_elective: bool = None,
+    level_of_study: str = None,
+) -> str:
+    return json.dumps(
+        [
+            "courses",
+            year,
+            term_number,
+            subject,
+            university_wide_elective,
+            level_of_study,
+        ]
+    )
+
+
+def course_key(course_cid: str) -> str:
+    return json.dumps(["course", course_cid])
+
+
+def render_document(document) -> bytes:
+    """The JSON of a document, encoded like FastAPI encodes responses."""
+    return json.dumps(
+        document, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode()
+
+
+def file_stamp(path: str) -> list:
     try:
-        yield db
-    finally:
-        db.close()
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+
+def database_version(db) -> tuple:
+    """Gets the URL of a session's database and the stamp of its file, which changes
+    when the file is replaced, e.g. by `delta.py apply`.
+    """
+    url = db.get_bind().url
+    stamp = file_stamp(url.database) if url.database else None
+    return str(url), tuple(stamp) if stamp else None
+
+
+def get_shared_documents(db) -> SharedDocuments:
+    """Gets the shared documents of a session's database, or None if it has none or the
+    database has been replaced since they were built.
+    """
+    database = db.get_bind().url.database
+    shared = shared_documents.get(database)
+    if shared is None or shared.stamp["database"] != file_stamp(database):
+        return None
+    return shared
+
+
+def cached_document(db, key: str, build, *args):
+    """Gets a route's response from the shared documents or the document cache, building
+    and caching it with `build(db, *args)` if it is in neither.
+    """
+    shared = get_shared_documents(db)
+    if shared is not None:
+        document = shared.get(key)
+        metrics.record_cache("shared_documents", document is not None)
+        if document is not None:
+            return Response(document, media_type="application/json")
+
+    # Documents of a replaced database are never found, and age out of the cache
+    cache_key = (*database_version(db), key)
+    document = documents.get(cache_key)
+    metrics.record_cache("documents", document is not None)
+    if document is None:
+        document = build(db, *args)
+        documents.put(cache_key, document)
+    return document
+
+
+# Interned strings of each database as (stamp, strings), loaded again once the database
+# file is replaced
+strings_cache = {}
+strings_lock = Lock()
+
+
+def get_strings(db) -> dict[int, str]:
+    """Gets the interned strings (terms, campuses, locations...) of a session's database,
+    keyed by id. Databases scraped before strings were interned have none.
+    """
+    database_url, stamp = database_version(db)
+    cached = strings_cache.get(database_url)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with strings_lock:
+        cached = strings_cache.get(database_url)
+        if cached is None or cached[0] != stamp:
+            cached = strings_cache[database_url] = (stamp, load_strings(db.get_bind()))
+    return cached[1]
+
+
+# Dictionaries of the compressed text columns as (stamp, dictionary), loaded again once
+# the database file is replaced, as a retrained dictionary can't read the new text
+text_dictionary_cache = {}
+text_dictionary_lock = Lock()
+
+
+def get_text_dictionary(db) -> bytes:
+    """Gets the dictionary the text columns of a session's database are compressed with,
+    or None if they aren't compressed.
+    """
+    database_url, stamp = database_version(db)
+    cached = text_dictionary_cache.get(database_url)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with text_dictionary_lock:
+        cached = text_dictionary_cache.get(database_url)
+        if cached is None or cached[0] != stamp:
+            cached = text_dictionary_cache[database_url] = (
+                stamp,
+                load_dictionary(db.get_bind()),
+            )
+    return cached[1]
+
+
+def string_ids(strings: dict[int, str], match) -> list[int]:
+    """Gets the ids of the interned strings `match` accepts."""
+    return [string_id for string_id, value in strings.items() if match(value)]
+
+
+# Subject lists per (year, term) of each database as (stamp, index), loaded again once
+# the database file is replaced
+subject_index_cache = {}
+subject_index_lock = Lock()
+
+
+def get_subject_index(db) -> dict[str, dict[str, dict[str, int]]]:
+    """Gets the subject course counts in the form {year: {term: {subject: count}}}.
+
+    The index is read from the precomputed subject terms table on first use. Databases
+    scraped before the table existed have it computed from the courses instead.
+    """
+    snapshot = get_snapshot(db)
+    if snapshot is not None and snapshot.subject_index:
+        metrics.record_cache("subject_index", True)
+        return snapshot.subject_index
+
+    database_url, stamp = database_version(db)
+    cached = subject_index_cache.get(database_url)
+    hit = cached is not None and cached[0] == stamp
+    metrics.record_cache("subject_index", hit)
+    if hit:
+        return cached[1]
+
+    with subject_index_lock:
+        cached = subject_index_cache.get(database_url)
+        if cached is None or cached[0] != stamp:
+            rows = db.query(
+                SubjectTerm.year,
+                SubjectTerm.term,
+                SubjectTerm.subject,
+                SubjectTerm.course_count,
+            ).all()
+            if rows:
+                index = {}
+                for year, term, subject, course_count in sorted(rows):
+                    index.setdefault(year, {}).setdefault(term, {})[subject] = (
+                        course_count
+                    )
+            else:
+                strings = get_strings(db)
+                index = count_subjects_by_term(
+                    (year, resolve(strings, terms), subject)
+                    for year, terms, subject in db.query(
+                        Course.year, Course.terms, Course.subject
+                    )
+                )
+            cached = subject_index_cache[database_url] = (stamp, index)
+
+    return cached[1]
+
+
+# Course counts of term names that only partially match as (stamp, counts), keyed by
+# (database, year, term) and counted again once the database file is replaced
+partial_term_cache = {}
+
+
+def get_term_subjects(db, year: int, term: str) -> dict[str, int]:
+    """Gets the course count of every subject offered in a given year and term."""
+    terms = get_subject_index(db).get(str(year), {})
+    # Every term whose name contains the given one is included, as in /courses, so
+    # "Term 1" also counts the courses of "Online Term 1"
+    matches = [name for name in terms if term.lower() in name.lower()]
+    metrics.record_cache("term_subjects", len(matches) <= 1)
+    if len(matches) <= 1:
+        return terms[matches[0]] if matches else {}
+
+    # Courses of several matching terms are counted once, and cached so later lookups
+    # are constant time as well
+    database_url, stamp = database_version(db)
+    key = (database_url, str(year), term)
+    cached = partial_term_cache.get(key)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with subject_index_lock:
+        cached = partial_term_cache.get(key)
+        if cached is None or cached[0] != stamp:
+            cached = partial_term_cache[key] = (
+                stamp,
+                count_partial_term(db, year, term),
+            )
+    return cached[1]
+
+
+def count_partial_term(db, year: int, term: str) -> dict[str, int]:
+    """Counts the courses of each subject offered in any term whose name contains `term`,
+    ignoring case.
+
+    A course offered in several matching terms is counted once.
+    """
+    strings = get_strings(db)
+    rows = db.query(Course.id, Course.terms, Course.subject).filter(
+        Course.year == str(year)
+    )
+    cross_listed = (
+        db.query(Course.id, Course.terms, CourseSubject.subject)
+        .join(CourseSubject, CourseSubject.course_id == Course.id)
+        .filter(Course.year == str(year))
+    )
+    courses = {
+        (course_id, subject)
+        for course_id, terms, subject in [*rows, *cross_listed]
+        if subject
+        and any(
+            term.lower() in name.lower()
+            for name in split_terms(resolve(strings, terms))
+        )
+    }
+    counts = {}
+    for _, subject in courses:
+        counts[subject] = counts.get(subject, 0) + 1
+    return dict(sorted(counts.items()))
 
 
 def current_year() -> int:
-    """Gets the current year."""
-    year_str = dotenv_values().get("YEAR")
+    """Gets the current year, or the latest configured year if it isn't served."""
+    year_str = get_setting("YEAR")
     if year_str is None:
         return datetime.now().year
-    return int(year_str)
+    years = parse_years(year_str)
+    return datetime.now().year if datetime.now().year in years else years[-1]
 
 
 def current_sem() -> str:
@@ -79,20 +451,87 @@ def current_sem() -> str:
     return "Semester 1" if datetime.now().month <= 6 else "Semester 2"
 
 
+def get_db(year: int = current_year()):
+    """Get a database session for the shard of the given year."""
+    engine = shard_router.get_engine(year)
+    if engine is None:
+        raise HTTPException(
+            status_code=404, detail=f"No courses found for year: {year}"
+        )
+
+    db = SessionLocal(bind=engine)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_course_db(course_cid: str, year: Optional[int] = None):
+    """Get a database session for the shard holding a course.
+
+    The given year's shard is searched first, otherwise the current year's shard and
+    then every other year's shard. Shards are only opened once they are searched, and
+    a shard's snapshot is searched without opening the shard.
+    """
+    years = [year] if year is not None else [current_year()]
+    years += shard_router.available_years()
+
+    course_engine = None
+    searched = []
+    for candidate in dict.fromkeys(years):
+        path = shard_router.get_path(candidate)
+        snapshot = get_database_snapshot(path) if os.path.exists(path) else None
+        if snapshot is not None:
+            if snapshot.has_course(course_cid):
+                course_engine = shard_router.get_engine(candidate)
+                break
+            continue
+
+        # Years without a shard share the fallback database
+        engine = shard_router.get_engine(candidate)
+        if engine is None or engine in searched:
+            continue
+        searched.append(engine)
+        snapshot = get_engine_snapshot(engine)
+        if snapshot is not None:
+            if snapshot.has_course(course_cid):
+                course_engine = engine
+                break
+            continue
+        with engine.connect() as connection:
+            if connection.execute(
+                select(Course.id).where(Course.id == course_cid)
+            ).first():
+                course_engine = engine
+                break
+
+    # Courses not found in any shard are looked up (and reported missing) in the first
+    if course_engine is None:
+        course_engine = shard_router.get_engine(years[0])
+    if course_engine is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+
+    db = SessionLocal(bind=course_engine)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 def get_term_number(db, year: int, term: str) -> str:
     """Gets the term number from the local database."""
 
     # Convert aliases
     term = convert_term_alias(term)
-    courses = db.query(Course).filter(Course.year == year).all()
+    terms = get_subject_index(db).get(str(year))
 
-    if not courses:
+    if not terms:
         raise HTTPException(
             status_code=404, detail=f"No courses found for year: {year}"
         )
 
-    for course in courses:
-        if term in (course.terms or ""):
+    for name in terms:
+        if term in name:
             return term
 
     raise HTTPException(
@@ -172,28 +611,6 @@ def meeting_time_convert(raw_time: str) -> str:
         return None
 
 
-def parse_requisites(raw_requisites: str) -> Union[list[str], None]:
-    """Takes in a string of -requisites and returns a list of the parsed-out subjects
-    Args:
-        raw_requisites (str): The raw string containing a list of -requisites, usually
-        in the format of "COMP SCI 1103, COMP SCI 2202, COMP SCI 2202B" as an example
-    Returns:
-        parsed_requisites (Union[list[str], None]): A list of the parsed -requisites,
-        or None if raw_requisites is None
-    """
-
-    if not raw_requisites:
-        return None
-
-    # Regex pattern to match subjects and course numbers
-    pattern = r"\b([A-Z]+(?:\s+[A-Z]+)*)\s+(\d{4}\w*)\b"
-    matched_subjects = [
-        " ".join(match) for match in re.findall(pattern, raw_requisites)
-    ]
-
-    return matched_subjects if matched_subjects else None
-
-
 def convert_term_alias(term_alias: str) -> str:
     """Takes in a term alias and returns the CoursePlanner API name for said term
     Args:
@@ -227,51 +644,91 @@ def convert_term_alias(term_alias: str) -> str:
     return converted_alias
 
 
-@app.get("/subjects", response_model=List[str])
+@app.get("/subjects", response_model=Union[List[str], Dict[str, int]])
 def get_subjects(
-    year: int = current_year(), term: str = current_sem(), db: Session = Depends(get_db)
+    year: int = current_year(),
+    term: str = current_sem(),
+    counts: bool = False,
+    db: Session = Depends(get_db),
 ):
     """Get all possible subjects for a given year and term, sorted alphabetically.
 
     Args:
         year (int, optional): The year to search for courses. Defaults to current year.
         term (str, optional): The term to search for courses. Defaults to current semester.
+        counts (bool, optional): Return the number of courses offered per subject.
 
     Returns:
-        dict: A dictionary containing a list of subjects.
+        list[str]: A list of subjects, or a dictionary of subject course counts if
+        counts is set.
     """
     term_number = get_term_number(db, year, term)
+    subjects = get_term_subjects(db, year, term_number)
 
-    results = (
-        db.query(Course)
-        .filter(Course.year == year, Course.terms.contains(term_number))
-        .all()
-    )
-
-    if not results:
+    if not subjects:
         raise HTTPException(
             status_code=404, detail="No courses found for the specified year and term"
         )
 
-    # Extract unique subject codes from the results
-    subjects = db.query(Subject).all()
-    unique_names = set()
-
-    subjects: list[str] = []
-
-    # Collect unique subject codes from course results
-    for entry in results:
-        name = entry.subject
-        if name:  # Skip empty names
-            unique_names.add(name)
-
-    # Add subject name for each unique name
-    for name in unique_names:
-        subjects.append(name)
+    if counts:
+        return subjects
+    return list(subjects)
+
+
+def query_courses(
+    db,
+    year: int,
+    term_number: str,
+    subject: str = None,
+    university_wide_elective: bool = None,
+    level_of_study: str = None,
+) -> list[Course]:
+    """Gets the courses of a year offered in a term from the database, filtered like /courses."""
+    strings = get_strings(db)
+    if strings:
+        # Terms and levels are interned, so match their strings and filter on the ids
+        filters = [
+            Course.year == year,
+            Course.terms.in_(
+                string_ids(strings, lambda value: term_number.lower() in value.lower())
+            ),
+        ]
+    else:
+        filters = [
+            Course.year == year,
+            cast(Course.terms, String).contains(term_number),
+        ]
+    if subject:
+        # Cross-listed courses are also listed under their other subjects
+        filters.append(
+            or_(
+                Course.subject == subject,
+                Course.id.in_(
+                    select(CourseSubject.course_id).where(
+                        CourseSubject.subject == subject
+                    )
+                ),
+            )
+        )
+    if university_wide_elective is not None:
+        filters.append(Course.university_wide_elective == university_wide_elective)
+    if level_of_study and strings:
+        filters.append(
+            Course.level_of_study.in_(
+                string_ids(strings, lambda value: value == level_of_study)
+            )
+        )
+    elif level_of_study:
+        filters.append(cast(Course.level_of_study, String) == level_of_study)
 
-    # Sort the subjects alphabetically
-    subjects.sort()
-    return subjects
+    # The compressed text is only needed for course details
+    return (
+        db.query(Course)
+        .options(defer(Course.course_overview), defer(Course.textbooks))
+        .filter(*filters)
+        .order_by(Course.course_code)
+        .all()
+    )
 
 
 @app.get("/courses", response_model=Union[Dict, List])
@@ -299,21 +756,36 @@ def get_subject_courses(
         list[dict]: A list of courses as dictionaries.
     """
     term_number = get_term_number(db, year, term)
-    filters = [Course.year == year, Course.terms.contains(term_number)]
-    if subject:
-        filters.append(Course.subject == subject)
-    if university_wide_elective is not None:
-        filters.append(Course.university_wide_elective == university_wide_elective)
-    if level_of_study:
-        filters.append(Course.level_of_study == level_of_study)
+    filters = (year, term_number, subject, university_wide_elective, level_of_study)
+    return cached_document(db, courses_key(*filters), build_courses_document, *filters)
+
 
-    results = db.query(Course).filter(*filters).order_by(Course.course_code).all()
+def build_courses_document(
+    db,
+    year: int,
+    term_number: str,
+    subject: str,
+    university_wide_elective: bool = None,
+    level_of_study: str = None,
+) -> dict:
+    """Builds the /courses response of a subject's courses offered in a term."""
+    snapshot = get_snapshot(db)
+    if snapshot is not None:
+        results = snapshot.find_courses(
+            year, term_number, subject, university_wide_elective, level_of_study
+        )
+    else:
+        results = query_courses(
+            db, year, term_number, subject, university_wide_elective, level_of_study
+        )
 
     if not results:
         raise HTTPException(
             status_code=404, detail="No courses found for the specified year and term"
         )
 
+    # Snapshot courses hold strings, which are returned as they are
+    strings = get_strings(db) if snapshot is None else {}
     transformed_courses = {"courses": []}
 
     # Extract necessary information from the results
@@ -327,8 +799,8 @@ def get_subject_courses(
                     "title": entry.title,
                 },
                 "university_wide_elective": entry.university_wide_elective,
-                "level_of_study": entry.level_of_study,
-                "campus": entry.campus,
+                "level_of_study": resolve(strings, entry.level_of_study),
+                "campus": resolve(strings, entry.campus),
             }
         )
 
@@ -351,7 +823,7 @@ def split_class_type_category(original_type: str):
 
 
 @app.get("/courses/{course_cid}", response_model=Union[Dict, List])
-def get_course(course_cid: str, db: Session = Depends(get_db)):
+def get_course(course_cid: str, db: Session = Depends(get_course_db)):
     """Course details route, takes in an id returns the courses' info and classes.
 
     Args:
@@ -360,12 +832,21 @@ def get_course(course_cid: str, db: Session = Depends(get_db)):
     Returns:
         dict: A dictionary containing the course information and classes.
     """
+    return cached_document(
+        db, course_key(course_cid), build_course_document, course_cid
+    )
+
+
+def build_course_document(db, course_cid: str) -> dict:
+    """Builds the /courses/{course_cid} response of a course."""
     course = db.query(Course).filter(Course.id == course_cid).first()
 
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
 
     course_id = course.course_id
+    strings = get_strings(db)
+    dictionary = get_text_dictionary(db)
 
     course_details = db.query(Course).filter(Course.course_id == course_id).first()
 
@@ -377,22 +858,25 @@ def get_course(course_cid: str, db: Session = Depends(get_db)):
             "title": course.title,
         }
         requirements = {
-            "prerequisites": parse_requisites(course_details.prerequisites),
-            "corequisites": parse_requisites(course_details.corequisites),
-            "antirequisites": parse_requisites(course_details.antirequisites),
+            "prerequisites": parse_requisite_codes(course_details.prerequisites),
+            "corequisites": parse_requisite_codes(course_details.corequisites),
+            "antirequisites": parse_requisite_codes(course_details.antirequisites),
         }
     else:
         name = {"subject": "", "code": "", "title": ""}
         requirements = {}
 
     learning_outcomes = [
-        {"description": lo.description, "outcome_index": lo.outcome_index}
+        {
+            "description": decompress(lo.description, dictionary),
+            "outcome_index": lo.outcome_index,
+        }
         for lo in course.learning_outcomes
     ]
 
     assessments = [
         {
-            "title": assess.title,
+            "title": decompress(assess.title, dictionary),
             "weighting": assess.weighting,
             "hurdle": assess.hurdle,
             "learning_outcomes": assess.learning_outcomes,
@@ -406,17 +890,17 @@ def get_course(course_cid: str, db: Session = Depends(get_db)):
         "course_id": course.course_id,
         "name": name,
         "year": course.year,
-        "term": course.terms,
-        "campus": course.campus,
+        "term": resolve(strings, course.terms),
+        "campus": resolve(strings, course.campus),
         "units": course.units,
         "university_wide_elective": course.university_wide_elective,
         "course_coordinator": course.course_coordinator,
-        "course_overview": course.course_overview,
-        "level_of_study": course.level_of_study,
+        "course_overview": decompress(course.course_overview, dictionary),
+        "level_of_study": resolve(strings, course.level_of_study),
         "course_url": course.url,
         "course_outline_url": course.course_outline_url,
         "learning_outcomes": learning_outcomes,
-        "textbooks": course.textbooks,
+        "textbooks": decompress(course.textbooks, dictionary),
         "assessments": assessments,
         "requirements": requirements,
         "class_list": [],
@@ -427,10 +911,11 @@ def get_course(course_cid: str, db: Session = Depends(get_db)):
     if classes:
         class_groups = {}
         for class_group in classes:
-            class_type = split_class_type_category(class_group.component)["type"]
+            component = resolve(strings, class_group.component)
+            class_type = split_class_type_category(component)["type"]
             if class_type not in class_groups:
                 class_groups[class_type] = {
-                    **split_class_type_category(class_group.component),
+                    **split_class_type_category(component),
                     "id": class_group.id,
                     "classes": [],
                 }
@@ -459,9 +944,9 @@ def get_course(course_cid: str, db: Session = Depends(get_db)):
                 for day in flattened_meeting_days:
                     meeting_entry = {
                         "day": day,
-                        "location": meeting.location,
-                        "campus": meeting.campus,
-                        "instructor": meeting.instructor,
+                        "location": resolve(strings, meeting.location),
+                        "campus": resolve(strings, meeting.campus),
+                        "instructor": resolve(strings, meeting.instructor),
                         "date": meeting_date_convert(meeting.dates),
                         "time": {
                             "start": meeting_time_convert(meeting.start_time),
@@ -480,3 +965,357 @@ def get_course(course_cid: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=501, detail=e.errors())
 
     return response
+
+
+def get_course_or_404(db, course_cid: str) -> Course:
+    """Gets a course by its id, raising a 404 if it doesn't exist."""
+    course = db.query(Course).filter(Course.id == course_cid).first()
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    return course
+
+
+@app.get("/courses/{course_cid}/prerequisites", response_model=Dict)
+def get_course_prerequisites(course_cid: str, db: Session = Depends(get_course_db)):
+    """Gets the full prerequisite chain of a course, nearest prerequisites first.
+
+    Args:
+        course_cid (string, required): The id of the course.
+
+    Returns:
+        dict: The course code and its direct and indirect prerequisites. Each
+        prerequisite has its depth in the chain and the id of the matching course,
+        or None if the course isn't offered that year.
+    """
+    course = get_course_or_404(db, course_cid)
+
+    results = (
+        db.query(PrerequisiteClosure, Course.course_code, Course.title)
+        .outerjoin(Course, Course.id == PrerequisiteClosure.prerequisite_id)
+        .filter(
+            PrerequisiteClosure.year == course.year,
+            PrerequisiteClosure.course_code == normalise_code(course.course_code),
+        )
+        .order_by(PrerequisiteClosure.depth, PrerequisiteClosure.prerequisite_code)
+        .all()
+    )
+
+    return {
+        "id": course.id,
+        "code": course.course_code,
+        "prerequisites": [
+            {
+                "id": entry.prerequisite_id,
+                "code": code or entry.prerequisite_code,
+                "title": title,
+                "depth": entry.depth,
+            }
+            for entry, code, title in results
+        ],
+    }
+
+
+@app.get("/courses/{course_cid}/dependents", response_model=Dict)
+def get_course_dependents(course_cid: str, db: Session = Depends(get_course_db)):
+    """Gets every course that requires a course, directly or through other courses.
+
+    Args:
+        course_cid (string, required): The id of the course.
+
+    Returns:
+        dict: The course code and the courses depending on it, nearest first.
+    """
+    course = get_course_or_404(db, course_cid)
+
+    results = (
+        db.query(PrerequisiteClosure, Course.course_code, Course.title)
+        .join(Course, Course.id == PrerequisiteClosure.course_id)
+        .filter(
+            PrerequisiteClosure.year == course.year,
+            PrerequisiteClosure.prerequisite_code == normalise_code(course.course_code),
+        )
+        .order_by(PrerequisiteClosure.depth, PrerequisiteClosure.course_code)
+        .all()
+    )
+
+    return {
+        "id": course.id,
+        "code": course.course_code,
+        "dependents": [
+            {
+                "id": entry.course_id,
+                "code": code,
+                "title": title,
+                "depth": entry.depth,
+            }
+            for entry, code, title in results
+        ],
+    }
+
+
+@app.get("/courses/{course_cid}/eligibility", response_model=Dict)
+def get_course_eligibility(
+    course_cid: str,
+    completed: List[str] = Query(default=[]),
+    db: Session = Depends(get_course_db),
+):
+    """Checks whether a course can be taken given a list of completed courses.
+
+    Examples:
+        /courses/{course_cid}/eligibility?completed=COMP SCI 1103&completed=MATHS 1011
+
+    Args:
+        course_cid (string, required): The id of the course.
+        completed (list[str], optional): The completed course codes, either repeated
+        or comma-separated.
+
+    Returns:
+        dict: Whether the course can be taken, the prerequisite groups that aren't
+        satisfied yet, its corequisites and any completed antirequisites.
+    """
+    course = get_course_or_404(db, course_cid)
+    completed_codes = {
+        normalise_code(code)
+        for value in completed
+        for code in value.split(",")
+        if code.strip()
+    }
+
+    requisites = (
+        db.query(Requisite)
+        .filter(
+            Requisite.year == course.year,
+            Requisite.course_code == normalise_code(course.course_code),
+        )
+        .order_by(Requisite.kind, Requisite.group_index)
+        .all()
+    )
+
+    groups = {}
+    for requisite in requisites:
+        kind_groups = groups.setdefault(requisite.kind, {})
+        _, codes = kind_groups.setdefault(
+            requisite.group_index, (requisite.requires_all, [])
+        )
+        codes.append(requisite.requisite_code)
+
+    missing = check_eligibility(
+        list(groups.get("prerequisites", {}).values()), completed_codes
+    )
+    completed_antirequisites = [
+        code
+        for _, codes in groups.get("antirequisites", {}).values()
+        for code in codes
+        if code in completed_codes
+    ]
+
+    return {
+        "id": course.id,
+        "code": course.course_code,
+        "eligible": not missing and not completed_antirequisites,
+        "missing_prerequisites": missing,
+        "corequisites": [codes for _, codes in groups.get("corequisites", {}).values()],
+        "completed_antirequisites": completed_antirequisites,
+    }
+
+
+@app.get("/changes", response_model=Dict)
+def get_changes(since: int, db: Session = Depends(get_db)):
+    """Gets the courses, classes and meetings changed after a dataset version.
+
+    Examples:
+        /changes?since=20261018003000&year=2026
+
+    Args:
+        since (int, required): The dataset version the client last synced.
+        year (int, optional): The year of the dataset. Defaults to current year.
+
+    Returns:
+        dict: The latest version and, for each of courses, course_classes and
+        meetings, the added and modified rows and the ids of removed rows.
+    """
+    versions = db.query(DatasetVersion).order_by(DatasetVersion.version).all()
+    if not versions:
+        raise HTTPException(status_code=404, detail="No dataset versions found")
+
+    latest = versions[-1].version
+    oldest = versions[0]
+    if since < latest and since not in (
+        oldest.previous_version,
+        *(dataset.version for dataset in versions),
+    ):
+        raise HTTPException(
+            status_code=410,
+            detail=f"Changes since version {since} are no longer available, fetch the full dataset",
+        )
+
+    changes = (
+        db.query(Change.entity, Change.entity_id, Change.operation, Change.data)
+        .filter(Change.version > since)
+        .order_by(Change.version)
+        .all()
+    )
+
+    return {"since": since, "version": latest, "changes": merge_changes(changes)}
+
+
+def warm_page_cache(report) -> None:
+    """Read the current year's database and snapshot, so their pages are in the OS cache."""
+    engine = shard_router.get_engine(current_year())
+    if engine is None or not engine.url.database:
+        return
+    paths = [
+        path
+        for path in (engine.url.database, snapshot_path(engine.url.database))
+        if os.path.exists(path)
+    ]
+    total = sum(os.path.getsize(path) for path in paths)
+    done = 0
+    for path in paths:
+        with open(path, "rb") as file:
+            while chunk := file.read(1 << 20):
+                done += len(chunk)
+                report(done, total)
+
+
+def warm_statements(report) -> None:
+    """Run every route's queries once, so SQLAlchemy has compiled and cached them."""
+    year = current_year()
+    engine = shard_router.get_engine(year)
+    if engine is None:
+        return
+    db = SessionLocal(bind=engine)
+    try:
+        term_number = get_term_number(db, year, current_sem())
+        subject = next(iter(get_term_subjects(db, year, term_number)), None)
+        courses = query_courses(db, year, term_number, subject)
+        query_courses(db, year, term_number, subject, university_wide_elective=True)
+        get_strings(db)
+        get_text_dictionary(db)
+        if courses:
+            course_cid = courses[0].id
+            get_course_prerequisites(course_cid, db=db)
+            get_course_dependents(course_cid, db=db)
+            get_course_eligibility(course_cid, completed=[], db=db)
+        try:
+            get_changes(0, db=db)
+        except HTTPException:
+            pass  # Databases without dataset versions
+        report(1, 1)
+    finally:
+        db.close()
+
+
+def current_term_documents(db, year: int, term_number: str, report):
+    """Builds the /courses responses of every subject and the /courses/{id} responses of
+    every course offered in a term, yielding (key, document) pairs.
+    """
+    subjects = get_term_subjects(db, year, term_number)
+    course_cids = {}
+    for done, subject in enumerate(subjects, 1):
+        document = build_courses_document(db, year, term_number, subject)
+        yield courses_key(year, term_number, subject), document
+        course_cids.update(
+            dict.fromkeys(course["id"] for course in document["courses"])
+        )
+        report(done, len(subjects) + len(course_cids))
+
+    for done, course_cid in enumerate(course_cids, len(subjects) + 1):
+        try:
+            yield course_key(course_cid), build_course_document(db, course_cid)
+        except HTTPException:
+            pass
+        report(done, len(subjects) + len(course_cids))
+
+
+def warm_documents(report) -> None:
+    """Build the course lists and course details of the current term into the document cache."""
+    year = current_year()
+    engine = shard_router.get_engine(year)
+    if engine is None:
+        return
+    db = SessionLocal(bind=engine)
+    try:
+        term_number = get_term_number(db, year, current_sem())
+        version = database_version(db)
+        for key, document in current_term_documents(db, year, term_number, report):
+            documents.put((*version, key), document)
+    finally:
+        db.close()
+
+
+def warm_shared_documents(report) -> None:
+    """Map the shared documents of the current term, building them first if no worker has.
+
+    Workers starting together wait on a lock for the first one to build them.
+    """
+    year = current_year()
+    engine = shard_router.get_engine(year)
+    if engine is None or not engine.url.database:
+        return
+    database = engine.url.database
+    path = documents_path(database)
+    db = SessionLocal(bind=engine)
+    try:
+        term_number = get_term_number(db, year, current_sem())
+        stamp = {
+            "database": file_stamp(database),
+            "code": CODE_VERSION,
+            "year": year,
+            "term": term_number,
+        }
+        with open(f"{path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                shared = SharedDocuments(path)
+            except (OSError, ValueError, KeyError, SharedDocumentsError):
+                shared = None
+            if shared is None or shared.stamp != stamp:
+                size = write_documents(
+                    path,
+                    (
+                        (key, render_document(document))
+                        for key, document in current_term_documents(
+                            db, year, term_number, report
+                        )
+                    ),
+                    stamp,
+                )
+                shared = SharedDocuments(path)
+                print(
+                    f"[DOCUMENTS] Wrote {path}: {len(shared)} documents in "
+                    f"{size / 1024:.0f} KiB"
+                )
+        shared_documents[database] = shared
+        report(len(shared), len(shared))
+    finally:
+        db.close()
+
+
+warmup.add("page_cache", warm_page_cache)
+warmup.add("statements", warm_statements)
+if USE_SHARED_DOCUMENTS:
+    warmup.add("documents", warm_shared_documents)
+elif documents.size > 0:
+    warmup.add("documents", warm_documents)
+
+
+@app.get("/ready", include_in_schema=False)
+def get_ready():
+    """Whether the server has warmed up, with the progress and timing of each step.
+
+    Responds with 503 until the warm-up has finished.
+    """
+    report = warmup.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Request, SQL and cache metrics in the Prometheus text format."""
+    rendered = (
+        worker_metrics.render()
+        if worker_metrics is not None
+        else metrics.registry.render()
+    )
+    return Response(rendered, media_type=metrics.PROMETHEUS_CONTENT_TYPE)
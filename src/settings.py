@@ -0,0 +1,11 @@
+import os
+
+from dotenv import dotenv_values
+
+
+def get_setting(name: str, default: str = None) -> str:
+    """Gets a setting from the environment, falling back to the .env file."""
+    value = os.environ.get(name)
+    if value is None:
+        value = dotenv_values().get(name)
+    return default if value is None else value
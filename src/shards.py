@@ -0,0 +1,119 @@
+import os
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+
+from sqlalchemy import create_engine
+
+# Each year of courses is stored in its own database, e.g. src/shards/local-2026.sqlite3
+SHARD_DIR = "src/shards"
+
+
+def shard_path(prefix: str, year: int, shard_dir: str = SHARD_DIR) -> str:
+    """Gets the database path of a year's shard."""
+    return os.path.join(shard_dir, f"{prefix}-{year}.sqlite3")
+
+
+def parse_years(value: str) -> list[int]:
+    """
+    Parse the years to scrape from a setting such as "2026", "2025,2026" or "2025-2027".
+    """
+    years = []
+    for part in str(value).split(","):
+        if "-" in part:
+            start, end = part.split("-", 1)
+            years.extend(range(int(start), int(end) + 1))
+        elif part.strip():
+            years.append(int(part))
+    return sorted(set(years))
+
+
+class ShardRouter:
+    """Route each year to the engine of its database shard.
+
+    Shards are opened on first use and kept in a least recently used cache of at most
+    `max_open` engines. A shard whose file has been replaced (e.g. by `delta.py apply`)
+    has its connections closed, so new ones read the new file. Years without a shard
+    use the fallback database, which holds every year in databases scraped before
+    sharding.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        fallback_url: str = None,
+        shard_dir: str = SHARD_DIR,
+        max_open: int = 4,
+        on_open=None,
+    ) -> None:
+        self.prefix = prefix
+        self.shard_dir = shard_dir
+        self.max_open = max(1, max_open)
+        self.on_open = on_open
+        self.fallback_url = fallback_url
+        self.fallback_engine = None
+        self._engines = OrderedDict()
+        self._stamps = {}
+        self._lock = Lock()
+
+    def available_years(self) -> list[int]:
+        """Gets the years that have a shard, newest first."""
+        years = []
+        for path in Path(self.shard_dir).glob(f"{self.prefix}-*.sqlite3"):
+            year = path.stem.removeprefix(f"{self.prefix}-")
+            if year.isdigit():
+                years.append(int(year))
+        return sorted(years, reverse=True)
+
+    def get_path(self, year: int) -> str:
+        """Gets the database path of a year's shard, which may not exist."""
+        return shard_path(self.prefix, year, self.shard_dir)
+
+    def get_engine(self, year: int):
+        """Gets the engine for a year, opening its shard if needed."""
+        path = self.get_path(year)
+        try:
+            stat = os.stat(path)
+            stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+        with self._lock:
+            engine = self._engines.get(path)
+            if engine is not None:
+                self._engines.move_to_end(path)
+                if stamp is not None and stamp != self._stamps[path]:
+                    # Connections still using the old file close once returned
+                    engine.dispose()
+                    self._stamps[path] = stamp
+                return engine
+
+            if stamp is None:
+                return self._get_fallback_engine()
+
+            engine = self._open(f"sqlite:///{path}")
+            self._engines[path] = engine
+            self._stamps[path] = stamp
+            if len(self._engines) > self.max_open:
+                evicted_path, evicted = self._engines.popitem(last=False)
+                del self._stamps[evicted_path]
+                evicted.dispose()
+            return engine
+
+    def open_engines(self) -> list:
+        """Gets the currently open engines, including the fallback engine."""
+        with self._lock:
+            engines = list(self._engines.values())
+            if self.fallback_engine is not None:
+                engines.append(self.fallback_engine)
+            return engines
+
+    def _get_fallback_engine(self):
+        if self.fallback_engine is None and self.fallback_url:
+            self.fallback_engine = self._open(self.fallback_url)
+        return self.fallback_engine
+
+    def _open(self, url: str):
+        engine = create_engine(url)
+        if self.on_open:
+            self.on_open(engine)
+        return engine
@@ -0,0 +1,396 @@
+"""Compact binary snapshot of a year's courses, loaded by the server with a single mmap.
+
+A snapshot holds:
+    - an interned string table, each distinct string stored once
+    - one fixed-size record of string ids per course
+    - lookup indexes of courses by id and by subject (including cross-listings)
+    - the subject course counts of every term
+
+Usage:
+    uv run python src/snapshot.py src/shards/local-2026.sqlite3
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from threading import Lock
+
+from sqlalchemy import create_engine, inspect, text
+
+MAGIC = b"CAPISNAP"
+VERSION = 1
+# Magic, format version, byte order of the arrays and length of the table of contents
+HEADER = struct.Struct("<8sHcxI")
+BYTE_ORDER = b"<" if sys.byteorder == "little" else b">"
+NONE = 0xFFFFFFFF
+
+COURSE_FIELDS = (
+    "id",
+    "year",
+    "terms",
+    "subject",
+    "course_code",
+    "title",
+    "campus",
+    "level_of_study",
+    "university_wide_elective",
+)
+SnapshotCourse = namedtuple("SnapshotCourse", COURSE_FIELDS)
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def snapshot_path(database_path: str) -> str:
+    """Gets the snapshot path of a database, e.g. local-2026.snapshot for local-2026.sqlite3."""
+    return os.path.splitext(database_path)[0] + ".snapshot"
+
+
+class StringTable:
+    """Interns strings, giving each distinct string a small integer id."""
+
+    def __init__(self) -> None:
+        self.ids = {}
+        self.strings = []
+
+    def add(self, value) -> int:
+        if value is None:
+            return NONE
+        value = str(value)
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+    def sections(self) -> dict[str, bytes]:
+        offsets = array("I", [0])
+        data = bytearray()
+        for value in self.strings:
+            data += value.encode()
+            offsets.append(len(data))
+        return {"string_offsets": offsets.tobytes(), "strings": bytes(data)}
+
+
+def build_snapshot(
+    courses: list, course_subjects: list, subject_terms: list, **info
+) -> bytes:
+    """Build a snapshot.
+
+    Args:
+        courses (list): Rows of the values of COURSE_FIELDS.
+        course_subjects (list): (course id, subject) rows of cross-listed courses.
+        subject_terms (list): (year, term, subject, course count) rows.
+        info: Extra values stored in the table of contents, such as the dataset version.
+    """
+    strings = StringTable()
+    courses = sorted(courses, key=lambda course: (str(course[4]).lower(), course[0]))
+
+    records = array("I")
+    for course in courses:
+        *values, elective = course
+        records.extend(strings.add(value) for value in values)
+        records.append(NONE if elective is None else int(bool(elective)))
+
+    # Course positions sorted by id, for lookups by binary search
+    by_id = array("I", sorted(range(len(courses)), key=lambda i: courses[i][0]))
+
+    # Course positions of each subject, in course code order
+    positions = {course[0]: position for position, course in enumerate(courses)}
+    subject_courses = {}
+    for position, course in enumerate(courses):
+        subject_courses.setdefault(course[3], set()).add(position)
+    for course_id, subject in course_subjects:
+        if course_id in positions:
+            subject_courses.setdefault(subject, set()).add(positions[course_id])
+    subject_keys = array("I")
+    subject_offsets = array("I", [0])
+    subject_list = array("I")
+    for subject in sorted(subject_courses):
+        subject_keys.append(strings.add(subject))
+        subject_list.extend(sorted(subject_courses[subject]))
+        subject_offsets.append(len(subject_list))
+
+    terms = array("I")
+    for year, term, subject, course_count in sorted(subject_terms):
+        terms.extend((strings.add(year), strings.add(term), strings.add(subject)))
+        terms.append(course_count)
+
+    sections = {
+        **strings.sections(),
+        "courses": records.tobytes(),
+        "courses_by_id": by_id.tobytes(),
+        "subject_keys": subject_keys.tobytes(),
+        "subject_offsets": subject_offsets.tobytes(),
+        "subject_courses": subject_list.tobytes(),
+        "subject_terms": terms.tobytes(),
+    }
+
+    # Sections start at multiples of 8 bytes after the header and table of contents
+    toc = {"sections": {}, **info}
+    toc_length = 4096
+    while True:
+        offset = HEADER.size + toc_length
+        for name, data in sections.items():
+            offset += -offset % 8
+            toc["sections"][name] = [offset, len(data)]
+            offset += len(data)
+        encoded = json.dumps(toc).encode()
+        if len(encoded) <= toc_length:
+            break
+        toc_length *= 2
+
+    output = bytearray(HEADER.pack(MAGIC, VERSION, BYTE_ORDER, toc_length))
+    output += encoded.ljust(toc_length)
+    for name, data in sections.items():
+        output += bytes(toc["sections"][name][0] - len(output))
+        output += data
+    return bytes(output)
+
+
+def write_snapshot(engine, path: str) -> int:
+    """Write the snapshot of a database, replacing any previous one atomically.
+
+    Returns:
+        int: The size of the snapshot in bytes.
+    """
+    inspector = inspect(engine)
+    tables = inspector.get_table_names()
+    # Fields holding ids of interned strings are read as their strings
+    interned = {
+        column
+        for foreign_key in inspector.get_foreign_keys("courses")
+        if foreign_key["referred_table"] == "interned_strings"
+        for column in foreign_key["constrained_columns"]
+    }
+    fields = [
+        f"(SELECT value FROM interned_strings WHERE id = courses.{field}) AS {field}"
+        if field in interned
+        else field
+        for field in COURSE_FIELDS
+    ]
+    with engine.connect() as connection:
+        courses = connection.execute(
+            text(f"SELECT {', '.join(fields)} FROM courses")
+        ).all()
+        course_subjects = (
+            connection.execute(
+                text("SELECT course_id, subject FROM course_subjects")
+            ).all()
+            if "course_subjects" in tables
+            else []
+        )
+        subject_terms = (
+            connection.execute(
+                text("SELECT year, term, subject, course_count FROM subject_terms")
+            ).all()
+            if "subject_terms" in tables
+            else []
+        )
+        dataset_version = (
+            connection.execute(
+                text("SELECT MAX(version) FROM dataset_versions")
+            ).scalar()
+            if "dataset_versions" in tables
+            else None
+        )
+
+    data = build_snapshot(
+        courses, course_subjects, subject_terms, dataset_version=dataset_version
+    )
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(data)
+    os.replace(temporary_path, path)
+    return len(data)
+
+
+class Snapshot:
+    """A snapshot mapped into memory. Records are read from the mapping as needed."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as file:
+            try:
+                self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise SnapshotError(f"Empty snapshot {path}") from e
+        view = memoryview(self.buffer)
+        if len(view) < HEADER.size:
+            raise SnapshotError(f"Truncated snapshot {path}")
+        magic, version, byte_order, toc_length = HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise SnapshotError(f"Unsupported snapshot {path} (version {version})")
+        if byte_order != BYTE_ORDER:
+            raise SnapshotError(f"Snapshot {path} was written on another byte order")
+
+        toc = json.loads(bytes(view[HEADER.size : HEADER.size + toc_length]))
+        sections = {
+            name: view[offset : offset + length]
+            for name, (offset, length) in toc["sections"].items()
+        }
+        self.dataset_version = toc.get("dataset_version")
+        self.string_offsets = sections["string_offsets"].cast("I")
+        self.strings = sections["strings"]
+        self.records = sections["courses"].cast("I")
+        self.courses_by_id = sections["courses_by_id"].cast("I")
+        self.subject_keys = sections["subject_keys"].cast("I")
+        self.subject_offsets = sections["subject_offsets"].cast("I")
+        self.subject_courses = sections["subject_courses"].cast("I")
+        self.subject_terms = sections["subject_terms"].cast("I")
+        self.course_count = len(self.records) // len(COURSE_FIELDS)
+        self.subject_index = self.build_subject_index()
+
+    def string(self, string_id: int) -> str:
+        if string_id == NONE:
+            return None
+        start = self.string_offsets[string_id]
+        return str(self.strings[start : self.string_offsets[string_id + 1]], "utf-8")
+
+    def course(self, position: int) -> SnapshotCourse:
+        start = position * len(COURSE_FIELDS)
+        *values, elective = self.records[start : start + len(COURSE_FIELDS)]
+        return SnapshotCourse(
+            *(self.string(value) for value in values),
+            None if elective == NONE else bool(elective),
+        )
+
+    def field(self, position: int, name: str) -> str:
+        return self.string(
+            self.records[position * len(COURSE_FIELDS) + COURSE_FIELDS.index(name)]
+        )
+
+    def build_subject_index(self) -> dict[str, dict[str, dict[str, int]]]:
+        """Subject course counts in the form {year: {term: {subject: count}}}."""
+        index = {}
+        for i in range(0, len(self.subject_terms), 4):
+            year, term, subject, course_count = self.subject_terms[i : i + 4]
+            index.setdefault(self.string(year), {}).setdefault(self.string(term), {})[
+                self.string(subject)
+            ] = course_count
+        return index
+
+    def has_course(self, course_id: str) -> bool:
+        position = bisect_left(
+            range(self.course_count),
+            course_id,
+            key=lambda i: self.field(self.courses_by_id[i], "id"),
+        )
+        return (
+            position < self.course_count
+            and self.field(self.courses_by_id[position], "id") == course_id
+        )
+
+    def subject_positions(self, subject: str):
+        index = bisect_left(
+            range(len(self.subject_keys)),
+            subject,
+            key=lambda i: self.string(self.subject_keys[i]),
+        )
+        if index == len(self.subject_keys) or (
+            self.string(self.subject_keys[index]) != subject
+        ):
+            return []
+        return self.subject_courses[
+            self.subject_offsets[index] : self.subject_offsets[index + 1]
+        ]
+
+    def find_courses(
+        self,
+        year: int,
+        term: str,
+        subject: str = None,
+        university_wide_elective: bool = None,
+        level_of_study: str = None,
+    ) -> list[SnapshotCourse]:
+        """Courses of a year offered in a term, filtered like the /courses endpoint."""
+        positions = (
+            self.subject_positions(subject) if subject else range(self.course_count)
+        )
+        term = term.lower()
+        courses = []
+        for position in positions:
+            course = self.course(position)
+            if (
+                course.year == str(year)
+                and term in (course.terms or "").lower()
+                and (
+                    university_wide_elective is None
+                    or course.university_wide_elective == university_wide_elective
+                )
+                and (not level_of_study or course.level_of_study == level_of_study)
+            ):
+                courses.append(course)
+        return courses
+
+
+class SnapshotStore:
+    """Snapshots loaded by path, reloaded when their file is replaced.
+
+    `on_load(path, seconds)` is called after every load, with the time it took.
+    """
+
+    def __init__(self, on_load=None) -> None:
+        self.on_load = on_load
+        self.snapshots = {}
+        self.lock = Lock()
+
+    def get(self, path: str) -> Snapshot:
+        """Gets the snapshot at a path, or None if there is none or it can't be read."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.snapshots.pop(path, None)
+            return None
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        loaded = self.snapshots.get(path)
+        if loaded is not None and loaded[0] == stamp:
+            return loaded[1]
+
+        with self.lock:
+            loaded = self.snapshots.get(path)
+            if loaded is not None and loaded[0] == stamp:
+                return loaded[1]
+            start = time.perf_counter()
+            try:
+                snapshot = Snapshot(path)
+            except (OSError, ValueError, KeyError, SnapshotError) as e:
+                print(f"[SNAPSHOT] Ignoring {path}: {e}")
+                snapshot = None
+            # Replaced snapshots are unmapped once no request uses them any more
+            self.snapshots[path] = (stamp, snapshot)
+            if snapshot is not None and self.on_load:
+                self.on_load(path, time.perf_counter() - start)
+            return snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("databases", nargs="+", help="SQLite databases to snapshot")
+    args = parser.parse_args()
+
+    for database in args.databases:
+        path = snapshot_path(database)
+        engine = create_engine(f"sqlite:///{database}")
+        size = write_snapshot(engine, path)
+        engine.dispose()
+
+        start = time.perf_counter()
+        snapshot = Snapshot(path)
+        load_ms = (time.perf_counter() - start) * 1000
+        print(
+            f"[SNAPSHOT] Wrote {path}: {snapshot.course_count} courses in "
+            f"{size / 1024:.0f} KiB, loaded in {load_ms:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
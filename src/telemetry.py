@@ -0,0 +1,199 @@
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from threading import Lock
+from urllib.parse import urlsplit
+
+# Requests and errors are also counted per interval of this many seconds, to spot slowdowns
+TIMELINE_INTERVAL = 10
+REPORT_DIR = Path(__file__).resolve().parent.parent / "logs"
+
+
+def summarise(durations: list[float]) -> dict:
+    """Count, total and percentiles (in milliseconds) of a list of durations in seconds."""
+    if not durations:
+        return {"count": 0}
+    ordered = sorted(durations)
+
+    def percentile(fraction):
+        return round(
+            ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000, 3
+        )
+
+    return {
+        "count": len(ordered),
+        "total_s": round(sum(ordered), 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "max_ms": round(ordered[-1] * 1000, 3),
+    }
+
+
+class Telemetry:
+    """Collects timings and request counts across the scraper threads for a run report."""
+
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Start a new run, clearing everything recorded so far."""
+        with self.lock:
+            self.started = time.monotonic()
+            self.started_at = datetime.now(timezone.utc)
+            self.stages = {}
+            self.hosts = {}
+            self.proxies = {}
+            self.gauges = {}
+            self.timeline = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage of the scrape, e.g. `with telemetry.stage("html_parse"):`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_stage(name, time.perf_counter() - start)
+
+    def record_stage(self, name: str, elapsed: float) -> None:
+        with self.lock:
+            self.stages.setdefault(name, []).append(elapsed)
+
+    def interval(self) -> dict:
+        index = int((time.monotonic() - self.started) // TIMELINE_INTERVAL)
+        return self.timeline.setdefault(index, {"requests": 0, "errors": 0})
+
+    def host_stats(self, host: str) -> dict:
+        return self.hosts.setdefault(
+            host,
+            {
+                "requests": 0,
+                "statuses": {},
+                "latencies": [],
+                "connects": 0,
+                "handshakes": [],
+            },
+        )
+
+    def record_request(
+        self,
+        url: str,
+        status,
+        elapsed: float,
+        proxy: str = None,
+        connects: int = None,
+        handshake: float = None,
+    ) -> None:
+        """Record a request attempt, with its HTTP status or the name of the error raised.
+
+        `connects` is the number of new connections the request needed (0 when a kept
+        alive connection was reused) and `handshake` the time spent connecting.
+        """
+        host = urlsplit(url).netloc
+        with self.lock:
+            stats = self.host_stats(host)
+            stats["requests"] += 1
+            stats["statuses"][str(status)] = stats["statuses"].get(str(status), 0) + 1
+            stats["latencies"].append(elapsed)
+            if connects:
+                stats["connects"] += connects
+                stats["handshakes"].append(handshake or 0)
+
+            interval = self.interval()
+            interval["requests"] += 1
+            if status != 200:
+                interval["errors"] += 1
+
+            if proxy:
+                proxy_stats = self.proxies.setdefault(proxy, {"requests": 0, "ok": 0})
+                proxy_stats["requests"] += 1
+                proxy_stats["ok"] += status == 200
+
+    def record_retry(self, url: str, reason: str) -> None:
+        host = urlsplit(url).netloc
+        with self.lock:
+            retries = self.host_stats(host).setdefault("retries", {})
+            retries[reason] = retries.get(reason, 0) + 1
+
+    def gauge(self, name: str, value: float) -> None:
+        """Sample a gauge such as the writer queue depth."""
+        with self.lock:
+            stats = self.gauges.setdefault(
+                name, {"samples": 0, "total": 0, "max": 0, "last": 0}
+            )
+            stats["samples"] += 1
+            stats["total"] += value
+            stats["max"] = max(stats["max"], value)
+            stats["last"] = value
+            interval = self.interval()
+            interval[name] = max(interval.get(name, 0), value)
+
+    def report(self, **extra) -> dict:
+        """Build the run report."""
+        with self.lock:
+            elapsed = time.monotonic() - self.started
+            hosts = {}
+            for host, stats in self.hosts.items():
+                statuses = stats["statuses"]
+                hosts[host] = {
+                    "requests": stats["requests"],
+                    "requests_per_second": round(stats["requests"] / elapsed, 2),
+                    "statuses": statuses,
+                    "rate_limited": statuses.get("429", 0),
+                    "forbidden": statuses.get("403", 0),
+                    "retries": stats.get("retries", {}),
+                    "latency": summarise(stats["latencies"]),
+                    "new_connections": stats["connects"],
+                    "reused_connection_share": round(
+                        1
+                        - min(stats["connects"], stats["requests"])
+                        / max(1, stats["requests"]),
+                        3,
+                    ),
+                    "handshake": summarise(stats["handshakes"]),
+                }
+            proxies = {
+                proxy: {
+                    **stats,
+                    "success_rate": round(stats["ok"] / stats["requests"], 3),
+                }
+                for proxy, stats in sorted(
+                    self.proxies.items(), key=lambda item: -item[1]["requests"]
+                )
+            }
+            return {
+                **extra,
+                "started_at": self.started_at.isoformat(),
+                "duration_s": round(elapsed, 3),
+                "stages": {name: summarise(d) for name, d in self.stages.items()},
+                "hosts": hosts,
+                "proxies": proxies,
+                "gauges": {
+                    name: {
+                        "max": stats["max"],
+                        "mean": round(stats["total"] / stats["samples"], 2),
+                        "last": stats["last"],
+                    }
+                    for name, stats in self.gauges.items()
+                },
+                "timeline": [
+                    {"t": index * TIMELINE_INTERVAL, **interval}
+                    for index, interval in sorted(self.timeline.items())
+                ],
+            }
+
+    def write_report(self, name: str, report_dir: Path = REPORT_DIR, **extra) -> Path:
+        """Write the run report as JSON to {report_dir}/{name}-{timestamp}.json."""
+        report_dir = Path(report_dir)
+        report_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = self.started_at.strftime("%Y%m%d-%H%M%S")
+        path = report_dir / f"{name}-{timestamp}.json"
+        path.write_text(json.dumps(self.report(**extra), indent=2))
+        return path
+
+
+telemetry = Telemetry()
@@ -9,3 +9,30 @@ def get_term_code(term_name: str) -> str:
         "Semester 2": "25",
     }
     return mapping.get(term_name)
+
+
+def split_terms(terms: str) -> list[str]:
+    """Split a comma-joined terms string (e.g. "Semester 1,Semester 2") into terms."""
+    if not terms:
+        return []
+    return [term.strip() for term in terms.split(",") if term.strip()]
+
+
+def count_subjects_by_term(rows) -> dict[str, dict[str, dict[str, int]]]:
+    """
+    Count courses per subject for every (year, term) pair.
+    Takes an iterable of (year, terms, subject) rows and returns
+    {year: {term: {subject: course_count}}} with subjects sorted alphabetically.
+    """
+    counts = {}
+    for year, terms, subject in rows:
+        if not subject:  # Skip empty names
+            continue
+        for term in split_terms(terms):
+            term_counts = counts.setdefault(str(year), {}).setdefault(term, {})
+            term_counts[subject] = term_counts.get(subject, 0) + 1
+
+    return {
+        year: {term: dict(sorted(subjects.items())) for term, subjects in terms.items()}
+        for year, terms in counts.items()
+    }
@@ -0,0 +1,142 @@
+"""Compression of the large text columns with a dictionary shared by the whole database.
+
+Course overviews, textbooks, learning outcomes and assessment titles are only needed by
+the course details route. The scraper writes them as text, then compresses every value
+with zlib primed with a dictionary of the phrases common to the database. Compressed
+values are stored as blobs, and values not worth compressing stay text.
+"""
+
+import zlib
+from collections import Counter
+
+from sqlalchemy import inspect, text
+
+COMPRESSED_COLUMNS = {
+    "courses": ("course_overview", "textbooks"),
+    "learning_outcomes": ("description",),
+    "assessments": ("title",),
+}
+# zlib only looks back this far, so a longer dictionary isn't used
+DICTIONARY_SIZE = 32 * 1024
+FORMAT = b"\x01"
+
+
+def train_dictionary(samples: list[str], size: int = DICTIONARY_SIZE) -> bytes:
+    """Build a dictionary of the phrases (1 to 4 words) that save the most bytes in the samples."""
+    counts = Counter()
+    for sample in samples[:: max(1, len(samples) // 5000)]:
+        words = sample.split(" ")
+        for n in range(1, 5):
+            for i in range(len(words) - n + 1):
+                counts[" ".join(words[i : i + n])] += 1
+
+    phrases = []
+    length = 0
+    for phrase, _ in sorted(
+        ((phrase, count) for phrase, count in counts.items() if count > 1),
+        key=lambda item: (item[1] - 1) * len(item[0]),
+        reverse=True,
+    ):
+        if length >= size:
+            break
+        if any(phrase in chosen for chosen in phrases[-200:]):
+            continue
+        phrases.append(phrase)
+        length += len(phrase.encode()) + 1
+
+    # Phrases at the end of the dictionary are the cheapest to refer to
+    dictionary = " ".join(reversed(phrases)).encode()
+    return dictionary[-size:]
+
+
+def compress(value: str, dictionary: bytes) -> bytes:
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=dictionary)
+    return FORMAT + compressor.compress(value.encode()) + compressor.flush()
+
+
+def decompress(value, dictionary: bytes):
+    """The text of a stored value. Values stored as text are returned as they are."""
+    if not isinstance(value, bytes):
+        return value
+    decompressor = zlib.decompressobj(-15, zdict=dictionary)
+    return (
+        decompressor.decompress(value[len(FORMAT) :]) + decompressor.flush()
+    ).decode()
+
+
+def load_dictionary(engine) -> bytes:
+    """Gets the dictionary of a database, or None if its text isn't compressed."""
+    if not inspect(engine).has_table("text_dictionary"):
+        return None
+    with engine.connect() as connection:
+        return connection.execute(
+            text("SELECT data FROM text_dictionary WHERE id = 1")
+        ).scalar()
+
+
+def row_decoder(engine):
+    """Gets a function decompressing the text columns of rows read from a database."""
+    dictionary = load_dictionary(engine)
+
+    def decode_row(table_name: str, row: dict) -> dict:
+        columns = COMPRESSED_COLUMNS.get(table_name, ())
+        return {
+            name: decompress(value, dictionary) if name in columns else value
+            for name, value in row.items()
+        }
+
+    return decode_row
+
+
+def compress_database(engine, dictionary: bytes = None) -> dict:
+    """Compress the text columns of a database, then vacuum it to release the freed pages.
+
+    Args:
+        dictionary (bytes, optional): The dictionary to use, e.g. the previous version's
+            so unchanged values compress to the same bytes. Defaults to the database's
+            own dictionary, or one trained from its text.
+    Returns:
+        dict: The size of the text before and after compression and of the dictionary.
+    """
+    dictionary = dictionary or load_dictionary(engine)
+    stats = {"text_bytes": 0, "compressed_bytes": 0}
+    with engine.begin() as connection:
+        values = {
+            (table_name, column): connection.execute(
+                text(
+                    f"SELECT id, {column} FROM {table_name} "
+                    f"WHERE typeof({column}) = 'text'"
+                )
+            ).all()
+            for table_name, columns in COMPRESSED_COLUMNS.items()
+            for column in columns
+        }
+        if dictionary is None:
+            dictionary = train_dictionary(
+                [value for rows in values.values() for _, value in rows]
+            )
+        connection.execute(text("DELETE FROM text_dictionary"))
+        connection.execute(
+            text("INSERT INTO text_dictionary (id, data) VALUES (1, :data)"),
+            {"data": dictionary},
+        )
+
+        for (table_name, column), rows in values.items():
+            updates = []
+            for row_id, value in rows:
+                compressed = compress(value, dictionary)
+                stats["text_bytes"] += len(value.encode())
+                if len(compressed) < len(value.encode()):
+                    updates.append({"id": row_id, "value": compressed})
+                    stats["compressed_bytes"] += len(compressed)
+                else:
+                    stats["compressed_bytes"] += len(value.encode())
+            if updates:
+                connection.execute(
+                    text(f"UPDATE {table_name} SET {column} = :value WHERE id = :id"),
+                    updates,
+                )
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM"))
+    return {**stats, "dictionary_bytes": len(dictionary)}
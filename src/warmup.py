@@ -0,0 +1,72 @@
+import time
+from threading import Lock, Thread
+
+
+class Warmup:
+    """Runs the server's warm-up steps in a background thread and tracks their progress.
+
+    Each step is called with a `report(done, total)` function to report its progress.
+    A failing step is recorded and the next one runs, so the server still becomes ready.
+    """
+
+    def __init__(self) -> None:
+        self.steps = []
+        self.status = {}
+        self.started = None
+        self.finished = None
+        self.lock = Lock()
+
+    def add(self, name: str, step) -> None:
+        self.steps.append((name, step))
+        self.status[name] = {"state": "pending"}
+
+    @property
+    def ready(self) -> bool:
+        return self.finished is not None
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        Thread(target=self.run, daemon=True).start()
+
+    def skip(self) -> None:
+        """Report ready without warming up."""
+        self.started = self.finished = time.perf_counter()
+        for name, _ in self.steps:
+            self.status[name] = {"state": "skipped"}
+
+    def run(self) -> None:
+        for name, step in self.steps:
+            start = time.perf_counter()
+            self.update(name, state="running")
+
+            def report(done, total, name=name):
+                self.update(name, done=done, total=total)
+
+            try:
+                step(report)
+                self.update(name, state="done")
+            except Exception as e:
+                print(f"[WARMUP] {name} failed: {e}")
+                self.update(name, state="failed", error=str(e))
+            self.update(name, seconds=round(time.perf_counter() - start, 3))
+        self.finished = time.perf_counter()
+        print(f"[WARMUP] Ready in {self.finished - self.started:.1f}s")
+
+    def update(self, name: str, **values) -> None:
+        with self.lock:
+            self.status[name] = {**self.status[name], **values}
+
+    def report(self) -> dict:
+        """The readiness, elapsed time and progress of every step."""
+        with self.lock:
+            if self.started is None:
+                seconds = None
+            else:
+                seconds = round(
+                    (self.finished or time.perf_counter()) - self.started, 3
+                )
+            return {
+                "ready": self.ready,
+                "seconds": seconds,
+                "steps": {name: dict(status) for name, status in self.status.items()},
+            }